@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import authors, auth, usuarios, livros, solicitacoes_autores, editoras, emprestimos, reservas
+from app.api.endpoints import authors, auth, usuarios, livros, solicitacoes_autores, editoras, emprestimos, reservas, estatisticas, metricas, exportacao
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
@@ -10,3 +10,6 @@ api_router.include_router(editoras.router, prefix="", tags=["editoras"])
 api_router.include_router(emprestimos.router, prefix="", tags=["emprestimos"])
 api_router.include_router(reservas.router, prefix="", tags=["reservas"])
 api_router.include_router(solicitacoes_autores.router, prefix="", tags=["solicitacoes-autores"])
+api_router.include_router(estatisticas.router, prefix="", tags=["estatisticas"])
+api_router.include_router(metricas.router, prefix="", tags=["metricas"])
+api_router.include_router(exportacao.router, prefix="", tags=["exportacao"])
@@ -7,9 +7,9 @@ from sqlalchemy.exc import IntegrityError
 
 from app.core.database import get_db
 from app.core.auth import (
-    authenticate_user, 
+    authenticate_user_async, 
     create_access_token, 
-    get_password_hash,
+    get_password_hash_async,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_active_user
 )
@@ -53,7 +53,7 @@ async def login_for_access_token(
     db: Session = Depends(get_db)
 ):
     """Login via API - retorna token JWT"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -84,7 +84,7 @@ async def login_form(
     db: Session = Depends(get_db)
 ):
     """Login via formulário HTML - redireciona para dashboard"""
-    user = authenticate_user(db, email, senha)
+    user = await authenticate_user_async(db, email, senha)
     if not user:
         # Em uma implementação real, você redirecionaria com mensagem de erro
         raise HTTPException(
@@ -130,7 +130,7 @@ async def register_user(
         matricula = generate_matricula(db)
         
         # Criar novo usuário
-        hashed_password = get_password_hash(senha)
+        hashed_password = await get_password_hash_async(senha)
         db_user = UsuarioAuth(
             matricula=matricula,
             nome=nome,
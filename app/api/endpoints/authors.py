@@ -1,22 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional, Union
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.replica import get_db_leitura
+from app.core.pagination import paginar_por_cursor
+from app.core.cache_respostas import RotaComCache, em_cache
+from app.core.serializacao import lista_confiavel, pagina_confiavel
+from app.core.versoes import resposta_condicional
 from app.models.models import Autor as DBAutor, UsuarioAuth
 from app.schemas.author import Autor, AutorCreate, AutorUpdate
-from app.core.auth import get_current_user
+from app.schemas.pagination import PaginaCursor
+from app.core.auth import get_current_user, require_admin
 
-# Dependency para verificar se é admin
-async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Apenas administradores podem realizar esta ação."
-        )
-    return current_user
-
-router = APIRouter()
+router = APIRouter(route_class=RotaComCache)
 
 @router.post("/autores/", response_model=Autor, status_code=201)
 def create_author(
@@ -33,16 +30,26 @@ def create_author(
     db.refresh(db_autor)
     return db_autor
 
-@router.get("/autores/", response_model=List[Autor])
+@router.get("/autores/", response_model=Union[List[Autor], PaginaCursor[Autor]])
+@em_cache("autores")
 def read_authors(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     search: str = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db_leitura)
 ):
     """
-    Lista todos os autores com ordenação alfabética e pesquisa opcional
+    Lista todos os autores com ordenação alfabética e pesquisa opcional.
+    Com `cursor` a paginação é feita pela chave (nome, id).
+    Responde 304 a `If-None-Match` com a versão atual dos autores.
     """
+    nao_modificado = resposta_condicional(request, response, db, "autores")
+    if nao_modificado:
+        return nao_modificado
+    
     query = db.query(DBAutor)
     
     # Aplicar filtro de pesquisa se fornecido
@@ -52,17 +59,26 @@ def read_authors(
             DBAutor.nome.ilike(search_filter)
         )
     
+    if cursor is not None:
+        autores, next_cursor = paginar_por_cursor(query, [DBAutor.nome, DBAutor.id], cursor, limit)
+        return pagina_confiavel(Autor, autores, next_cursor, response)
+    
     # Ordenar alfabeticamente por nome
     query = query.order_by(DBAutor.nome.asc())
     
     autores = query.offset(skip).limit(limit).all()
-    return autores
+    return lista_confiavel(Autor, autores, response)
 
 @router.get("/autores/{autor_id}", response_model=Autor)
-def read_autor(autor_id: int, db: Session = Depends(get_db)):
+@em_cache("autores", "autor_id")
+def read_autor(autor_id: int, request: Request, response: Response, db: Session = Depends(get_db_leitura)):
     """
     Busca um autor específico pelo ID
     """
+    nao_modificado = resposta_condicional(request, response, db, "autores", autor_id)
+    if nao_modificado:
+        return nao_modificado
+    
     db_autor = db.query(DBAutor).filter(DBAutor.id == autor_id).first()
     if db_autor is None:
         raise HTTPException(status_code=404, detail="Autor não encontrado")
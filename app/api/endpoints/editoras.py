@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.replica import get_db_leitura
+from app.core.cache_respostas import RotaComCache, em_cache
+from app.core.serializacao import lista_confiavel
+from app.core.versoes import resposta_condicional
 from app.models.models import Editora as DBEditora, UsuarioAuth
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_admin
 from pydantic import BaseModel, Field
 
 # Schemas para editora
@@ -31,24 +35,21 @@ class EditoraResponse(EditoraBase):
     class Config:
         from_attributes = True
 
-# Dependency para verificar se é admin
-async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Apenas administradores podem realizar esta ação."
-        )
-    return current_user
-
-router = APIRouter()
+router = APIRouter(route_class=RotaComCache)
 
 @router.get("/editoras/", response_model=List[EditoraResponse])
-def listar_editoras(db: Session = Depends(get_db)):
+@em_cache("editoras")
+def listar_editoras(request: Request, response: Response, db: Session = Depends(get_db_leitura)):
     """
-    Lista todas as editoras
+    Lista todas as editoras.
+    Responde 304 a `If-None-Match` com a versão atual das editoras.
     """
+    nao_modificado = resposta_condicional(request, response, db, "editoras")
+    if nao_modificado:
+        return nao_modificado
+    
     editoras = db.query(DBEditora).all()
-    return editoras
+    return lista_confiavel(EditoraResponse, editoras, response)
 
 @router.post("/editoras/", response_model=EditoraResponse, status_code=201)
 def criar_editora(
@@ -74,10 +75,15 @@ def criar_editora(
     return db_editora
 
 @router.get("/editoras/{editora_id}", response_model=EditoraResponse)
-def obter_editora(editora_id: int, db: Session = Depends(get_db)):
+@em_cache("editoras", "editora_id")
+def obter_editora(editora_id: int, request: Request, response: Response, db: Session = Depends(get_db_leitura)):
     """
     Obtém uma editora por ID
     """
+    nao_modificado = resposta_condicional(request, response, db, "editoras", editora_id)
+    if nao_modificado:
+        return nao_modificado
+    
     editora = db.query(DBEditora).filter(DBEditora.id == editora_id).first()
     if not editora:
         raise HTTPException(
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from datetime import datetime, timedelta
 
+from app.core.circulacao import STATUS_EM_ABERTO, calcular_multa, motivo_recusa, motivos_recusa, retirar_livros
 from app.core.database import get_db
+from app.core.fila_reservas import concluir_reservas, promover_proxima, promover_proximas
+from app.core.pagination import paginar_por_cursor
+from app.core.serializacao import resposta_confiavel
 from app.models.models import (
     Emprestimo as DBEmprestimo, 
     Livro as DBLivro, 
@@ -13,7 +18,8 @@ from app.models.models import (
     StatusLivro,
     TipoUsuario
 )
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_admin
+from app.schemas.pagination import PaginaCursor
 from pydantic import BaseModel, Field
 
 # Schemas para empréstimo
@@ -50,55 +56,136 @@ class EmprestimoResponse(BaseModel):
     class Config:
         from_attributes = True
 
-# Dependency para verificar se é admin
-async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)):
+MAX_ITENS_LOTE = 50
+
+class EmprestimoLoteCreate(BaseModel):
+    usuario_id: Optional[int] = Field(None, description="ID do usuário (ignorado para não admins)")
+    livro_ids: List[int] = Field(..., min_length=1, max_length=MAX_ITENS_LOTE, description="IDs dos livros")
+    observacoes: Optional[str] = Field(None, max_length=500, description="Observações dos empréstimos")
+
+class DevolucaoLote(BaseModel):
+    emprestimo_ids: List[int] = Field(..., min_length=1, max_length=MAX_ITENS_LOTE, description="IDs dos empréstimos")
+    observacoes: Optional[str] = Field(None, max_length=500, description="Observações das devoluções")
+
+class ItemLoteEmprestimo(BaseModel):
+    livro_id: Optional[int] = None
+    emprestimo_id: Optional[int] = None
+    sucesso: bool
+    erro: Optional[str] = None
+    emprestimo: Optional[EmprestimoResponse] = None
+
+class ResultadoLoteEmprestimos(BaseModel):
+    sucessos: int
+    falhas: int
+    itens: List[ItemLoteEmprestimo]
+
+router = APIRouter()
+
+def _dados_emprestimo(emp: DBEmprestimo) -> dict:
+    """Campos de `EmprestimoResponse` com os nomes do usuário, do livro e do autor"""
+    return {
+        "id": emp.id,
+        "usuario_id": emp.usuario_id,
+        "livro_id": emp.livro_id,
+        "data_emprestimo": emp.data_emprestimo,
+        "data_devolucao_prevista": emp.data_devolucao_prevista,
+        "data_devolucao_real": emp.data_devolucao_real,
+        "status": emp.status,
+        "multa": emp.multa,
+        "observacoes": emp.observacoes,
+        "usuario_nome": emp.usuario.nome if emp.usuario else None,
+        "livro_titulo": emp.livro.titulo if emp.livro else None,
+        "livro_autor": emp.livro.autor.nome if emp.livro and emp.livro.autor else None
+    }
+
+def _enriquecer_emprestimos(emprestimos: List[DBEmprestimo]) -> List[EmprestimoResponse]:
+    """Monta as respostas com os nomes do usuário, do livro e do autor"""
+    # Dados lidos do banco, já tipados: monta sem validar. O response_model não
+    # valida de novo na saída (o Pydantic não revalida instâncias do modelo)
+    return [EmprestimoResponse.model_construct(**_dados_emprestimo(emp)) for emp in emprestimos]
+
+def _usuario_do_emprestimo(db: Session, current_user: UsuarioAuth, usuario_id: Optional[int]) -> DBUsuario:
+    """
+    Usuário do empréstimo: admins escolhem qualquer usuário; usuários comuns
+    sempre emprestam para si (o cadastro em `usuarios` é criado se faltar)
+    """
+    # Se não for admin, criar/buscar usuário automaticamente pela matrícula
     if not current_user.is_admin:
+        # Buscar usuário na tabela usuarios pela matrícula do usuário logado
+        usuario_logado = db.query(DBUsuario).filter(DBUsuario.matricula == current_user.matricula).first()
+        
+        # Se o usuário não existe na tabela usuarios, criar automaticamente
+        if not usuario_logado:
+            usuario_logado = DBUsuario(
+                nome=current_user.nome,
+                email=current_user.email,
+                matricula=current_user.matricula,
+                tipo=TipoUsuario.ALUNO,
+                ativo=True
+            )
+            db.add(usuario_logado)
+            db.commit()
+            db.refresh(usuario_logado)
+        
+        # Para usuários comuns, usar sempre o usuário logado
+        return usuario_logado
+    
+    # Para admins, verificar se o usuário especificado existe
+    usuario = db.query(DBUsuario).filter(DBUsuario.id == usuario_id).first()
+    
+    if not usuario:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Apenas administradores podem realizar esta ação."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário não encontrado"
         )
-    return current_user
+    return usuario
 
-router = APIRouter()
+def _gravar_emprestimos(db: Session) -> None:
+    """Flush dos novos empréstimos; o índice único de empréstimos em aberto barra duplicatas"""
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Livro já possui um empréstimo em aberto"
+        )
 
-@router.get("/emprestimos/", response_model=List[EmprestimoResponse])
+@router.get("/emprestimos/", response_model=Union[List[EmprestimoResponse], PaginaCursor[EmprestimoResponse]])
 def listar_emprestimos(
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[StatusEmprestimo] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     admin_user: UsuarioAuth = Depends(require_admin)
 ):
     """
-    Lista todos os empréstimos (apenas admins)
+    Lista todos os empréstimos (apenas admins).
+    Com `cursor` a paginação é feita pela chave (data_emprestimo, id).
     """
-    query = db.query(DBEmprestimo).join(DBUsuario).join(DBLivro)
+    # Usuário e livro vêm do próprio JOIN e o autor de um LEFT JOIN adicional,
+    # então a página inteira é montada com uma única consulta
+    query = db.query(DBEmprestimo).join(DBUsuario).join(DBLivro).options(
+        contains_eager(DBEmprestimo.usuario),
+        contains_eager(DBEmprestimo.livro).joinedload(DBLivro.autor)
+    )
     
     if status_filter:
         query = query.filter(DBEmprestimo.status == status_filter)
     
+    if cursor is not None:
+        emprestimos, next_cursor = paginar_por_cursor(
+            query, [DBEmprestimo.data_emprestimo, DBEmprestimo.id], cursor, limit
+        )
+        return resposta_confiavel({
+            "items": [_dados_emprestimo(emp) for emp in emprestimos], "next_cursor": next_cursor
+        })
+    
     emprestimos = query.offset(skip).limit(limit).all()
     
     # Enriquecer com dados relacionados
-    result = []
-    for emp in emprestimos:
-        emp_dict = {
-            "id": emp.id,
-            "usuario_id": emp.usuario_id,
-            "livro_id": emp.livro_id,
-            "data_emprestimo": emp.data_emprestimo,
-            "data_devolucao_prevista": emp.data_devolucao_prevista,
-            "data_devolucao_real": emp.data_devolucao_real,
-            "status": emp.status,
-            "multa": emp.multa,
-            "observacoes": emp.observacoes,
-            "usuario_nome": emp.usuario.nome if emp.usuario else None,
-            "livro_titulo": emp.livro.titulo if emp.livro else None,
-            "livro_autor": emp.livro.autor.nome if emp.livro and emp.livro.autor else None
-        }
-        result.append(EmprestimoResponse(**emp_dict))
-    
-    return result
+    return resposta_confiavel([_dados_emprestimo(emp) for emp in emprestimos])
 
 @router.post("/emprestimos/", response_model=EmprestimoResponse, status_code=201)
 def criar_emprestimo(
@@ -109,37 +196,8 @@ def criar_emprestimo(
     """
     Cria um novo empréstimo (admins podem para qualquer usuário, usuários comuns apenas para si)
     """
-    
-    # Se não for admin, criar/buscar usuário automaticamente pela matrícula
-    if not current_user.is_admin:
-        # Buscar usuário na tabela usuarios pela matrícula do usuário logado
-        usuario_logado = db.query(DBUsuario).filter(DBUsuario.matricula == current_user.matricula).first()
-        
-        # Se o usuário não existe na tabela usuarios, criar automaticamente
-        if not usuario_logado:
-            usuario_logado = DBUsuario(
-                nome=current_user.nome,
-                email=current_user.email,
-                matricula=current_user.matricula,
-                tipo=TipoUsuario.ALUNO,
-                ativo=True
-            )
-            db.add(usuario_logado)
-            db.commit()
-            db.refresh(usuario_logado)
-        
-        # Para usuários comuns, usar sempre o ID do usuário logado
-        emprestimo.usuario_id = usuario_logado.id
-        
-    else:
-        # Para admins, verificar se o usuário especificado existe
-        usuario = db.query(DBUsuario).filter(DBUsuario.id == emprestimo.usuario_id).first()
-        
-        if not usuario:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Usuário não encontrado"
-            )
+    usuario = _usuario_do_emprestimo(db, current_user, emprestimo.usuario_id)
+    emprestimo.usuario_id = usuario.id
     
     # Verificar se o livro existe e está disponível
     livro = db.query(DBLivro).filter(DBLivro.id == emprestimo.livro_id).first()
@@ -149,42 +207,25 @@ def criar_emprestimo(
             detail="Livro não encontrado"
         )
     
-    if livro.status != StatusLivro.DISPONIVEL:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Livro não está disponível para empréstimo. Status atual: {livro.status}"
-        )
-    
-    # Verificar se o usuário já tem empréstimos ativos deste livro
-    emprestimo_ativo = db.query(DBEmprestimo).filter(
-        DBEmprestimo.usuario_id == emprestimo.usuario_id,
-        DBEmprestimo.livro_id == emprestimo.livro_id,
-        DBEmprestimo.status == StatusEmprestimo.ATIVO
-    ).first()
+    # UPDATE condicional: de duas requisições simultâneas só uma altera o livro.
+    # A leitura acima só serve para recusar cedo sem disputar a escrita.
+    if livro.status != StatusLivro.DISPONIVEL or not retirar_livros(db, [livro.id], emprestimo.usuario_id):
+        erro = motivo_recusa(db, livro, emprestimo.usuario_id)
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=erro)
     
-    if emprestimo_ativo:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuário já possui um empréstimo ativo deste livro"
-        )
+    # Livro guardado pela fila para este usuário: a reserva foi atendida
+    concluir_reservas(db, [livro.id], emprestimo.usuario_id)
     
-    # Criar o empréstimo
     db_emprestimo = DBEmprestimo(
         usuario_id=emprestimo.usuario_id,
         livro_id=emprestimo.livro_id,
         observacoes=emprestimo.observacoes
     )
-    
-    # Atualizar status do livro
-    livro.status = StatusLivro.EMPRESTADO
-    
     db.add(db_emprestimo)
-    db.add(livro)
+    _gravar_emprestimos(db)
     db.commit()
     db.refresh(db_emprestimo)
-    
-    # Garantir que temos o usuário para preencher a resposta
-    usuario = db.query(DBUsuario).filter(DBUsuario.id == db_emprestimo.usuario_id).first()
 
     # Retornar com dados enriquecidos
     return EmprestimoResponse(
@@ -202,6 +243,141 @@ def criar_emprestimo(
         livro_autor=livro.autor.nome if livro.autor else None
     )
 
+@router.post("/emprestimos/lote", response_model=ResultadoLoteEmprestimos)
+def criar_emprestimos_em_lote(
+    lote: EmprestimoLoteCreate,
+    db: Session = Depends(get_db),
+    current_user: UsuarioAuth = Depends(get_current_user)
+):
+    """
+    Empresta vários livros ao mesmo usuário em uma única transação.
+
+    Todos os livros disponíveis são retirados com um único UPDATE
+    condicional; livros que não podem ser emprestados são reportados no
+    item correspondente e não impedem os demais.
+    """
+    usuario = _usuario_do_emprestimo(db, current_user, lote.usuario_id)
+    
+    livros = {
+        livro.id: livro
+        for livro in db.query(DBLivro)
+        .options(joinedload(DBLivro.autor, innerjoin=True))
+        .filter(DBLivro.id.in_(lote.livro_ids))
+    }
+    
+    itens = []
+    processados = set()
+    for livro_id in lote.livro_ids:
+        erro = None
+        if livro_id in processados:
+            erro = "Livro repetido no lote"
+        elif livro_id not in livros:
+            erro = "Livro não encontrado"
+        processados.add(livro_id)
+        itens.append((livro_id, None, erro))
+    
+    # Os indisponíveis também vão ao UPDATE condicional, que os ignora
+    candidatos = [livro_id for livro_id, _, erro in itens if not erro]
+    retirados = retirar_livros(db, candidatos, usuario.id)
+    concluir_reservas(db, retirados, usuario.id)
+    # Uma consulta para explicar todas as recusas
+    motivos = motivos_recusa(db, set(candidatos) - retirados, usuario.id)
+    
+    for indice, (livro_id, _, erro) in enumerate(itens):
+        if erro:
+            continue
+        livro = livros[livro_id]
+        if livro_id not in retirados:
+            itens[indice] = (livro_id, None, motivos[livro_id])
+            continue
+        # Relacionamentos em memória: a resposta não precisa de novas consultas
+        db_emprestimo = DBEmprestimo(usuario=usuario, livro=livro, observacoes=lote.observacoes)
+        db.add(db_emprestimo)
+        itens[indice] = (livro_id, db_emprestimo, None)
+    
+    # Ids e defaults saem no flush; a resposta é montada antes do commit
+    # expirar os objetos
+    _gravar_emprestimos(db)
+    resultado = [
+        ItemLoteEmprestimo(
+            livro_id=livro_id,
+            emprestimo_id=db_emprestimo.id if db_emprestimo else None,
+            sucesso=db_emprestimo is not None,
+            erro=erro,
+            emprestimo=_enriquecer_emprestimos([db_emprestimo])[0] if db_emprestimo else None
+        )
+        for livro_id, db_emprestimo, erro in itens
+    ]
+    db.commit()
+    
+    sucessos = sum(1 for item in resultado if item.sucesso)
+    return ResultadoLoteEmprestimos(sucessos=sucessos, falhas=len(resultado) - sucessos, itens=resultado)
+
+@router.put("/emprestimos/lote/devolver", response_model=ResultadoLoteEmprestimos)
+def devolver_livros_em_lote(
+    lote: DevolucaoLote,
+    db: Session = Depends(get_db),
+    admin_user: UsuarioAuth = Depends(require_admin)
+):
+    """
+    Registra a devolução de vários empréstimos em uma única transação (apenas admins).
+
+    A multa de cada devolução em atraso é calculada como nas rotas do
+    frontend (`calcular_multa`).
+    """
+    emprestimos = {
+        emprestimo.id: emprestimo
+        for emprestimo in db.query(DBEmprestimo).options(
+            joinedload(DBEmprestimo.usuario),
+            joinedload(DBEmprestimo.livro).joinedload(DBLivro.autor)
+        ).filter(DBEmprestimo.id.in_(lote.emprestimo_ids))
+    }
+    
+    agora = datetime.utcnow()
+    itens = []
+    processados = set()
+    for emprestimo_id in lote.emprestimo_ids:
+        emprestimo = emprestimos.get(emprestimo_id)
+        erro = None
+        if emprestimo_id in processados:
+            erro = "Empréstimo repetido no lote"
+        elif not emprestimo:
+            erro = "Empréstimo não encontrado"
+        elif emprestimo.status not in STATUS_EM_ABERTO:
+            erro = "Este empréstimo não está ativo"
+        processados.add(emprestimo_id)
+        
+        if erro:
+            itens.append((emprestimo_id, None, erro))
+            continue
+        
+        emprestimo.data_devolucao_real = agora
+        emprestimo.status = StatusEmprestimo.DEVOLVIDO
+        emprestimo.multa = calcular_multa(emprestimo.data_devolucao_prevista, agora)
+        if lote.observacoes:
+            emprestimo.observacoes = lote.observacoes
+        if emprestimo.livro:
+            emprestimo.livro.status = StatusLivro.DISPONIVEL
+        itens.append((emprestimo_id, emprestimo, None))
+    
+    # As filas de todos os livros devolvidos andam em um único UPDATE
+    promover_proximas(db, {emprestimo.livro_id for _, emprestimo, _ in itens if emprestimo}, agora)
+    
+    resultado = [
+        ItemLoteEmprestimo(
+            livro_id=emprestimo.livro_id if emprestimo else None,
+            emprestimo_id=emprestimo_id,
+            sucesso=emprestimo is not None,
+            erro=erro,
+            emprestimo=_enriquecer_emprestimos([emprestimo])[0] if emprestimo else None
+        )
+        for emprestimo_id, emprestimo, erro in itens
+    ]
+    db.commit()
+    
+    sucessos = sum(1 for item in resultado if item.sucesso)
+    return ResultadoLoteEmprestimos(sucessos=sucessos, falhas=len(resultado) - sucessos, itens=resultado)
+
 @router.get("/emprestimos/{emprestimo_id}", response_model=EmprestimoResponse)
 def obter_emprestimo(
     emprestimo_id: int,
@@ -236,13 +412,14 @@ def obter_emprestimo(
 @router.put("/emprestimos/{emprestimo_id}/devolver", response_model=EmprestimoResponse)
 def devolver_livro(
     emprestimo_id: int,
-    multa: Optional[float] = 0.0,
+    multa: Optional[float] = None,
     observacoes: Optional[str] = None,
     db: Session = Depends(get_db),
     admin_user: UsuarioAuth = Depends(require_admin)
 ):
     """
-    Registra a devolução de um livro (apenas admins)
+    Registra a devolução de um livro (apenas admins).
+    Sem `multa`, cobra o atraso pela regra de `calcular_multa`.
     """
     emprestimo = db.query(DBEmprestimo).filter(DBEmprestimo.id == emprestimo_id).first()
     if not emprestimo:
@@ -251,7 +428,7 @@ def devolver_livro(
             detail="Empréstimo não encontrado"
         )
     
-    if emprestimo.status != StatusEmprestimo.ATIVO:
+    if emprestimo.status not in STATUS_EM_ABERTO:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Este empréstimo não está ativo"
@@ -260,7 +437,9 @@ def devolver_livro(
     # Atualizar empréstimo
     emprestimo.data_devolucao_real = datetime.utcnow()
     emprestimo.status = StatusEmprestimo.DEVOLVIDO
-    emprestimo.multa = multa or 0.0
+    emprestimo.multa = multa if multa is not None else calcular_multa(
+        emprestimo.data_devolucao_prevista, emprestimo.data_devolucao_real
+    )
     if observacoes:
         emprestimo.observacoes = observacoes
     
@@ -269,6 +448,7 @@ def devolver_livro(
     if livro:
         livro.status = StatusLivro.DISPONIVEL
         db.add(livro)
+        promover_proxima(db, livro.id, emprestimo.data_devolucao_real)
     
     db.add(emprestimo)
     db.commit()
@@ -298,24 +478,9 @@ def listar_emprestimos_usuario(
     """
     Lista empréstimos de um usuário específico (apenas admins)
     """
-    emprestimos = db.query(DBEmprestimo).filter(DBEmprestimo.usuario_id == usuario_id).all()
-    
-    result = []
-    for emp in emprestimos:
-        emp_dict = {
-            "id": emp.id,
-            "usuario_id": emp.usuario_id,
-            "livro_id": emp.livro_id,
-            "data_emprestimo": emp.data_emprestimo,
-            "data_devolucao_prevista": emp.data_devolucao_prevista,
-            "data_devolucao_real": emp.data_devolucao_real,
-            "status": emp.status,
-            "multa": emp.multa,
-            "observacoes": emp.observacoes,
-            "usuario_nome": emp.usuario.nome if emp.usuario else None,
-            "livro_titulo": emp.livro.titulo if emp.livro else None,
-            "livro_autor": emp.livro.autor.nome if emp.livro and emp.livro.autor else None
-        }
-        result.append(EmprestimoResponse(**emp_dict))
+    emprestimos = db.query(DBEmprestimo).options(
+        joinedload(DBEmprestimo.usuario),
+        joinedload(DBEmprestimo.livro).joinedload(DBLivro.autor)
+    ).filter(DBEmprestimo.usuario_id == usuario_id).all()
     
-    return result
+    return resposta_confiavel([_dados_emprestimo(emp) for emp in emprestimos])
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.estatisticas import obter_estatisticas, livros_populares
+from app.models.models import UsuarioAuth
+from app.schemas.estatisticas import Estatisticas
+from app.core.auth import require_admin
+
+router = APIRouter()
+
+@router.get("/estatisticas/", response_model=Estatisticas)
+def ler_estatisticas(
+    db: Session = Depends(get_db),
+    admin_user: UsuarioAuth = Depends(require_admin)
+):
+    """
+    Estatísticas de circulação para o dashboard (apenas admins)
+    """
+    estatisticas = obter_estatisticas(db)
+    return Estatisticas(
+        total_livros=estatisticas.total_livros,
+        total_emprestimos=estatisticas.total_emprestimos,
+        emprestimos_ativos=estatisticas.emprestimos_ativos,
+        emprestimos_atrasados=estatisticas.emprestimos_atrasados,
+        usuarios_ativos=estatisticas.usuarios_ativos,
+        livros_populares=livros_populares(db),
+        atualizado_em=estatisticas.atualizado_em
+    )
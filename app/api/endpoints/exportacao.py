@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.auth import require_admin
+from app.core.exportacao import TIPOS_CONTEUDO, exportar
+from app.core.replica import replica_engine
+from app.models.models import UsuarioAuth
+
+router = APIRouter()
+
+
+@router.get("/exportar/{recurso}")
+def exportar_recurso(
+    recurso: Literal["livros", "emprestimos", "usuarios"],
+    formato: Literal["csv", "ndjson"] = "ndjson",
+    since: Optional[datetime] = Query(
+        None, description="Só linhas criadas ou alteradas a partir desta data"
+    ),
+    admin_user: UsuarioAuth = Depends(require_admin)
+):
+    """
+    Exporta livros, empréstimos ou usuários em CSV ou NDJSON, ordenados por id.
+
+    O corpo é gerado em streaming a partir de um cursor do banco (a réplica
+    de leitura, se configurada), com memória constante para qualquer volume.
+    """
+    return StreamingResponse(
+        exportar(replica_engine, recurso, formato, since),
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{recurso}.{formato}"'}
+    )
@@ -1,23 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.orm import Session
+import io
 
-from app.core.database import get_db
-from app.models.models import Livro as DBLivro, Autor as DBAutor, Editora as DBEditora
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from typing import List, Optional, Union
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+
+from app.core.database import engine, get_db
+from app.core.importacao import LEITORES, TAMANHO_LOTE, formato_do_arquivo, importar_livros
+from app.core.replica import get_db_leitura
+from app.core.pagination import paginar_por_cursor
+from app.core.search import buscar_ids_livros, filtro_busca_livros
+from app.core.cache_respostas import RotaComCache, em_cache
+from app.core.serializacao import campos_pedidos, linha_confiavel, lista_confiavel, pagina_confiavel, resposta_confiavel
+from app.core.versoes import resposta_condicional
+from app.models.models import Livro as DBLivro, Autor as DBAutor, Editora as DBEditora, Categoria as DBCategoria
 from app.schemas.book import Livro, LivroCreate, LivroUpdate
-from app.core.auth import get_current_user
+from app.schemas.importacao import ResultadoImportacao
+from app.schemas.pagination import PaginaCursor
+from app.core.auth import get_current_user, require_admin
 from app.models.models import UsuarioAuth
 
-# Dependency para verificar se é admin
-async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Apenas administradores podem realizar esta ação."
-        )
-    return current_user
+router = APIRouter(route_class=RotaComCache)
+
+# Relacionamentos do schema `Livro`, carregados só quando pedidos em `expand`
+RELACOES_LIVRO = {
+    "autor": joinedload(DBLivro.autor).load_only(DBAutor.id, DBAutor.nome),
+    "editora": joinedload(DBLivro.editora).load_only(DBEditora.id, DBEditora.nome),
+    "categorias": selectinload(DBLivro.categorias).load_only(DBCategoria.id, DBCategoria.nome),
+}
+DESCRICAO_FIELDS = "Campos do livro separados por vírgula (ex.: id,titulo,status); padrão: todos"
+DESCRICAO_EXPAND = "Relacionamentos incluídos: autor, editora, categorias; padrão: todos, ou nenhum se houver `fields`"
 
-router = APIRouter()
+def _campos_livro(fields: Optional[str], expand: Optional[str]) -> tuple:
+    return campos_pedidos(Livro, fields, expand, RELACOES_LIVRO)
+
+def _carregar_campos(query, campos: tuple, *extras):
+    """Seleciona só as colunas de `campos` (mais `extras`) e carrega só os relacionamentos pedidos"""
+    colunas = [getattr(DBLivro, nome) for nome in campos if nome not in RELACOES_LIVRO]
+    return query.options(
+        load_only(*colunas, *extras),
+        *[carga for nome, carga in RELACOES_LIVRO.items() if nome in campos]
+    )
 
 @router.post("/livros/", response_model=Livro, status_code=201)
 def create_livro(
@@ -61,46 +83,134 @@ def create_livro(
     
     return db_livro
 
-@router.get("/livros/", response_model=List[Livro])
+@router.post("/livros/importar", response_model=ResultadoImportacao)
+def importar_livros_arquivo(
+    arquivo: UploadFile = File(...),
+    formato: Optional[str] = Query(None, description="csv ou jsonl; padrão: extensão do arquivo"),
+    tamanho_lote: int = Query(TAMANHO_LOTE, ge=100, le=50000),
+    criar_autores: bool = True,
+    criar_editoras: bool = True,
+    admin_user: UsuarioAuth = Depends(require_admin)
+):
+    """
+    Importa livros em massa de um arquivo CSV (com cabeçalho) ou JSONL.
+
+    O arquivo é processado em streaming e em lotes, cada um com seu commit;
+    linhas inválidas são reportadas com o número da linha e não interrompem
+    a importação.
+    """
+    formato = (formato or formato_do_arquivo(arquivo.filename or "") or "").lower()
+    if formato == "ndjson":
+        formato = "jsonl"
+    if formato not in LEITORES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato não suportado. Use CSV ou JSONL"
+        )
+
+    texto = io.TextIOWrapper(arquivo.file, encoding="utf-8-sig", newline="")
+    try:
+        return importar_livros(
+            engine,
+            LEITORES[formato](texto),
+            tamanho_lote=tamanho_lote,
+            criar_autores=criar_autores,
+            criar_editoras=criar_editoras
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo deve estar em UTF-8"
+        )
+    finally:
+        texto.detach()
+
+@router.get("/livros/", response_model=Union[List[Livro], PaginaCursor[Livro]])
+@em_cache("livros")
 def read_livros(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     search: str = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=DESCRICAO_FIELDS),
+    expand: Optional[str] = Query(None, description=DESCRICAO_EXPAND),
+    db: Session = Depends(get_db_leitura)
 ):
     """
-    Lista todos os livros com ordenação alfabética e pesquisa opcional
+    Lista todos os livros com ordenação alfabética e pesquisa opcional.
+    Com `search`, os resultados vêm ordenados por relevância.
+    
+    Com `cursor` (vazio na primeira página) a paginação é feita pela chave
+    (titulo, id) e a resposta traz `next_cursor` para a página seguinte.
+    
+    Com `fields` e `expand` a resposta traz só os campos e relacionamentos
+    pedidos (ex.: `?fields=id,titulo,status` para listas de seleção), e a
+    consulta lê só essas colunas.
+    
+    Responde 304 a `If-None-Match` com a versão atual do catálogo.
     """
+    campos = _campos_livro(fields, expand)
+    nao_modificado = resposta_condicional(request, response, db, "livros")
+    if nao_modificado:
+        return nao_modificado
+    
     query = db.query(DBLivro)
     
+    # Paginação por cursor: a busca apenas filtra, a ordem é sempre alfabética
+    if cursor is not None:
+        if search:
+            query = query.filter(filtro_busca_livros(db, search))
+        # O título entra no próximo cursor
+        query = _carregar_campos(query, campos, DBLivro.titulo)
+        livros, next_cursor = paginar_por_cursor(query, [DBLivro.titulo, DBLivro.id], cursor, limit)
+        return pagina_confiavel(Livro, livros, next_cursor, response, campos)
+    
+    query = _carregar_campos(query, campos)
+    
     # Aplicar filtro de pesquisa se fornecido
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            DBLivro.titulo.ilike(search_filter)
-        )
+        # Busca textual no índice FTS (título, subtítulo, sinopse, autor e editora)
+        ids = buscar_ids_livros(db, search, skip, limit)
+        if ids is not None:
+            livros = query.filter(DBLivro.id.in_(ids)).all() if ids else []
+            por_id = {livro.id: livro for livro in livros}
+            return lista_confiavel(Livro, [por_id[livro_id] for livro_id in ids if livro_id in por_id], response, campos)
+        
+        query = query.filter(filtro_busca_livros(db, search))
     
     # Ordenar alfabeticamente por título
     query = query.order_by(DBLivro.titulo.asc())
     
     livros = query.offset(skip).limit(limit).all()
-    return livros
+    return lista_confiavel(Livro, livros, response, campos)
 
 @router.get("/livros/{livro_id}", response_model=Livro)
+@em_cache("livros", "livro_id")
 def read_livro(
     livro_id: int, 
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=DESCRICAO_FIELDS),
+    expand: Optional[str] = Query(None, description=DESCRICAO_EXPAND),
+    db: Session = Depends(get_db_leitura)
 ):
     """
-    Busca um livro por ID
+    Busca um livro por ID (com `fields`/`expand` como na listagem)
     """
-    livro = db.query(DBLivro).filter(DBLivro.id == livro_id).first()
+    campos = _campos_livro(fields, expand)
+    nao_modificado = resposta_condicional(request, response, db, "livros", livro_id)
+    if nao_modificado:
+        return nao_modificado
+    
+    livro = _carregar_campos(db.query(DBLivro), campos).filter(DBLivro.id == livro_id).first()
     if not livro:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Livro não encontrado"
         )
-    return livro
+    return resposta_confiavel(linha_confiavel(Livro, livro, campos), response)
 
 @router.put("/livros/{livro_id}", response_model=Livro)
 def update_livro(
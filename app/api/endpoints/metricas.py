@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+
+from app.core.auth import require_admin
+from app.core.metrics import coletar_metricas
+from app.models.models import UsuarioAuth
+
+router = APIRouter()
+
+@router.get("/metricas/")
+def ler_metricas(admin_user: UsuarioAuth = Depends(require_admin)):
+    """
+    Contadores internos (caches, filas, etc.) para monitoramento (apenas admins)
+    """
+    return coletar_metricas()
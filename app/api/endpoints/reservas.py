@@ -1,23 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from typing import List, Optional, Union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.database import get_db
+from app.core.fila_reservas import posicoes_na_fila, promover_proxima, proxima_posicao, retirar_da_fila
+from app.core.pagination import paginar_por_cursor
 from app.models.models import Reserva as DBReserva, Livro as DBLivro, Usuario as DBUsuario, StatusLivro, StatusReserva
 from app.schemas.reserva import Reserva, ReservaCreate, ReservaUpdate
+from app.schemas.pagination import PaginaCursor
 from app.core.auth import get_current_user
 from app.models.models import UsuarioAuth
 
 router = APIRouter()
 
+# Novas tentativas quando outra reserva simultânea ocupa a mesma senha na fila
+TENTATIVAS_RESERVA = 3
+
 @router.post("/reservas/", response_model=Reserva, status_code=201)
 def create_reserva(
     reserva: ReservaCreate, 
     db: Session = Depends(get_db)
 ):
     """
-    Cria uma nova reserva para um livro
+    Cria uma nova reserva para um livro, no fim da fila (FIFO) do livro
     """
     # Verificar se o livro existe
     livro = db.query(DBLivro).filter(DBLivro.id == reserva.livro_id).first()
@@ -27,8 +33,12 @@ def create_reserva(
             detail="Livro não encontrado"
         )
     
-    # Verificar se o livro está emprestado (só pode reservar se estiver emprestado)
-    if livro.status != StatusLivro.EMPRESTADO:
+    # Só entra na fila quem não pode retirar o livro agora: emprestado ou
+    # já guardado para outra reserva
+    if livro.status == StatusLivro.DISPONIVEL and not db.query(DBReserva.id).filter(
+        DBReserva.livro_id == reserva.livro_id,
+        DBReserva.status == StatusReserva.ATIVA
+    ).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Apenas livros emprestados podem ser reservados"
@@ -42,49 +52,93 @@ def create_reserva(
             detail="Usuário não encontrado"
         )
 
-    # Verificar se o usuário já tem reserva ativa para este livro
-    reserva_existente = db.query(DBReserva).filter(
-        DBReserva.usuario_id == reserva.usuario_id,
-        DBReserva.livro_id == reserva.livro_id,
-        DBReserva.status == StatusReserva.PENDENTE
-    ).first()
-
-    if reserva_existente:
+    # Criar a reserva; a senha na fila é calculada no próprio INSERT e a
+    # validade só começa a contar quando a reserva for promovida. Dois INSERTs
+    # simultâneos podem calcular a mesma senha: o índice único da fila barra o
+    # segundo, que tenta de novo com a cauda já atualizada
+    for _ in range(TENTATIVAS_RESERVA):
+        db_reserva = DBReserva(
+            usuario_id=reserva.usuario_id,
+            livro_id=reserva.livro_id,
+            status=StatusReserva.PENDENTE,
+            posicao=proxima_posicao(reserva.livro_id)
+        )
+        db.add(db_reserva)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            db.rollback()
+            # Índice único parcial: uma reserva em aberto por usuário e livro
+            if db.query(DBReserva.id).filter(
+                DBReserva.usuario_id == reserva.usuario_id,
+                DBReserva.livro_id == reserva.livro_id,
+                DBReserva.status.in_([StatusReserva.PENDENTE, StatusReserva.ATIVA])
+            ).first():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Usuário já possui uma reserva pendente para este livro"
+                )
+    else:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuário já possui uma reserva pendente para este livro"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Muitas reservas simultâneas para este livro; tente novamente"
         )
 
-    # Criar a reserva
-    db_reserva = DBReserva(
-        usuario_id=reserva.usuario_id,
-        livro_id=reserva.livro_id,
-        status=StatusReserva.PENDENTE,
-        data_validade=datetime.utcnow() + timedelta(days=7) # Validade de 7 dias
-    )
-    db.add(db_reserva)
+    # Se o livro foi devolvido depois da verificação acima, a fila é atendida agora
+    db.expire(livro)
+    promover_proxima(db, reserva.livro_id)
     db.commit()
     db.refresh(db_reserva)
     
-    return db_reserva
+    return _enriquecer_reservas(db, [db_reserva])[0]
+
+def _enriquecer_reservas(db: Session, reservas: List[DBReserva]) -> List[Reserva]:
+    """Monta as respostas com o título do livro, o nome do usuário e a posição na fila"""
+    posicoes = posicoes_na_fila(db, reservas)
+    return [
+        Reserva(
+            id=reserva.id,
+            livro_id=reserva.livro_id,
+            usuario_id=reserva.usuario_id,
+            data_reserva=reserva.data_reserva,
+            status=reserva.status,
+            data_validade=reserva.data_validade,
+            posicao_fila=posicoes.get(reserva.id),
+            livro_titulo=reserva.livro.titulo if reserva.livro else None,
+            usuario_nome=reserva.usuario.nome if reserva.usuario else None
+        )
+        for reserva in reservas
+    ]
 
-@router.get("/reservas/", response_model=List[Reserva])
+@router.get("/reservas/", response_model=Union[List[Reserva], PaginaCursor[Reserva]])
 def read_reservas(
     skip: int = 0, 
     limit: int = 100,
     usuario_id: int = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Lista todas as reservas
+    Lista todas as reservas.
+    Com `cursor` a paginação é feita pela chave (data_reserva, id).
     """
-    query = db.query(DBReserva)
+    query = db.query(DBReserva).options(
+        joinedload(DBReserva.livro).load_only(DBLivro.titulo),
+        joinedload(DBReserva.usuario).load_only(DBUsuario.nome)
+    )
     
     if usuario_id:
         query = query.filter(DBReserva.usuario_id == usuario_id)
+    
+    if cursor is not None:
+        reservas, next_cursor = paginar_por_cursor(
+            query, [DBReserva.data_reserva, DBReserva.id], cursor, limit
+        )
+        return {"items": _enriquecer_reservas(db, reservas), "next_cursor": next_cursor}
         
     reservas = query.offset(skip).limit(limit).all()
-    return reservas
+    return _enriquecer_reservas(db, reservas)
 
 @router.delete("/reservas/{reserva_id}")
 def cancel_reserva(
@@ -92,7 +146,8 @@ def cancel_reserva(
     db: Session = Depends(get_db)
 ):
     """
-    Cancela uma reserva
+    Cancela uma reserva. Quem estava atrás na fila avança; se o livro estava
+    guardado para esta reserva, passa para a próxima da fila.
     """
     reserva = db.query(DBReserva).filter(DBReserva.id == reserva_id).first()
     if not reserva:
@@ -101,7 +156,13 @@ def cancel_reserva(
             detail="Reserva não encontrada"
         )
     
-    reserva.status = StatusReserva.CANCELADA
+    if reserva.status not in (StatusReserva.PENDENTE, StatusReserva.ATIVA):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Esta reserva não está em aberto"
+        )
+    
+    retirar_da_fila(db, reserva, StatusReserva.CANCELADA)
     db.commit()
     
     return {"message": "Reserva cancelada com sucesso"}
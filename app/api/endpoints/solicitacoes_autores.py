@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core.pagination import paginar_por_cursor
 from app.models.models import SolicitacaoAutor as DBSolicitacaoAutor, Autor as DBAutor, UsuarioAuth, StatusSolicitacao
 from app.schemas.solicitacao_autor import (
     SolicitacaoAutorCreate, 
@@ -11,19 +12,11 @@ from app.schemas.solicitacao_autor import (
     SolicitacaoAutorUpdate,
     SolicitacaoAutorSimples
 )
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_admin
+from app.schemas.pagination import PaginaCursor
 
 router = APIRouter()
 
-# Dependency para verificar se é admin
-async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Apenas administradores podem realizar esta ação."
-        )
-    return current_user
-
 @router.post("/solicitacoes-autores/", response_model=SolicitacaoAutorResponse, status_code=201)
 def criar_solicitacao_autor(
     solicitacao: SolicitacaoAutorCreate,
@@ -71,34 +64,48 @@ def criar_solicitacao_autor(
     
     return response
 
-@router.get("/solicitacoes-autores/", response_model=List[SolicitacaoAutorSimples])
+def _montar_solicitacoes(solicitacoes: List[DBSolicitacaoAutor]) -> List[SolicitacaoAutorSimples]:
+    """Prepara a resposta com os nomes dos solicitantes (já carregados via joinedload)"""
+    response = []
+    for solicitacao in solicitacoes:
+        solicitante = solicitacao.solicitante
+        response.append(SolicitacaoAutorSimples(
+            **solicitacao.__dict__,
+            solicitante_nome=solicitante.nome if solicitante else "Usuário não encontrado"
+        ))
+    
+    return response
+
+@router.get(
+    "/solicitacoes-autores/",
+    response_model=Union[List[SolicitacaoAutorSimples], PaginaCursor[SolicitacaoAutorSimples]]
+)
 def listar_solicitacoes_autores(
     skip: int = 0,
     limit: int = 100,
     status_filtro: Optional[StatusSolicitacao] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     admin_user: UsuarioAuth = Depends(require_admin)
 ):
     """
-    Lista todas as solicitações de autores (apenas admins)
+    Lista todas as solicitações de autores (apenas admins).
+    Com `cursor` a paginação é feita pela chave (data_solicitacao, id).
     """
-    query = db.query(DBSolicitacaoAutor)
+    query = db.query(DBSolicitacaoAutor).options(joinedload(DBSolicitacaoAutor.solicitante))
     
     if status_filtro:
         query = query.filter(DBSolicitacaoAutor.status == status_filtro)
     
-    solicitacoes = query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        solicitacoes, next_cursor = paginar_por_cursor(
+            query, [DBSolicitacaoAutor.data_solicitacao, DBSolicitacaoAutor.id], cursor, limit
+        )
+        return {"items": _montar_solicitacoes(solicitacoes), "next_cursor": next_cursor}
     
-    # Preparar resposta com nomes dos solicitantes
-    response = []
-    for solicitacao in solicitacoes:
-        solicitante = db.query(UsuarioAuth).filter(UsuarioAuth.id == solicitacao.solicitante_id).first()
-        response.append(SolicitacaoAutorSimples(
-            **solicitacao.__dict__,
-            solicitante_nome=solicitante.nome if solicitante else "Usuário não encontrado"
-        ))
+    solicitacoes = query.offset(skip).limit(limit).all()
     
-    return response
+    return _montar_solicitacoes(solicitacoes)
 
 @router.get("/solicitacoes-autores/{solicitacao_id}", response_model=SolicitacaoAutorResponse)
 def obter_solicitacao_autor(
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.circulacao import STATUS_EM_ABERTO, calcular_multa, motivo_recusa, retirar_livros
+from app.core.database import get_async_db
+from app.core.fila_reservas import concluir_reservas, promover_proxima
 from app.models import models
 from app.schemas import book, author, user, emprestimo
 
@@ -25,22 +28,22 @@ async def create_livro(
     sinopse: Optional[str] = Form(None),
     genero: Optional[str] = Form(None),
     idioma: Optional[str] = Form("Português"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Verificar se o autor existe
-        autor = db.query(models.Autor).filter(models.Autor.id == autor_id).first()
+        autor = await db.get(models.Autor, autor_id)
         if not autor:
             raise HTTPException(status_code=404, detail="Autor não encontrado")
         
         # Verificar se a editora existe (se fornecida)
         if editora_id:
-            editora = db.query(models.Editora).filter(models.Editora.id == editora_id).first()
+            editora = await db.get(models.Editora, editora_id)
             if not editora:
                 raise HTTPException(status_code=404, detail="Editora não encontrada")
         
         # Verificar se ISBN já existe
-        existing_book = db.query(models.Livro).filter(models.Livro.isbn == isbn).first()
+        existing_book = (await db.execute(select(models.Livro).where(models.Livro.isbn == isbn))).scalars().first()
         if existing_book:
             raise HTTPException(status_code=400, detail="ISBN já cadastrado")
         
@@ -59,15 +62,15 @@ async def create_livro(
         )
         
         db.add(db_livro)
-        db.commit()
-        db.refresh(db_livro)
+        await db.commit()
+        await db.refresh(db_livro)
         return RedirectResponse(url="/livros", status_code=303)
         
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade dos dados")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.put("/livros/{livro_id}")
@@ -85,10 +88,10 @@ async def update_livro(
     genero: Optional[str] = Form(None),
     idioma: Optional[str] = Form(None),
     status: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        livro = db.query(models.Livro).filter(models.Livro.id == livro_id).first()
+        livro = await db.get(models.Livro, livro_id)
         if not livro:
             raise HTTPException(status_code=404, detail="Livro não encontrado")
         
@@ -100,22 +103,22 @@ async def update_livro(
             update_data["subtitulo"] = subtitulo
         if autor_id is not None:
             # Verificar se o autor existe
-            autor = db.query(models.Autor).filter(models.Autor.id == autor_id).first()
+            autor = await db.get(models.Autor, autor_id)
             if not autor:
                 raise HTTPException(status_code=404, detail="Autor não encontrado")
             update_data["autor_id"] = autor_id
         if editora_id is not None:
             # Verificar se a editora existe
-            editora = db.query(models.Editora).filter(models.Editora.id == editora_id).first()
+            editora = await db.get(models.Editora, editora_id)
             if not editora:
                 raise HTTPException(status_code=404, detail="Editora não encontrada")
             update_data["editora_id"] = editora_id
         if isbn is not None:
             # Verificar se ISBN já existe em outro livro
-            existing_book = db.query(models.Livro).filter(
+            existing_book = (await db.execute(select(models.Livro).where(
                 models.Livro.isbn == isbn, 
                 models.Livro.id != livro_id
-            ).first()
+            ))).scalars().first()
             if existing_book:
                 raise HTTPException(status_code=400, detail="ISBN já cadastrado")
             update_data["isbn"] = isbn
@@ -137,28 +140,28 @@ async def update_livro(
         for key, value in update_data.items():
             setattr(livro, key, value)
         
-        db.commit()
+        await db.commit()
         return RedirectResponse(url=f"/livros/{livro_id}", status_code=303)
         
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade dos dados")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.delete("/livros/{livro_id}")
-async def delete_livro(livro_id: int, db: Session = Depends(get_db)):
+async def delete_livro(livro_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        livro = db.query(models.Livro).filter(models.Livro.id == livro_id).first()
+        livro = await db.get(models.Livro, livro_id)
         if not livro:
             raise HTTPException(status_code=404, detail="Livro não encontrado")
         
         # Verificar se há empréstimos ativos
-        emprestimos_ativos = db.query(models.Emprestimo).filter(
+        emprestimos_ativos = (await db.execute(select(models.Emprestimo).where(
             models.Emprestimo.livro_id == livro_id,
-            models.Emprestimo.status == models.StatusEmprestimo.ATIVO
-        ).first()
+            models.Emprestimo.status.in_(STATUS_EM_ABERTO)
+        ))).scalars().first()
         
         if emprestimos_ativos:
             raise HTTPException(
@@ -166,12 +169,12 @@ async def delete_livro(livro_id: int, db: Session = Depends(get_db)):
                 detail="Não é possível excluir livro com empréstimos ativos"
             )
         
-        db.delete(livro)
-        db.commit()
+        await db.delete(livro)
+        await db.commit()
         return RedirectResponse(url="/livros", status_code=303)
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 # ==================== ROTAS PARA AUTORES ====================
@@ -182,7 +185,7 @@ async def create_autor(
     nacionalidade: Optional[str] = Form(None),
     data_nascimento: Optional[str] = Form(None),
     biografia: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Converter data se fornecida
@@ -199,14 +202,14 @@ async def create_autor(
         )
         
         db.add(db_autor)
-        db.commit()
-        db.refresh(db_autor)
+        await db.commit()
+        await db.refresh(db_autor)
         return RedirectResponse(url="/autores", status_code=303)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.put("/autores/{autor_id}")
@@ -216,10 +219,10 @@ async def update_autor(
     nacionalidade: Optional[str] = Form(None),
     data_nascimento: Optional[str] = Form(None),
     biografia: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        autor = db.query(models.Autor).filter(models.Autor.id == autor_id).first()
+        autor = await db.get(models.Autor, autor_id)
         if not autor:
             raise HTTPException(status_code=404, detail="Autor não encontrado")
         
@@ -233,13 +236,13 @@ async def update_autor(
         if biografia is not None:
             autor.biografia = biografia
         
-        db.commit()
+        await db.commit()
         return RedirectResponse(url=f"/autores/{autor_id}", status_code=303)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 # ==================== ROTAS PARA USUÁRIOS ====================
@@ -255,21 +258,21 @@ async def create_usuario(
     telefone: Optional[str] = Form(None),
     endereco: Optional[str] = Form(None),
     data_nascimento: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Verificar se email já existe
-        existing_user = db.query(models.Usuario).filter(models.Usuario.email == email).first()
+        existing_user = (await db.execute(select(models.Usuario).where(models.Usuario.email == email))).scalars().first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email já cadastrado")
         
         # Verificar se CPF já existe
-        existing_cpf = db.query(models.Usuario).filter(models.Usuario.cpf == cpf).first()
+        existing_cpf = (await db.execute(select(models.Usuario).where(models.Usuario.cpf == cpf))).scalars().first()
         if existing_cpf:
             raise HTTPException(status_code=400, detail="CPF já cadastrado")
         
         # Verificar se matrícula já existe
-        existing_matricula = db.query(models.Usuario).filter(models.Usuario.matricula == matricula).first()
+        existing_matricula = (await db.execute(select(models.Usuario).where(models.Usuario.matricula == matricula))).scalars().first()
         if existing_matricula:
             raise HTTPException(status_code=400, detail="Matrícula já cadastrada")
         
@@ -292,17 +295,17 @@ async def create_usuario(
         )
         
         db.add(db_usuario)
-        db.commit()
-        db.refresh(db_usuario)
+        await db.commit()
+        await db.refresh(db_usuario)
         return RedirectResponse(url="/usuarios", status_code=303)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD")
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade dos dados")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 # ==================== ROTAS PARA EMPRÉSTIMOS ====================
@@ -312,33 +315,28 @@ async def create_emprestimo(
     usuario_id: int = Form(...),
     livro_id: int = Form(...),
     observacoes: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Verificar se usuário existe e está ativo
-        usuario = db.query(models.Usuario).filter(
+        usuario = (await db.execute(select(models.Usuario).where(
             models.Usuario.id == usuario_id,
             models.Usuario.ativo == True
-        ).first()
+        ))).scalars().first()
         if not usuario:
             raise HTTPException(status_code=404, detail="Usuário não encontrado ou inativo")
         
-        # Verificar se livro existe e está disponível
-        livro = db.query(models.Livro).filter(
-            models.Livro.id == livro_id,
-            models.Livro.status == models.StatusLivro.DISPONIVEL
-        ).first()
+        livro = await db.get(models.Livro, livro_id)
         if not livro:
-            raise HTTPException(status_code=404, detail="Livro não encontrado ou não disponível")
+            raise HTTPException(status_code=404, detail="Livro não encontrado")
         
-        # Verificar se usuário já tem empréstimo ativo deste livro
-        emprestimo_existente = db.query(models.Emprestimo).filter(
-            models.Emprestimo.usuario_id == usuario_id,
-            models.Emprestimo.livro_id == livro_id,
-            models.Emprestimo.status == models.StatusEmprestimo.ATIVO
-        ).first()
-        if emprestimo_existente:
-            raise HTTPException(status_code=400, detail="Usuário já possui empréstimo ativo deste livro")
+        # UPDATE condicional: só uma de duas requisições simultâneas retira o livro
+        if livro.status != models.StatusLivro.DISPONIVEL or not await db.run_sync(
+            lambda s: retirar_livros(s, [livro_id], usuario_id)
+        ):
+            erro = await db.run_sync(lambda s: motivo_recusa(s, s.get(models.Livro, livro_id), usuario_id))
+            raise HTTPException(status_code=400, detail=erro)
+        await db.run_sync(lambda s: concluir_reservas(s, [livro_id], usuario_id))
         
         # Criar empréstimo
         db_emprestimo = models.Emprestimo(
@@ -346,31 +344,27 @@ async def create_emprestimo(
             livro_id=livro_id,
             observacoes=observacoes
         )
-        
-        # Atualizar status do livro
-        livro.status = models.StatusLivro.EMPRESTADO
-        
         db.add(db_emprestimo)
-        db.commit()
-        db.refresh(db_emprestimo)
+        await db.commit()
+        await db.refresh(db_emprestimo)
         
         return RedirectResponse(url="/emprestimos", status_code=303)
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.put("/emprestimos/{emprestimo_id}/devolver")
 async def devolver_livro(
     emprestimo_id: int,
     observacoes: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        emprestimo = db.query(models.Emprestimo).filter(
+        emprestimo = (await db.execute(select(models.Emprestimo).where(
             models.Emprestimo.id == emprestimo_id,
-            models.Emprestimo.status == models.StatusEmprestimo.ATIVO
-        ).first()
+            models.Emprestimo.status.in_(STATUS_EM_ABERTO)
+        ))).scalars().first()
         
         if not emprestimo:
             raise HTTPException(status_code=404, detail="Empréstimo não encontrado ou já finalizado")
@@ -385,16 +379,16 @@ async def devolver_livro(
         
         # Calcular multa se atrasado
         if emprestimo.data_devolucao_real > emprestimo.data_devolucao_prevista:
-            dias_atraso = (emprestimo.data_devolucao_real - emprestimo.data_devolucao_prevista).days
-            emprestimo.multa = dias_atraso * 2.0  # R$ 2,00 por dia de atraso
+            emprestimo.multa = calcular_multa(emprestimo.data_devolucao_prevista, emprestimo.data_devolucao_real)
         
         # Atualizar status do livro
-        livro = db.query(models.Livro).filter(models.Livro.id == emprestimo.livro_id).first()
+        livro = await db.get(models.Livro, emprestimo.livro_id)
         livro.status = models.StatusLivro.DISPONIVEL
+        await db.run_sync(lambda s: promover_proxima(s, livro.id, emprestimo.data_devolucao_real))
         
-        db.commit()
+        await db.commit()
         return RedirectResponse(url=f"/emprestimos/{emprestimo_id}", status_code=303)
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
@@ -0,0 +1,191 @@
+"""
+Assets estáticos com o hash do conteúdo no nome, manifesto e pré-compressão.
+
+`python build_assets.py` gera `app/static_build` a partir de `app/static`:
+
+- cada arquivo ganha o hash do conteúdo no nome (`css/style.3f9a1c2e7b4d.css`)
+  e as referências `url(...)` dos CSS passam a apontar para os nomes finais,
+  então o CSS muda de hash quando uma fonte ou imagem que ele usa muda;
+- os arquivos de texto são pré-comprimidos em `.gz` e `.br` (o `.br` requer
+  o pacote `brotli` no build; sem ele, só `.gz`);
+- `manifest.json` mapeia o caminho original para o final.
+
+Em execução, `asset("css/style.css")` (global dos templates) resolve pelo
+manifesto; sem build, aponta para o arquivo original em `app/static`.
+`ArquivosEstaticos` serve os arquivos com hash com `Cache-Control: immutable`
+por um ano (o nome muda a cada alteração) e entrega a variante `.br`/`.gz`
+conforme o `Accept-Encoding`, sem comprimir nada por requisição.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_APP = Path(__file__).resolve().parent.parent
+DIRETORIO_ORIGEM = DIRETORIO_APP / "static"
+DIRETORIO_BUILD = DIRETORIO_APP / "static_build"
+MANIFESTO = "manifest.json"
+PREFIXO_URL = "/static/"
+
+# Formatos de texto; fontes woff/woff2 e imagens já são comprimidas
+COMPRIMIVEIS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".ttf", ".eot"}
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+_URL_CSS = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_SOURCE_MAP = re.compile(rb"\n?(/\*# sourceMappingURL=(\S+) \*/|//# sourceMappingURL=(\S+))\s*$")
+
+
+def _nome_com_hash(caminho: str, conteudo: bytes) -> str:
+    diretorio, nome = posixpath.split(caminho)
+    base, extensao = posixpath.splitext(nome)
+    digest = hashlib.sha256(conteudo).hexdigest()[:12]
+    return posixpath.join(diretorio, f"{base}.{digest}{extensao}")
+
+
+def _sem_source_map_ausente(caminho: str, conteudo: bytes, existentes: Set[str]) -> bytes:
+    """Remove o comentário sourceMappingURL se o .map não foi incluído (evita 404)"""
+    encontrado = _SOURCE_MAP.search(conteudo)
+    if not encontrado:
+        return conteudo
+    mapa = (encontrado.group(2) or encontrado.group(3)).decode()
+    if posixpath.normpath(posixpath.join(posixpath.dirname(caminho), mapa)) in existentes:
+        return conteudo
+    return conteudo[:encontrado.start()] + b"\n"
+
+
+def _reescrever_urls_css(caminho: str, conteudo: bytes, manifesto: Dict[str, str]) -> bytes:
+    """Aponta os url(...) relativos do CSS para os nomes com hash"""
+    diretorio = posixpath.dirname(caminho)
+
+    def trocar(encontrado: re.Match) -> str:
+        aspas, url = encontrado.group(1), encontrado.group(2)
+        if url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return encontrado.group(0)
+        # Query/fragmento do original (ex.: ?v=123, #iefix) são descartados; o hash já versiona
+        alvo = posixpath.normpath(posixpath.join(diretorio, re.split(r"[?#]", url)[0]))
+        if alvo not in manifesto:
+            return encontrado.group(0)
+        relativo = posixpath.relpath(manifesto[alvo], diretorio or ".")
+        return f"url({aspas}{relativo}{aspas})"
+
+    return _URL_CSS.sub(trocar, conteudo.decode("utf-8")).encode("utf-8")
+
+
+def _comprimir(destino: Path, conteudo: bytes, brotli) -> int:
+    """Grava as variantes .gz e .br quando ficam menores; retorna quantas"""
+    variantes = [(".gz", gzip.compress(conteudo, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append((".br", brotli.compress(conteudo, quality=11)))
+    gravadas = 0
+    for extensao, comprimido in variantes:
+        if len(comprimido) < len(conteudo):
+            destino.with_name(destino.name + extensao).write_bytes(comprimido)
+            gravadas += 1
+    return gravadas
+
+
+def construir_assets(origem: Path = DIRETORIO_ORIGEM, destino: Path = DIRETORIO_BUILD) -> dict:
+    """Gera `destino` com os arquivos de `origem` renomeados por hash, o manifesto e as variantes comprimidas"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        logger.warning("Pacote 'brotli' não instalado: gerando apenas as variantes .gz")
+
+    arquivos = {
+        caminho.relative_to(origem).as_posix(): caminho
+        for caminho in sorted(origem.rglob("*")) if caminho.is_file() and caminho.suffix != ".map"
+    }
+    if destino.exists():
+        shutil.rmtree(destino)
+
+    # CSS por último: as referências aos outros arquivos entram no seu hash
+    manifesto: Dict[str, str] = {}
+    comprimidos = 0
+    for relativo in sorted(arquivos, key=lambda nome: (nome.endswith(".css"), nome)):
+        conteudo = arquivos[relativo].read_bytes()
+        if relativo.endswith((".css", ".js")):
+            conteudo = _sem_source_map_ausente(relativo, conteudo, set(arquivos))
+        if relativo.endswith(".css"):
+            conteudo = _reescrever_urls_css(relativo, conteudo, manifesto)
+
+        final = _nome_com_hash(relativo, conteudo)
+        manifesto[relativo] = final
+        caminho_final = destino / final
+        caminho_final.parent.mkdir(parents=True, exist_ok=True)
+        caminho_final.write_bytes(conteudo)
+        if caminho_final.suffix in COMPRIMIVEIS:
+            comprimidos += _comprimir(caminho_final, conteudo, brotli)
+
+    (destino / MANIFESTO).write_text(json.dumps(manifesto, indent=2, sort_keys=True), encoding="utf-8")
+    return {"arquivos": len(manifesto), "variantes_comprimidas": comprimidos, "brotli": brotli is not None}
+
+
+def carregar_manifesto(diretorio: Path = DIRETORIO_BUILD) -> Dict[str, str]:
+    try:
+        return json.loads((diretorio / MANIFESTO).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+_manifesto = carregar_manifesto()
+
+
+def asset(caminho: str) -> str:
+    """URL pública do asset (com hash se houver build)"""
+    caminho = caminho.lstrip("/")
+    return PREFIXO_URL + _manifesto.get(caminho, caminho)
+
+
+def codificacoes_aceitas(scope: Scope) -> Set[str]:
+    aceitas = set()
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        nome, _, parametros = item.strip().partition(";")
+        if nome and parametros.replace(" ", "") not in ("q=0", "q=0.0"):
+            aceitas.add(nome.lower())
+    return aceitas
+
+
+class ArquivosEstaticos(StaticFiles):
+    """
+    StaticFiles que serve o build (se existir) com cache imutável para os
+    nomes com hash e as variantes pré-comprimidas conforme o Accept-Encoding
+    """
+
+    def __init__(self, diretorio_build: Path = DIRETORIO_BUILD, diretorio_origem: Path = DIRETORIO_ORIGEM):
+        manifesto = carregar_manifesto(diretorio_build)
+        super().__init__(directory=str(diretorio_build if manifesto else diretorio_origem))
+        self.imutaveis = set(manifesto.values())
+        raiz = Path(self.directory)
+        self.existentes = {caminho.relative_to(raiz).as_posix() for caminho in raiz.rglob("*") if caminho.is_file()}
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        relativo = Path(path).as_posix()
+        codificacao: Optional[str] = None
+        aceitas = codificacoes_aceitas(scope)
+        for nome, extensao in (("br", ".br"), ("gzip", ".gz")):
+            if nome in aceitas and relativo + extensao in self.existentes:
+                codificacao, path = nome, path + extensao
+                break
+
+        resposta = await super().get_response(path, scope)
+        if codificacao:
+            # O tipo já vem do nome original (mimetypes ignora o .br/.gz)
+            resposta.headers["Content-Encoding"] = codificacao
+        if relativo + ".gz" in self.existentes or relativo + ".br" in self.existentes:
+            resposta.headers["Vary"] = "Accept-Encoding"
+        resposta.headers["Cache-Control"] = CACHE_IMUTAVEL if relativo in self.imutaveis else CACHE_REVALIDAR
+        return resposta
@@ -0,0 +1,71 @@
+"""
+Varredura periódica de empréstimos atrasados.
+
+A cada `ATRASOS_INTERVALO_SEGUNDOS` uma tarefa do próprio processo marca
+como ATRASADO, com um único UPDATE, os empréstimos ATIVO de prazo vencido
+e atualiza a multa acumulada de todos os atrasados (mesma regra de
+`calcular_multa`). Assim listagens e contagens de atrasados são consultas
+por status no índice parcial, sem comparar datas na tabela inteira.
+
+Cada execução fica registrada em `execucoes_tarefas`.
+"""
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+
+from app.core.circulacao import multa_sql
+from app.core.config import settings
+from app.core.database import engine as engine_padrao
+from app.core.estatisticas import ajustar_estatisticas
+from app.core.metrics import registrar_metricas
+from app.core.tarefas import executar_periodicamente, registrar_execucao
+from app.models.models import Emprestimo, StatusEmprestimo
+
+NOME_TAREFA = "varredura_atrasos"
+
+_ultima_execucao: dict = {}
+
+
+def varrer_atrasos(engine: Engine = engine_padrao, agora: Optional[datetime] = None) -> dict:
+    """Marca os atrasos e acumula as multas em uma transação; retorna o resumo"""
+    agora = agora or datetime.utcnow()
+    inicio = time.perf_counter()
+    tabela = Emprestimo.__table__
+
+    with engine.begin() as conn:
+        marcados = conn.execute(
+            update(tabela)
+            .where(tabela.c.status == StatusEmprestimo.ATIVO, tabela.c.data_devolucao_prevista < agora)
+            .values(status=StatusEmprestimo.ATRASADO, atualizado_em=agora)
+        ).rowcount
+
+        multa = multa_sql(conn.dialect.name, tabela.c.data_devolucao_prevista, agora)
+        multas = conn.execute(
+            update(tabela)
+            .where(tabela.c.status == StatusEmprestimo.ATRASADO, or_(tabela.c.multa.is_(None), tabela.c.multa < multa))
+            .values(multa=multa, atualizado_em=agora)
+        ).rowcount
+
+        # UPDATE em massa não passa pelo listener de estatísticas
+        ajustar_estatisticas(conn, {"emprestimos_atrasados": marcados})
+
+        duracao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        registrar_execucao(conn, NOME_TAREFA, agora, duracao_ms, marcados + multas)
+
+    resumo = {"executada_em": agora, "marcados": marcados, "multas_atualizadas": multas, "duracao_ms": duracao_ms}
+    _ultima_execucao.update(resumo)
+    return resumo
+
+
+async def varrer_atrasos_periodicamente() -> None:
+    """Tarefa de fundo: executa a varredura na inicialização e a cada intervalo"""
+    await executar_periodicamente(NOME_TAREFA, varrer_atrasos, settings.ATRASOS_INTERVALO_SEGUNDOS)
+
+
+registrar_metricas("varredura_atrasos", lambda: {
+    "intervalo_segundos": settings.ATRASOS_INTERVALO_SEGUNDOS,
+    **_ultima_execucao,
+})
@@ -1,13 +1,20 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from app.core.cache import CacheLRU
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import UsuarioAuth
+from app.core.hashing import FilaHashCheia, PoolHash
+from app.core.metrics import registrar_metricas
+from app.core.versoes import registrar_alteracoes
+from app.models.models import UsuarioAuth, VersaoRecurso
 from app.schemas.auth import TokenData
 
 # Configurações de segurança
@@ -21,6 +28,25 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Security scheme
 security = HTTPBearer()
 
+# Cache token -> (usuário autenticado, versão do usuário), para não
+# decodificar o JWT nem buscar o usuário a cada requisição. Os usuários
+# guardados aqui estão desanexados da sessão (somente leitura). Cada acerto
+# confere a versão do usuário em `versoes_recursos` (busca por chave
+# primária): uma alteração ou remoção feita em outro worker invalida a
+# entrada em todos, não só no processo que fez o commit.
+auth_cache = CacheLRU(
+    max_itens=settings.AUTH_CACHE_MAX_ITENS,
+    ttl=settings.AUTH_CACHE_TTL_SEGUNDOS
+)
+registrar_metricas("auth_cache", auth_cache.estatisticas)
+
+# Pool limitado para o bcrypt, usado pelos endpoints assíncronos
+pool_hash = PoolHash(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_fila=settings.PASSWORD_HASH_MAX_FILA
+)
+registrar_metricas("hash_senhas", pool_hash.estatisticas)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha está correta"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -29,6 +55,24 @@ def get_password_hash(password: str) -> str:
     """Gera hash da senha"""
     return pwd_context.hash(password)
 
+async def _executar_hash(funcao, *args):
+    try:
+        return await pool_hash.executar(funcao, *args)
+    except FilaHashCheia:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha no pool de hash, sem bloquear o event loop"""
+    return await _executar_hash(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Gera o hash da senha no pool de hash, sem bloquear o event loop"""
+    return await _executar_hash(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Cria token JWT"""
     to_encode = data.copy()
@@ -41,8 +85,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> TokenData:
-    """Verifica e decodifica o token JWT"""
+def _decode_token(token: str) -> Tuple[TokenData, Optional[int]]:
+    """Decodifica o token JWT, retornando os dados e o `exp` (timestamp)"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -56,7 +100,7 @@ def verify_token(token: str) -> TokenData:
             )
         
         token_data = TokenData(email=email, user_id=user_id)
-        return token_data
+        return token_data, payload.get("exp")
         
     except JWTError:
         raise HTTPException(
@@ -65,6 +109,11 @@ def verify_token(token: str) -> TokenData:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def verify_token(token: str) -> TokenData:
+    """Verifica e decodifica o token JWT"""
+    token_data, _ = _decode_token(token)
+    return token_data
+
 def authenticate_user(db: Session, email: str, password: str) -> Optional[UsuarioAuth]:
     """Autentica usuário"""
     user = db.query(UsuarioAuth).filter(UsuarioAuth.email == email).first()
@@ -74,13 +123,30 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[Usuari
         return None
     return user
 
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[UsuarioAuth]:
+    """Autentica usuário verificando a senha no pool de hash"""
+    user = db.query(UsuarioAuth).filter(UsuarioAuth.email == email).first()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.senha_hash):
+        return None
+    return user
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> UsuarioAuth:
     """Obtém o usuário atual baseado no token"""
     token = credentials.credentials
-    token_data = verify_token(token)
+    
+    entrada = auth_cache.obter(token)
+    if entrada is not None:
+        user, versao = entrada
+        if _versao_usuario(db, user.id) == versao:
+            return user
+        auth_cache.remover(token)
+    
+    token_data, expira_em = _decode_token(token)
     
     user = db.query(UsuarioAuth).filter(UsuarioAuth.email == token_data.email).first()
     if user is None:
@@ -89,8 +155,65 @@ def get_current_user(
             detail="Usuário não encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Versão lida junto com o usuário: uma alteração posterior invalida a entrada
+    versao = _versao_usuario(db, user.id)
+    # Desanexa da sessão para que commits posteriores não expirem os atributos
+    db.expunge(user)
+    
+    # A entrada nunca sobrevive ao próprio token
+    ttl = auth_cache.ttl
+    if expira_em is not None:
+        ttl = min(ttl, expira_em - time.time())
+    if ttl > 0:
+        auth_cache.definir(token, (user, versao), ttl=ttl)
     return user
 
+def invalidar_usuario_cache(user_id: Optional[int] = None, email: Optional[str] = None) -> int:
+    """Remove do cache as entradas do usuário (por id ou email)"""
+    return auth_cache.remover_onde(
+        lambda entrada: (user_id is not None and entrada[0].id == user_id)
+        or (email is not None and entrada[0].email == email)
+    )
+
+def _chave_versao(user_id: int) -> str:
+    return f"usuarios_auth:{user_id}"
+
+def _versao_usuario(db: Session, user_id: int) -> int:
+    versao = db.query(VersaoRecurso.versao).filter(VersaoRecurso.chave == _chave_versao(user_id)).scalar()
+    return versao or 0
+
+@event.listens_for(Session, "after_flush")
+def _registrar_usuarios_alterados(session: Session, flush_context) -> None:
+    alterados = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, UsuarioAuth) and (obj in session.deleted or session.is_modified(obj)):
+            alterados.add(obj.id)
+    if alterados:
+        session.info.setdefault("usuarios_auth_alterados", set()).update(alterados)
+        # Versão compartilhada, na mesma transação: os outros workers veem a
+        # alteração no próximo acerto do cache (a conexão não publica as
+        # chaves para o cache de respostas, que não depende delas)
+        registrar_alteracoes(session.connection(), [_chave_versao(user_id) for user_id in alterados])
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_usuarios_alterados(session: Session) -> None:
+    for user_id in session.info.pop("usuarios_auth_alterados", ()):
+        invalidar_usuario_cache(user_id=user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_usuarios_alterados(session: Session) -> None:
+    session.info.pop("usuarios_auth_alterados", None)
+
 def get_current_active_user(current_user: UsuarioAuth = Depends(get_current_user)) -> UsuarioAuth:
     """Obtém o usuário atual ativo"""
     return current_user
+
+async def require_admin(current_user: UsuarioAuth = Depends(get_current_user)) -> UsuarioAuth:
+    """Dependency para verificar se o usuário atual é admin"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado. Apenas administradores podem realizar esta ação."
+        )
+    return current_user
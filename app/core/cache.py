@@ -0,0 +1,74 @@
+"""
+Cache em memória com expiração (TTL) e despejo LRU.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Dicionário limitado a `max_itens`, com expiração por item.
+
+    Seguro para uso concorrente entre threads do servidor; mantém contadores
+    de acertos, falhas e despejos para as métricas.
+    """
+
+    def __init__(self, max_itens: int = 1024, ttl: float = 300.0):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None or item[1] <= agora:
+                if item is not None:
+                    del self._itens[chave]
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def definir(self, chave: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.despejos += 1
+
+    def remover(self, chave: Hashable) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def remover_onde(self, condicao: Callable[[Any], bool]) -> int:
+        """Remove os itens cujo valor satisfaz a condição; retorna quantos"""
+        with self._lock:
+            chaves = [chave for chave, (valor, _) in self._itens.items() if condicao(valor)]
+            for chave in chaves:
+                del self._itens[chave]
+            return len(chaves)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> dict:
+        total = self.acertos + self.falhas
+        return {
+            "itens": len(self._itens),
+            "max_itens": self.max_itens,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "taxa_acerto": round(self.acertos / total, 4) if total else 0.0,
+        }
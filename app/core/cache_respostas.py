@@ -0,0 +1,297 @@
+"""
+Cache de respostas dos GETs do catálogo.
+
+Os endpoints marcados com `@em_cache(recurso)` (em routers criados com
+`route_class=RotaComCache`) têm o corpo já serializado guardado por rota e
+parâmetros de consulta normalizados. Um acerto responde sem executar a
+consulta do endpoint, inclusive com 304 se o cliente já tem o ETag guardado.
+
+Cada entrada leva as tags de que depende (as mesmas chaves de
+`app.core.versoes`: `livros`, `autores`, `livros:42`...) com a geração de
+cada tag no momento em que a consulta começou. Um commit que altera o
+catálogo incrementa a geração das tags alteradas, e entradas com geração
+antiga deixam de valer; uma consulta que começou antes do commit nunca é
+guardada como atual.
+
+Com réplica de leitura, quem escreveu há pouco (ver `usar_primario`) lê do
+primário sem passar pelo cache, e uma resposta lida da réplica só é
+guardada se a réplica já tem as escritas da última invalidação das tags:
+senão o corpo antigo ficaria guardado sob as gerações novas.
+
+Backends:
+
+- `memoria` (padrão): `CacheLRU` do processo, com TTL e despejo LRU. As
+  gerações são as versões de `versoes_recursos` no primário (uma busca por
+  chave primária a cada acerto): com vários workers, uma escrita feita em
+  outro processo também invalida as entradas deste;
+- `redis`: servidor externo compartilhado entre os processos, via qualquer
+  cliente com a API do redis-py (`get`, `set`, `mget`, `incr`), o que
+  permite exercitá-lo com um cliente falso local.
+"""
+import json
+import threading
+import time
+from datetime import timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import CacheLRU
+from app.core.config import settings
+from app.core.database import engine as engine_padrao
+from app.core.metrics import registrar_metricas
+from app.core import replica
+from app.core.serializacao import RespostaSerializada, aceita_msgpack
+from app.core.versoes import ao_publicar_alteracoes, chaves_do_recurso, cliente_atualizado, versoes_atuais
+
+# Cabeçalhos da resposta original reproduzidos nos acertos
+CABECALHOS_GUARDADOS = ("content-type", "etag", "last-modified", "cache-control", "vary")
+
+
+class BackendMemoria:
+    """Entradas em um `CacheLRU` do processo; gerações das tags nas versões do banco"""
+
+    nome = "memoria"
+    # Lê as versões no banco
+    bloqueante = True
+
+    def __init__(self, max_itens: int, ttl: float, engine: Engine = engine_padrao):
+        self.entradas = CacheLRU(max_itens=max_itens, ttl=ttl)
+        self.engine = engine
+        self._invalidado_em: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        return self.entradas.obter(chave)
+
+    def definir(self, chave: str, valor: bytes, ttl: float) -> None:
+        self.entradas.definir(chave, valor, ttl)
+
+    def _versoes(self, tags: List[str]) -> dict:
+        with self.engine.connect() as conexao:
+            return versoes_atuais(conexao, tags)
+
+    def geracoes(self, tags: List[str]) -> List[int]:
+        versoes = self._versoes(tags)
+        return [versoes.get(tag, (0, None))[0] for tag in tags]
+
+    def invalidado_em(self, tags: List[str]) -> float:
+        # Escritas de outros processos só deixam a data da versão (do flush,
+        # pouco antes do commit); as deste, o instante da invalidação
+        instantes = [
+            atualizado_em.replace(tzinfo=timezone.utc).timestamp()
+            for _, atualizado_em in self._versoes(tags).values() if atualizado_em is not None
+        ]
+        instantes.extend(self._invalidado_em.get(tag, 0.0) for tag in tags)
+        return max(instantes, default=0.0)
+
+    def incrementar(self, tags: List[str]) -> None:
+        # A geração já subiu no banco, com a escrita
+        agora = time.time()
+        with self._lock:
+            for tag in tags:
+                self._invalidado_em[tag] = agora
+
+    def estatisticas(self) -> dict:
+        estatisticas = self.entradas.estatisticas()
+        return {campo: estatisticas[campo] for campo in ("itens", "max_itens", "despejos")}
+
+
+class BackendChaveValor:
+    """Servidor chave-valor externo (ex.: Redis), compartilhado entre os processos"""
+
+    nome = "chave_valor"
+    bloqueante = True
+
+    def __init__(self, cliente, prefixo: str = "biblioteca:cache:"):
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        return self.cliente.get(f"{self.prefixo}resposta:{chave}")
+
+    def definir(self, chave: str, valor: bytes, ttl: float) -> None:
+        self.cliente.set(f"{self.prefixo}resposta:{chave}", valor, ex=max(int(ttl), 1))
+
+    def geracoes(self, tags: List[str]) -> List[int]:
+        valores = self.cliente.mget([f"{self.prefixo}tag:{tag}" for tag in tags])
+        return [int(valor) if valor is not None else 0 for valor in valores]
+
+    def invalidado_em(self, tags: List[str]) -> float:
+        valores = self.cliente.mget([f"{self.prefixo}invalidado:{tag}" for tag in tags])
+        return max((float(valor) for valor in valores if valor is not None), default=0.0)
+
+    def incrementar(self, tags: List[str]) -> None:
+        agora = time.time()
+        for tag in tags:
+            self.cliente.incr(f"{self.prefixo}tag:{tag}")
+            self.cliente.set(f"{self.prefixo}invalidado:{tag}", agora)
+
+    def estatisticas(self) -> dict:
+        return {}
+
+
+class CacheRespostas:
+    """Busca, guarda e invalida respostas serializadas em um backend"""
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    async def executar(self, funcao: Callable, *args):
+        """Chama uma operação do cache fora do event loop se o backend faz I/O"""
+        if self.backend.bloqueante:
+            return await run_in_threadpool(funcao, *args)
+        return funcao(*args)
+
+    def buscar(self, chave: str) -> Optional[dict]:
+        valor = self.backend.obter(chave)
+        entrada = _desserializar(valor) if valor is not None else None
+        if entrada is None or self.backend.geracoes(entrada["tags"]) != entrada["geracoes"]:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return entrada
+
+    def guardar(self, chave: str, tags: List[str], geracoes: List[int], resposta: Response) -> None:
+        cabecalhos = {
+            nome: resposta.headers[nome] for nome in CABECALHOS_GUARDADOS if nome in resposta.headers
+        }
+        entrada = {"tags": tags, "geracoes": geracoes, "status": resposta.status_code, "cabecalhos": cabecalhos}
+        self.backend.definir(chave, _serializar(entrada, resposta.body), self.ttl)
+
+    def invalidar(self, tags) -> None:
+        self.invalidacoes += 1
+        self.backend.incrementar(sorted(tags))
+
+    def estatisticas(self) -> dict:
+        total = self.acertos + self.falhas
+        return {
+            "backend": self.backend.nome,
+            "ttl_segundos": self.ttl,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": round(self.acertos / total, 4) if total else 0.0,
+            "invalidacoes": self.invalidacoes,
+            **self.backend.estatisticas(),
+        }
+
+
+def _serializar(entrada: dict, corpo: bytes) -> bytes:
+    return json.dumps(entrada).encode() + b"\n" + corpo
+
+
+def _desserializar(valor: bytes) -> Optional[dict]:
+    cabecalho, _, corpo = valor.partition(b"\n")
+    try:
+        entrada = json.loads(cabecalho)
+    except ValueError:
+        return None
+    entrada["corpo"] = corpo
+    return entrada
+
+
+def chave_da_requisicao(request: Request) -> str:
+    """Rota + parâmetros de consulta ordenados (+ formato, se MessagePack)"""
+    # Vazios ficam na chave: `cursor=` muda o formato da resposta
+    parametros = sorted(request.query_params.multi_items())
+    chave = f"{request.url.path}?{urlencode(parametros)}"
+    return chave + "#msgpack" if aceita_msgpack(request.headers) else chave
+
+
+def criar_backend():
+    if settings.CACHE_RESPOSTAS_BACKEND == "memoria":
+        return BackendMemoria(settings.CACHE_RESPOSTAS_MAX_ITENS, settings.CACHE_RESPOSTAS_TTL_SEGUNDOS)
+    if settings.CACHE_RESPOSTAS_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError as erro:
+            raise RuntimeError("CACHE_RESPOSTAS_BACKEND=redis requer o pacote 'redis'") from erro
+        return BackendChaveValor(redis.Redis.from_url(settings.CACHE_RESPOSTAS_URL))
+    raise ValueError(f"CACHE_RESPOSTAS_BACKEND desconhecido: {settings.CACHE_RESPOSTAS_BACKEND}")
+
+
+# Com réplica de leitura, uma entrada pode ter sido montada a partir de dados
+# atrasados depois da invalidação: o TTL limita esse atraso ao da réplica
+_ttl = settings.CACHE_RESPOSTAS_TTL_SEGUNDOS
+if replica.REPLICA_ATIVA:
+    _ttl = min(_ttl, settings.REPLICA_REFRESH_SEGUNDOS)
+
+cache_respostas: Optional[CacheRespostas] = (
+    CacheRespostas(criar_backend(), _ttl) if settings.CACHE_RESPOSTAS_BACKEND else None
+)
+
+
+@ao_publicar_alteracoes
+def _invalidar(chaves) -> None:
+    if cache_respostas is not None:
+        cache_respostas.invalidar(chaves)
+
+
+def em_cache(recurso: str, parametro_entidade: Optional[str] = None) -> Callable:
+    """Marca um GET para o cache; `parametro_entidade` é o parâmetro de caminho com o id"""
+    def marcar(endpoint: Callable) -> Callable:
+        endpoint.cache_recurso = (recurso, parametro_entidade)
+        return endpoint
+    return marcar
+
+
+class RotaComCache(APIRoute):
+    """Rota que consulta o cache antes de executar os endpoints marcados com `em_cache`"""
+
+    def get_route_handler(self) -> Callable:
+        executar = super().get_route_handler()
+        marca = getattr(self.endpoint, "cache_recurso", None)
+        if marca is None:
+            return executar
+        recurso, parametro_entidade = marca
+
+        async def executar_com_cache(request: Request) -> Response:
+            cache = cache_respostas
+            if cache is None or request.method != "GET":
+                return await executar(request)
+            # Quem escreveu há pouco lê do primário: uma entrada guardada por
+            # outro cliente pode ter sido montada com a réplica atrasada
+            if replica.REPLICA_ATIVA and replica.usar_primario(request):
+                return await executar(request)
+
+            chave = chave_da_requisicao(request)
+            entrada = await cache.executar(cache.buscar, chave)
+            if entrada is not None:
+                cabecalhos = entrada["cabecalhos"]
+                if "etag" in cabecalhos and cliente_atualizado(request, cabecalhos["etag"], cabecalhos.get("last-modified")):
+                    return Response(status_code=304, headers=cabecalhos)
+                return Response(
+                    entrada["corpo"], status_code=entrada["status"], headers={**cabecalhos, "X-Cache": "HIT"}
+                )
+
+            entidade = request.path_params.get(parametro_entidade) if parametro_entidade else None
+            tags = chaves_do_recurso(recurso, entidade)
+            # Gerações lidas antes da consulta: um commit no meio invalida a entrada
+            geracoes = await cache.executar(cache.backend.geracoes, tags)
+            resposta = await executar(request)
+            if isinstance(resposta, RespostaSerializada):
+                # Guarda o corpo já no formato pedido
+                resposta.negociar(request.headers)
+            guardar = resposta.status_code == 200 and hasattr(resposta, "body")
+            if guardar and replica.REPLICA_ATIVA:
+                # Réplica sem a última invalidação: o corpo seria o de antes dela
+                guardar = replica.replica_inclui(await cache.executar(cache.backend.invalidado_em, tags))
+            if guardar:
+                await cache.executar(cache.guardar, chave, tags, geracoes, resposta)
+            resposta.headers["X-Cache"] = "MISS"
+            return resposta
+
+        return executar_com_cache
+
+
+registrar_metricas("cache_respostas", lambda: (
+    cache_respostas.estatisticas() if cache_respostas is not None else {"backend": None}
+))
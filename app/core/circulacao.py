@@ -0,0 +1,104 @@
+"""
+Regras de circulação compartilhadas entre a API, as rotas do frontend e a
+varredura de atrasos.
+
+A retirada de um livro não segue o padrão ler-conferir-gravar: o livro é
+marcado como EMPRESTADO por um UPDATE condicional (`retirar_livros`) e só
+quem teve a linha alterada cria o empréstimo. Os índices únicos parciais de
+empréstimos em aberto e de reservas em aberto garantem o resto mesmo com
+requisições simultâneas.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import Integer, cast, exists, func, literal, update
+from sqlalchemy.orm import Session
+from sqlalchemy.types import DateTime
+
+from app.core.versoes import registrar_alteracoes
+from app.models.models import Emprestimo, Livro, Reserva, StatusEmprestimo, StatusLivro, StatusReserva
+
+MULTA_POR_DIA = 2.0  # R$ 2,00 por dia de atraso
+
+# Empréstimos com o livro ainda fora da biblioteca
+STATUS_EM_ABERTO = (StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO)
+
+
+def calcular_multa(data_devolucao_prevista: datetime, data_devolucao: Optional[datetime] = None) -> float:
+    """Multa de uma devolução em `data_devolucao` (padrão: agora); zero se no prazo"""
+    data_devolucao = data_devolucao or datetime.utcnow()
+    if data_devolucao <= data_devolucao_prevista:
+        return 0.0
+    dias_atraso = (data_devolucao - data_devolucao_prevista).days
+    return dias_atraso * MULTA_POR_DIA
+
+
+def multa_sql(dialeto: str, data_devolucao_prevista, agora: datetime):
+    """
+    Expressão SQL equivalente a `calcular_multa` (dias completos de atraso),
+    para atualizar as multas em massa
+    """
+    referencia = literal(agora, DateTime)
+    if dialeto == "sqlite":
+        dias = cast(func.julianday(referencia) - func.julianday(data_devolucao_prevista), Integer)
+    else:
+        dias = func.floor(func.extract("epoch", referencia - data_devolucao_prevista) / 86400)
+    return dias * MULTA_POR_DIA
+
+
+def retirar_livros(db: Session, livro_ids: Iterable[int], usuario_id: int) -> Set[int]:
+    """
+    Marca como EMPRESTADO, em um único UPDATE condicional, os livros
+    disponíveis e não guardados para outro usuário; retorna os ids alterados.
+    Não faz commit.
+    """
+    livro_ids = list(livro_ids)
+    if not livro_ids:
+        return set()
+
+    guardado_para_outro = exists().where(
+        Reserva.livro_id == Livro.id,
+        Reserva.status == StatusReserva.ATIVA,
+        Reserva.usuario_id != usuario_id
+    )
+    resultado = db.execute(
+        update(Livro)
+        .where(Livro.id.in_(livro_ids), Livro.status == StatusLivro.DISPONIVEL, ~guardado_para_outro)
+        .values(status=StatusLivro.EMPRESTADO)
+        .returning(Livro.id)
+        .execution_options(synchronize_session="fetch")
+    )
+    retirados = set(resultado.scalars())
+    if retirados:
+        # UPDATE em massa não passa pelo listener de versões do catálogo
+        registrar_alteracoes(db, ["livros", *(f"livros:{livro_id}" for livro_id in retirados)])
+    return retirados
+
+
+def motivos_recusa(db: Session, livro_ids: Iterable[int], usuario_id: int) -> Dict[int, str]:
+    """Por que `retirar_livros` não alterou cada um dos livros, em uma consulta"""
+    livro_ids = list(livro_ids)
+    if not livro_ids:
+        return {}
+
+    emprestado_ao_usuario = exists().where(
+        Emprestimo.livro_id == Livro.id,
+        Emprestimo.usuario_id == usuario_id,
+        Emprestimo.status.in_(STATUS_EM_ABERTO)
+    )
+    motivos = {}
+    for livro_id, status, ja_emprestado in db.query(
+        Livro.id, Livro.status, emprestado_ao_usuario
+    ).filter(Livro.id.in_(livro_ids)):
+        if status == StatusLivro.DISPONIVEL:
+            motivos[livro_id] = "Livro reservado para outro usuário"
+        elif ja_emprestado:
+            motivos[livro_id] = "Usuário já possui um empréstimo ativo deste livro"
+        else:
+            motivos[livro_id] = f"Livro não está disponível para empréstimo. Status atual: {status.value}"
+    return motivos
+
+
+def motivo_recusa(db: Session, livro: Livro, usuario_id: int) -> str:
+    """Por que `retirar_livros` não alterou o livro (lido do banco)"""
+    return motivos_recusa(db, [livro.id], usuario_id)[livro.id]
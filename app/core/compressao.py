@@ -0,0 +1,223 @@
+"""
+Compressão negociada (brotli/gzip) das respostas da API e das páginas.
+
+`CompressaoRespostas` é um middleware ASGI: escolhe a codificação pelo
+`Accept-Encoding` (brotli se o pacote estiver instalado, senão gzip) e
+comprime o corpo das respostas de texto (JSON, HTML, CSV, NDJSON...) a partir de
+`COMPRESSAO_TAMANHO_MINIMO` bytes. Corpos grandes (`COMPRESSAO_LIMIAR_THREAD`)
+são comprimidos no threadpool para não travar o event loop; respostas em
+streaming (exportações) são comprimidas pedaço a pedaço.
+
+Não passam pelo compressor as respostas que já têm `Content-Encoding` (os
+assets pré-comprimidos de `app.core.assets`), os tipos binários (imagens,
+fontes), 204/304, respostas parciais (Range) e HEAD (sem corpo, o
+Content-Length é o da resposta do GET). O ETag de uma resposta comprimida
+passa a ser fraco, já que os bytes enviados mudam com a codificação.
+
+Toda resposta de tipo comprimível leva `Vary: Accept-Encoding`, comprimida
+ou não (corpo pequeno, cliente sem gzip/br): a mesma URL pode ter outra
+representação para outro cliente, e caches intermediários não podem
+entregar uma no lugar da outra.
+"""
+import zlib
+from collections import Counter
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.assets import codificacoes_aceitas
+from app.core.config import settings
+from app.core.metrics import registrar_metricas
+
+try:
+    import brotli
+except ImportError:  # sem o pacote, só gzip
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "image/svg+xml",
+)
+STATUS_SEM_COMPRESSAO = {204, 206, 304}
+
+
+class _Estatisticas:
+    """Contadores do middleware; só alterados no event loop"""
+
+    def __init__(self):
+        self.por_codificacao: Counter = Counter()
+        self.ignoradas: Counter = Counter()
+        self.em_thread = 0
+        self.bytes_originais = 0
+        self.bytes_enviados = 0
+
+    def registrar(self, original: int, enviado: int) -> None:
+        self.bytes_originais += original
+        self.bytes_enviados += enviado
+
+    def como_dict(self) -> dict:
+        return {
+            "ativa": settings.COMPRESSAO_ATIVA,
+            "brotli": brotli is not None,
+            "respostas_comprimidas": dict(self.por_codificacao),
+            "ignoradas": dict(self.ignoradas),
+            "em_thread": self.em_thread,
+            "bytes_originais": self.bytes_originais,
+            "bytes_enviados": self.bytes_enviados,
+            "bytes_economizados": self.bytes_originais - self.bytes_enviados,
+            "taxa": round(self.bytes_enviados / self.bytes_originais, 4) if self.bytes_originais else None,
+        }
+
+
+estatisticas = _Estatisticas()
+registrar_metricas("compressao", estatisticas.como_dict)
+
+
+def escolher_codificacao(scope: Scope) -> Optional[str]:
+    """`br` ou `gzip` conforme o Accept-Encoding; None se o cliente não aceita nenhuma"""
+    aceitas = codificacoes_aceitas(scope)
+    if brotli is not None and "br" in aceitas:
+        return "br"
+    if "gzip" in aceitas:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Compressor incremental de uma codificação (`br` ou `gzip`)"""
+
+    def __init__(self, codificacao: str):
+        self.codificacao = codificacao
+        if codificacao == "br":
+            self._objeto = brotli.Compressor(quality=settings.COMPRESSAO_NIVEL_BROTLI)
+        else:
+            # wbits=31: formato gzip (cabeçalho e CRC), não zlib puro
+            self._objeto = zlib.compressobj(settings.COMPRESSAO_NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes, final: bool) -> bytes:
+        """Comprime `dados`; sem `final`, descarrega o que já foi comprimido (streaming)"""
+        if self.codificacao == "br":
+            saida = self._objeto.process(dados)
+            return saida + (self._objeto.finish() if final else self._objeto.flush())
+        saida = self._objeto.compress(dados)
+        return saida + self._objeto.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _variar_por_codificacao(cabecalhos: MutableHeaders) -> None:
+    """`Vary: Accept-Encoding` (sem repetir) nas respostas de tipo comprimível"""
+    if not cabecalhos.get("content-type", "").startswith(TIPOS_COMPRIMIVEIS):
+        return
+    if "accept-encoding" not in cabecalhos.get("vary", "").lower():
+        cabecalhos.add_vary_header("Accept-Encoding")
+
+
+def _motivo_para_ignorar(inicio: Message, corpo: bytes, mais_corpo: bool) -> Optional[str]:
+    if inicio["status"] in STATUS_SEM_COMPRESSAO or inicio["status"] < 200:
+        return "status"
+    cabecalhos = MutableHeaders(raw=inicio["headers"])
+    if "content-encoding" in cabecalhos or "content-range" in cabecalhos:
+        return "ja_codificada"
+    if not cabecalhos.get("content-type", "").startswith(TIPOS_COMPRIMIVEIS):
+        return "tipo"
+    # Respostas que passam por middlewares HTTP chegam em pedaços, mas com Content-Length
+    tamanho = int(cabecalhos["content-length"]) if "content-length" in cabecalhos else None
+    if tamanho is None and not mais_corpo:
+        tamanho = len(corpo)
+    if tamanho is not None and tamanho < settings.COMPRESSAO_TAMANHO_MINIMO:
+        return "pequena"
+    return None
+
+
+class _RespostaComprimida:
+    """
+    `send` que segura o início da resposta até ver o primeiro pedaço do corpo.
+    Sem `codificacao` (o cliente não aceita nenhuma), só acrescenta o Vary.
+    """
+
+    def __init__(self, codificacao: Optional[str], send: Send):
+        self.codificacao = codificacao
+        self.send = send
+        self.inicio: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+
+    async def _comprimir(self, dados: bytes, final: bool) -> bytes:
+        if len(dados) >= settings.COMPRESSAO_LIMIAR_THREAD:
+            estatisticas.em_thread += 1
+            return await run_in_threadpool(self.compressor.comprimir, dados, final)
+        return self.compressor.comprimir(dados, final)
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if self.codificacao is None:
+                _variar_por_codificacao(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+                return
+            self.inicio = message
+            return
+        if message["type"] != "http.response.body":
+            # ex.: http.response.pathsend; segue sem alterar
+            if self.inicio is not None:
+                await self.send(self.inicio)
+                self.inicio = None
+            await self.send(message)
+            return
+
+        corpo = message.get("body", b"")
+        mais_corpo = message.get("more_body", False)
+        if self.inicio is not None:
+            inicio, self.inicio = self.inicio, None
+            motivo = _motivo_para_ignorar(inicio, corpo, mais_corpo)
+            if motivo:
+                estatisticas.ignoradas[motivo] += 1
+                _variar_por_codificacao(MutableHeaders(raw=inicio["headers"]))
+                await self.send(inicio)
+                await self.send(message)
+                return
+
+            self.compressor = Compressor(self.codificacao)
+            estatisticas.por_codificacao[self.codificacao] += 1
+            cabecalhos = MutableHeaders(raw=inicio["headers"])
+            cabecalhos["Content-Encoding"] = self.codificacao
+            _variar_por_codificacao(cabecalhos)
+            etag = cabecalhos.get("etag")
+            if etag and not etag.startswith("W/"):
+                cabecalhos["ETag"] = "W/" + etag
+            if not mais_corpo:
+                comprimido = await self._comprimir(corpo, final=True)
+                estatisticas.registrar(len(corpo), len(comprimido))
+                cabecalhos["Content-Length"] = str(len(comprimido))
+                await self.send(inicio)
+                await self.send({"type": "http.response.body", "body": comprimido})
+                return
+            # Streaming: o tamanho final não é conhecido
+            del cabecalhos["Content-Length"]
+            await self.send(inicio)
+
+        if self.compressor is None:
+            await self.send(message)
+            return
+        comprimido = await self._comprimir(corpo, final=not mais_corpo)
+        estatisticas.registrar(len(corpo), len(comprimido))
+        await self.send({"type": "http.response.body", "body": comprimido, "more_body": mais_corpo})
+
+
+class CompressaoRespostas:
+    """Middleware ASGI de compressão negociada (ver docstring do módulo)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] == "HEAD":
+            estatisticas.ignoradas["head"] += 1
+            await self.app(scope, receive, send)
+            return
+        codificacao = escolher_codificacao(scope)
+        if codificacao is None:
+            estatisticas.ignoradas["cliente"] += 1
+        await self.app(scope, receive, _RespostaComprimida(codificacao, send))
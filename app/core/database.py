@@ -1,14 +1,103 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./biblioteca.db"
+from app.core.config import settings
+
+# Drivers assíncronos usados para derivar ASYNC_DATABASE_URL
+DRIVERS_ASSINCRONOS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
+
+
+def url_sincrona(url: str) -> str:
+    """Usa o psycopg (3) quando a URL do PostgreSQL não informa o driver"""
+    url = make_url(url)
+    if url.drivername == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url.render_as_string(hide_password=False)
+
+
+def url_assincrona(url: str) -> str:
+    """Converte a URL síncrona para o driver assíncrono equivalente"""
+    url = make_url(url)
+    driver = DRIVERS_ASSINCRONOS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Sem driver assíncrono conhecido para '{url.drivername}'; defina ASYNC_DATABASE_URL")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+SQLALCHEMY_DATABASE_URL = url_sincrona(settings.DATABASE_URL)
+SQLALCHEMY_ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or url_assincrona(SQLALCHEMY_DATABASE_URL)
+USANDO_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+
+POOL_OPCOES = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+
+def pragmas_sqlite() -> list:
+    """PRAGMAs do perfil de armazenamento configurado em `Settings`"""
+    valores = [
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("temp_store", settings.SQLITE_TEMP_STORE),
+    ]
+    return [(nome, valor) for nome, valor in valores if valor is not None]
+
+
+def configurar_sqlite(engine: Engine, pragmas: list = None) -> None:
+    """Aplica os PRAGMAs em cada nova conexão do engine (síncrono ou `.sync_engine`)"""
+    pragmas = pragmas_sqlite() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas:
+            cursor.execute(f"PRAGMA {nome} = {valor}")
+        cursor.close()
+
+
+def argumentos_conexao() -> dict:
+    """`connect_args` específicos do banco configurado"""
+    if USANDO_SQLITE:
+        return {"check_same_thread": False}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args=argumentos_conexao(), **POOL_OPCOES
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrono para as rotas `async def` (não bloqueia o event loop).
+# Convive com o engine síncrono durante a migração das rotas.
+async_engine = create_async_engine(
+    SQLALCHEMY_ASYNC_DATABASE_URL,
+    # check_same_thread não se aplica ao aiosqlite
+    connect_args={} if USANDO_SQLITE else argumentos_conexao(),
+    **POOL_OPCOES
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if USANDO_SQLITE:
+    configurar_sqlite(engine)
+    configurar_sqlite(async_engine.sync_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,3 +106,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
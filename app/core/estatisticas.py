@@ -0,0 +1,228 @@
+"""
+Estatísticas de circulação mantidas incrementalmente.
+
+Um listener `after_flush` inspeciona os objetos inseridos, alterados e
+removidos na sessão e aplica os deltas na linha única de
+`estatisticas_circulacao` (e em `estatisticas_livros`) dentro da mesma
+transação da escrita. Assim o dashboard lê uma linha em vez de contar as
+tabelas inteiras.
+
+Escritas feitas com UPDATE/INSERT em massa (Core) não passam pelo
+listener; quem as faz deve chamar `ajustar_estatisticas` explicitamente.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, func, inspect, insert, update, delete
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.circulacao import STATUS_EM_ABERTO
+from app.models.models import (
+    Autor,
+    Emprestimo,
+    EstatisticaLivro,
+    EstatisticasCirculacao,
+    Livro,
+    StatusEmprestimo,
+    Usuario,
+)
+
+ESTATISTICAS_ID = 1
+
+
+def _em_circulacao(status_emprestimo) -> bool:
+    """Empréstimo conta como ativo enquanto o livro não foi devolvido (mesmo atrasado)"""
+    if status_emprestimo is None:
+        return True  # default da coluna é ATIVO
+    return StatusEmprestimo(status_emprestimo) in STATUS_EM_ABERTO
+
+
+def _atrasado(status_emprestimo) -> bool:
+    return status_emprestimo is not None and StatusEmprestimo(status_emprestimo) == StatusEmprestimo.ATRASADO
+
+
+def _usuario_ativo(ativo) -> bool:
+    return ativo is None or bool(ativo)  # default da coluna é True
+
+
+def _valor_anterior(obj, atributo: str):
+    """Valor do atributo antes das alterações pendentes (None se não mudou)"""
+    historico = inspect(obj).attrs[atributo].history
+    if not historico.has_changes():
+        return None
+    return historico.deleted[0] if historico.deleted else None
+
+
+def _insert_do_dialeto(dialeto: str):
+    """`insert` com ON CONFLICT do dialeto (PostgreSQL ou SQLite)"""
+    return insert_postgresql if dialeto == "postgresql" else insert_sqlite
+
+
+def ajustar_estatisticas(
+    conexao,
+    deltas: Dict[str, int],
+    emprestimos_por_livro: Optional[Dict[int, int]] = None,
+    livros_removidos: Optional[List[int]] = None
+) -> None:
+    """Aplica deltas aos contadores na transação da conexão/sessão informada"""
+    deltas = {campo: valor for campo, valor in deltas.items() if valor}
+    if deltas:
+        tabela = EstatisticasCirculacao.__table__
+        valores = {campo: tabela.c[campo] + valor for campo, valor in deltas.items()}
+        valores["atualizado_em"] = datetime.utcnow()
+        # Se a linha ainda não existe, ela será calculada do zero na primeira leitura
+        conexao.execute(update(tabela).where(tabela.c.id == ESTATISTICAS_ID).values(**valores))
+
+    por_livro = EstatisticaLivro.__table__
+    emprestimos_por_livro = emprestimos_por_livro or {}
+    aumentos = [
+        {"livro_id": livro_id, "total_emprestimos": delta}
+        for livro_id, delta in emprestimos_por_livro.items() if delta > 0
+    ]
+    if aumentos:
+        # Upsert: dois primeiros empréstimos simultâneos do mesmo livro não
+        # disputam o INSERT da linha
+        comando = _insert_do_dialeto(conexao.dialect.name)(por_livro).values(aumentos)
+        conexao.execute(comando.on_conflict_do_update(
+            index_elements=[por_livro.c.livro_id],
+            set_={"total_emprestimos": por_livro.c.total_emprestimos + comando.excluded.total_emprestimos}
+        ))
+    for livro_id, delta in emprestimos_por_livro.items():
+        if delta < 0:
+            # Sem linha, o livro já conta zero empréstimos
+            conexao.execute(
+                update(por_livro)
+                .where(por_livro.c.livro_id == livro_id)
+                .values(total_emprestimos=por_livro.c.total_emprestimos + delta)
+            )
+
+    if livros_removidos:
+        conexao.execute(delete(por_livro).where(por_livro.c.livro_id.in_(livros_removidos)))
+
+
+@event.listens_for(Session, "after_flush")
+def _atualizar_estatisticas(session: Session, flush_context) -> None:
+    deltas = defaultdict(int)
+    emprestimos_por_livro = defaultdict(int)
+    livros_removidos = []
+
+    for obj in session.new:
+        if isinstance(obj, Livro):
+            deltas["total_livros"] += 1
+        elif isinstance(obj, Emprestimo):
+            deltas["total_emprestimos"] += 1
+            emprestimos_por_livro[obj.livro_id] += 1
+            if _em_circulacao(obj.status):
+                deltas["emprestimos_ativos"] += 1
+            if _atrasado(obj.status):
+                deltas["emprestimos_atrasados"] += 1
+        elif isinstance(obj, Usuario) and _usuario_ativo(obj.ativo):
+            deltas["usuarios_ativos"] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Emprestimo):
+            anterior = _valor_anterior(obj, "status")
+            if anterior is not None and _em_circulacao(anterior) != _em_circulacao(obj.status):
+                deltas["emprestimos_ativos"] += 1 if _em_circulacao(obj.status) else -1
+            if anterior is not None and _atrasado(anterior) != _atrasado(obj.status):
+                deltas["emprestimos_atrasados"] += 1 if _atrasado(obj.status) else -1
+        elif isinstance(obj, Usuario):
+            anterior = _valor_anterior(obj, "ativo")
+            if anterior is not None and _usuario_ativo(anterior) != _usuario_ativo(obj.ativo):
+                deltas["usuarios_ativos"] += 1 if _usuario_ativo(obj.ativo) else -1
+
+    for obj in session.deleted:
+        if isinstance(obj, Livro):
+            deltas["total_livros"] -= 1
+            livros_removidos.append(obj.id)
+        elif isinstance(obj, Emprestimo):
+            deltas["total_emprestimos"] -= 1
+            emprestimos_por_livro[obj.livro_id] -= 1
+            if _em_circulacao(obj.status):
+                deltas["emprestimos_ativos"] -= 1
+            if _atrasado(obj.status):
+                deltas["emprestimos_atrasados"] -= 1
+        elif isinstance(obj, Usuario) and _usuario_ativo(obj.ativo):
+            deltas["usuarios_ativos"] -= 1
+
+    if deltas or emprestimos_por_livro or livros_removidos:
+        ajustar_estatisticas(session.connection(), deltas, emprestimos_por_livro, livros_removidos)
+
+
+def recalcular_estatisticas(db: Session) -> EstatisticasCirculacao:
+    """Recalcula todos os contadores a partir das tabelas (sem commit)"""
+    valores = {
+        "total_livros": db.query(func.count(Livro.id)).scalar(),
+        "total_emprestimos": db.query(func.count(Emprestimo.id)).scalar(),
+        "emprestimos_ativos": db.query(func.count(Emprestimo.id)).filter(
+            Emprestimo.status.in_(STATUS_EM_ABERTO)
+        ).scalar(),
+        "emprestimos_atrasados": db.query(func.count(Emprestimo.id)).filter(
+            Emprestimo.status == StatusEmprestimo.ATRASADO
+        ).scalar(),
+        "usuarios_ativos": db.query(func.count(Usuario.id)).filter(Usuario.ativo == True).scalar(),
+        "atualizado_em": datetime.utcnow(),
+    }
+
+    # Upsert: duas primeiras leituras simultâneas não disputam o INSERT da linha
+    tabela = EstatisticasCirculacao.__table__
+    db.execute(
+        _insert_do_dialeto(db.get_bind().dialect.name)(tabela).values(id=ESTATISTICAS_ID, **valores)
+        .on_conflict_do_update(index_elements=[tabela.c.id], set_=valores)
+    )
+
+    db.execute(delete(EstatisticaLivro.__table__))
+    db.execute(
+        insert(EstatisticaLivro.__table__).from_select(
+            ["livro_id", "total_emprestimos"],
+            db.query(Emprestimo.livro_id, func.count(Emprestimo.id)).group_by(Emprestimo.livro_id)
+        )
+    )
+    db.flush()
+    return db.get(EstatisticasCirculacao, ESTATISTICAS_ID, populate_existing=True)
+
+
+def obter_estatisticas(db: Session) -> EstatisticasCirculacao:
+    """Lê a linha de estatísticas, calculando-a na primeira vez"""
+    estatisticas = db.query(EstatisticasCirculacao).filter(
+        EstatisticasCirculacao.id == ESTATISTICAS_ID
+    ).first()
+    if estatisticas is None:
+        estatisticas = recalcular_estatisticas(db)
+        db.commit()
+        db.refresh(estatisticas)
+    return estatisticas
+
+
+def livros_populares(db: Session, limite: int = 3) -> List[dict]:
+    """Livros com mais empréstimos, pelo índice de `estatisticas_livros`"""
+    linhas = db.query(EstatisticaLivro, Livro.titulo, Autor.nome).join(
+        Livro, EstatisticaLivro.livro_id == Livro.id
+    ).outerjoin(
+        Autor, Livro.autor_id == Autor.id
+    ).filter(
+        EstatisticaLivro.total_emprestimos > 0
+    ).order_by(
+        EstatisticaLivro.total_emprestimos.desc()
+    ).limit(limite).all()
+
+    return [
+        {
+            "livro_id": estatistica.livro_id,
+            "titulo": titulo,
+            "autor_nome": autor_nome,
+            "total_emprestimos": estatistica.total_emprestimos,
+        }
+        for estatistica, titulo, autor_nome in linhas
+    ]
+
+
+def emprestimos_recentes(db: Session, limite: int = 5) -> List[Emprestimo]:
+    """Últimos empréstimos com livro e usuário carregados na mesma consulta"""
+    return db.query(Emprestimo).options(
+        joinedload(Emprestimo.livro),
+        joinedload(Emprestimo.usuario)
+    ).order_by(Emprestimo.data_emprestimo.desc()).limit(limite).all()
@@ -0,0 +1,124 @@
+"""
+Exportação em streaming de livros, empréstimos e usuários (CSV ou NDJSON).
+
+A consulta roda em um cursor do lado do servidor (`stream_results`) e é
+lida em blocos de `yield_per` linhas; cada bloco vira um pedaço do corpo
+da resposta. Nenhum objeto ORM ou modelo Pydantic é criado e o resultado
+nunca fica inteiro em memória, qualquer que seja o número de linhas.
+
+Com `since`, só saem as linhas criadas ou alteradas a partir da data, para
+sincronizações incrementais, pelo `atualizado_em` de cada tabela (nos
+empréstimos inclui a marcação de atraso e a multa da varredura). Linhas
+removidas não aparecem, e um livro não é reexportado quando só o nome do autor ou da
+editora muda.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from app.models.models import Autor, Editora, Emprestimo, Livro, Usuario
+
+LINHAS_POR_BLOCO = 1000
+
+
+def _consulta_livros(since: Optional[datetime]) -> Select:
+    consulta = (
+        select(
+            *Livro.__table__.columns,
+            Autor.nome.label("autor"),
+            Editora.nome.label("editora"),
+        )
+        .join(Autor, Livro.autor_id == Autor.id)
+        .outerjoin(Editora, Livro.editora_id == Editora.id)
+    )
+    if since is not None:
+        consulta = consulta.where(Livro.atualizado_em >= since)
+    return consulta.order_by(Livro.id)
+
+
+def _consulta_emprestimos(since: Optional[datetime]) -> Select:
+    consulta = select(*Emprestimo.__table__.columns)
+    if since is not None:
+        consulta = consulta.where(Emprestimo.atualizado_em >= since)
+    return consulta.order_by(Emprestimo.id)
+
+
+def _consulta_usuarios(since: Optional[datetime]) -> Select:
+    consulta = select(*Usuario.__table__.columns)
+    if since is not None:
+        consulta = consulta.where(Usuario.atualizado_em >= since)
+    return consulta.order_by(Usuario.id)
+
+
+CONSULTAS: Dict[str, Callable[[Optional[datetime]], Select]] = {
+    "livros": _consulta_livros,
+    "emprestimos": _consulta_emprestimos,
+    "usuarios": _consulta_usuarios,
+}
+
+TIPOS_CONTEUDO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor(valor):
+    """Valor de uma coluna em forma serializável (enums pelo valor, datas em ISO 8601)"""
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _blocos_csv(colunas: List[str], blocos: Iterator[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for linhas in blocos:
+        escritor.writerows([_valor(valor) for valor in linha] for linha in linhas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _blocos_ndjson(colunas: List[str], blocos: Iterator[list]) -> Iterator[str]:
+    codificar = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for linhas in blocos:
+        yield "".join(
+            codificar({coluna: _valor(valor) for coluna, valor in zip(colunas, linha)}) + "\n"
+            for linha in linhas
+        )
+
+
+FORMATADORES = {"csv": _blocos_csv, "ndjson": _blocos_ndjson}
+
+
+def exportar(
+    engine: Engine,
+    recurso: str,
+    formato: str,
+    since: Optional[datetime] = None,
+    linhas_por_bloco: int = LINHAS_POR_BLOCO
+) -> Iterator[str]:
+    """
+    Gera o conteúdo da exportação em pedaços de até `linhas_por_bloco` linhas.
+
+    A conexão é aberta na primeira iteração e devolvida ao pool quando o
+    gerador termina ou é fechado (ex.: o cliente desconectou).
+    """
+    consulta = CONSULTAS[recurso](since)
+    with engine.connect() as conn:
+        resultado = conn.execution_options(
+            stream_results=True, yield_per=linhas_por_bloco
+        ).execute(consulta)
+        yield from FORMATADORES[formato](list(resultado.keys()), resultado.partitions())
@@ -0,0 +1,240 @@
+"""
+Fila de reservas (FIFO) de cada livro.
+
+Cada reserva pendente recebe uma senha (`posicao`) calculada no próprio
+INSERT. As pendentes de um livro ocupam sempre posições consecutivas: a
+promoção tira a cabeça da fila e o cancelamento no meio puxa quem está
+atrás. Assim a posição de uma reserva é `posicao - cabeça + 1`, e cabeça e
+cauda são buscas no índice (livro_id, status, posicao), O(log n) mesmo em
+filas longas. Um índice único parcial impede duas reservas em aberto do
+mesmo usuário para o mesmo livro, sem conferência prévia; outro impede duas
+pendentes com a mesma senha (no PostgreSQL, dois INSERTs simultâneos podem
+calcular a mesma cauda) e quem perde calcula a senha de novo.
+
+Quando o livro é devolvido, a primeira da fila vira ATIVA na mesma
+transação e o usuário tem `RESERVA_RETIRADA_DIAS` para retirá-lo. Uma tarefa
+periódica expira, em lotes, as ativas não retiradas e promove a próxima.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session, aliased, sessionmaker
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import registrar_metricas
+from app.core.tarefas import executar_periodicamente, registrar_execucao
+from app.models.models import Livro, Reserva, StatusLivro, StatusReserva
+
+NOME_TAREFA = "expiracao_reservas"
+LOTE_EXPIRACAO = 500
+
+_ultima_execucao: dict = {}
+
+
+def proxima_posicao(livro_id: int):
+    """Expressão SQL da senha seguinte à cauda da fila do livro"""
+    cauda = (
+        select(Reserva.posicao)
+        .where(Reserva.livro_id == livro_id, Reserva.status == StatusReserva.PENDENTE)
+        .order_by(Reserva.posicao.desc())
+        .limit(1)
+        # Usada no INSERT em `reservas`: não correlacionar com a tabela alvo
+        .correlate(None)
+        .scalar_subquery()
+    )
+    return func.coalesce(cauda, 0) + 1
+
+
+def posicoes_na_fila(db: Session, reservas: Iterable[Reserva]) -> Dict[int, int]:
+    """Posição (1 = próxima a ser atendida) de cada reserva pendente, em uma consulta"""
+    pendentes = [reserva.id for reserva in reservas if reserva.status == StatusReserva.PENDENTE]
+    if not pendentes:
+        return {}
+
+    fila = aliased(Reserva)
+    cabeca = (
+        select(fila.posicao)
+        .where(fila.livro_id == Reserva.livro_id, fila.status == StatusReserva.PENDENTE)
+        .order_by(fila.posicao)
+        .limit(1)
+        .correlate(Reserva)
+        .scalar_subquery()
+    )
+    return dict(db.query(Reserva.id, Reserva.posicao - cabeca + 1).filter(Reserva.id.in_(pendentes)).all())
+
+
+def concluir_reservas(db: Session, livro_ids: Iterable[int], usuario_id: int) -> int:
+    """
+    Conclui as reservas ATIVAS do usuário para os livros que ele acabou de
+    retirar (ver `retirar_livros`). Não faz commit.
+    """
+    livro_ids = list(livro_ids)
+    if not livro_ids:
+        return 0
+    return db.query(Reserva).filter(
+        Reserva.livro_id.in_(livro_ids),
+        Reserva.usuario_id == usuario_id,
+        Reserva.status == StatusReserva.ATIVA
+    ).update({Reserva.status: StatusReserva.CONCLUIDA}, synchronize_session=False)
+
+
+def promover_proxima(db: Session, livro_id: int, agora: Optional[datetime] = None) -> Optional[Reserva]:
+    """
+    Promove a cabeça da fila a ATIVA se o livro está disponível e ainda não
+    está guardado para ninguém. Não faz commit.
+    """
+    livro = db.get(Livro, livro_id)
+    if livro is None or livro.status != StatusLivro.DISPONIVEL:
+        return None
+    if db.query(Reserva.id).filter(
+        Reserva.livro_id == livro_id, Reserva.status == StatusReserva.ATIVA
+    ).first():
+        return None
+
+    cabeca = db.query(Reserva).filter(
+        Reserva.livro_id == livro_id,
+        Reserva.status == StatusReserva.PENDENTE
+    ).order_by(Reserva.posicao).with_for_update().first()
+    if cabeca is None:
+        return None
+
+    cabeca.status = StatusReserva.ATIVA
+    cabeca.data_validade = (agora or datetime.utcnow()) + timedelta(days=settings.RESERVA_RETIRADA_DIAS)
+    return cabeca
+
+
+def promover_proximas(db: Session, livro_ids: Iterable[int], agora: Optional[datetime] = None) -> int:
+    """
+    `promover_proxima` para vários livros com um único UPDATE: a cabeça da
+    fila de cada livro disponível e sem reserva ativa vira ATIVA. Envia as
+    alterações pendentes da sessão antes (o status dos livros é lido do
+    banco). Retorna quantas reservas foram promovidas. Não faz commit.
+    """
+    livro_ids = list(livro_ids)
+    if not livro_ids:
+        return 0
+    db.flush()
+
+    fila, ativa = aliased(Reserva), aliased(Reserva)
+    cabeca = (
+        select(func.min(fila.posicao))
+        .where(fila.livro_id == Reserva.livro_id, fila.status == StatusReserva.PENDENTE)
+        .correlate(Reserva)
+        .scalar_subquery()
+    )
+    livro_disponivel = exists().where(Livro.id == Reserva.livro_id, Livro.status == StatusLivro.DISPONIVEL)
+    resultado = db.execute(
+        update(Reserva)
+        .where(
+            Reserva.livro_id.in_(livro_ids),
+            Reserva.status == StatusReserva.PENDENTE,
+            Reserva.posicao == cabeca,
+            livro_disponivel,
+            ~exists().where(ativa.livro_id == Reserva.livro_id, ativa.status == StatusReserva.ATIVA)
+        )
+        .values(
+            status=StatusReserva.ATIVA,
+            data_validade=(agora or datetime.utcnow()) + timedelta(days=settings.RESERVA_RETIRADA_DIAS)
+        )
+        .returning(Reserva.id)
+        .execution_options(synchronize_session=False)
+    )
+    return len(resultado.all())
+
+
+def retirar_da_fila(db: Session, reserva: Reserva, status: StatusReserva) -> None:
+    """
+    Encerra a reserva com `status`. Se estava pendente, as de trás avançam
+    uma posição; se estava ativa, o livro passa para a próxima da fila.
+    Não faz commit.
+    """
+    anterior = reserva.status
+    reserva.status = status
+    db.flush()
+
+    if anterior == StatusReserva.PENDENTE and reserva.posicao is not None:
+        # Em dois passos (negativas, depois de volta): o índice único da fila
+        # é conferido linha a linha e `posicao - 1` poderia colidir com uma
+        # senha ainda não atualizada
+        db.query(Reserva).filter(
+            Reserva.livro_id == reserva.livro_id,
+            Reserva.status == StatusReserva.PENDENTE,
+            Reserva.posicao > reserva.posicao
+        ).update({Reserva.posicao: 1 - Reserva.posicao}, synchronize_session=False)
+        db.query(Reserva).filter(
+            Reserva.livro_id == reserva.livro_id,
+            Reserva.status == StatusReserva.PENDENTE,
+            Reserva.posicao < 0
+        ).update({Reserva.posicao: -Reserva.posicao}, synchronize_session=False)
+    elif anterior == StatusReserva.ATIVA:
+        promover_proxima(db, reserva.livro_id)
+
+
+def _livros_parados(db: Session, limite: int) -> List[int]:
+    """Livros disponíveis com fila mas sem reserva ativa (ex.: dados anteriores à fila)"""
+    ativa = aliased(Reserva)
+    return [
+        livro_id for (livro_id,) in db.query(Reserva.livro_id)
+        .join(Livro, Livro.id == Reserva.livro_id)
+        .filter(
+            Reserva.status == StatusReserva.PENDENTE,
+            Livro.status == StatusLivro.DISPONIVEL,
+            ~exists().where(ativa.livro_id == Reserva.livro_id, ativa.status == StatusReserva.ATIVA)
+        )
+        .distinct()
+        .limit(limite)
+    ]
+
+
+def expirar_reservas(
+    fabrica: sessionmaker = SessionLocal,
+    agora: Optional[datetime] = None,
+    lote: int = LOTE_EXPIRACAO
+) -> dict:
+    """
+    Expira as reservas ativas vencidas, `lote` por transação, e promove a
+    próxima da fila de cada livro liberado
+    """
+    agora = agora or datetime.utcnow()
+    inicio = time.perf_counter()
+    expiradas = promovidas = 0
+
+    while True:
+        with fabrica() as db:
+            vencidas = db.query(Reserva).filter(
+                Reserva.status == StatusReserva.ATIVA,
+                Reserva.data_validade < agora
+            ).order_by(Reserva.data_validade).limit(lote).with_for_update().all()
+            if not vencidas:
+                break
+
+            for reserva in vencidas:
+                reserva.status = StatusReserva.EXPIRADA
+            promovidas += promover_proximas(db, {reserva.livro_id for reserva in vencidas}, agora)
+            expiradas += len(vencidas)
+            db.commit()
+
+    with fabrica() as db:
+        promovidas += promover_proximas(db, _livros_parados(db, lote), agora)
+
+        duracao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        registrar_execucao(db.connection(), NOME_TAREFA, agora, duracao_ms, expiradas + promovidas)
+        db.commit()
+
+    resumo = {"executada_em": agora, "expiradas": expiradas, "promovidas": promovidas, "duracao_ms": duracao_ms}
+    _ultima_execucao.update(resumo)
+    return resumo
+
+
+async def expirar_reservas_periodicamente() -> None:
+    """Tarefa de fundo: executa a expiração na inicialização e a cada intervalo"""
+    await executar_periodicamente(NOME_TAREFA, expirar_reservas, settings.RESERVAS_INTERVALO_SEGUNDOS)
+
+
+registrar_metricas("fila_reservas", lambda: {
+    "intervalo_segundos": settings.RESERVAS_INTERVALO_SEGUNDOS,
+    **_ultima_execucao,
+})
@@ -0,0 +1,98 @@
+"""
+Pool dedicado para operações de hash de senha (bcrypt).
+
+Cada hash/verificação custa de 100 a 250 ms de CPU; executá-los no event
+loop congela o servidor durante picos de login. O pool roda essas chamadas
+em um número fixo de threads (o bcrypt libera o GIL) e recusa novas tarefas
+quando a fila passa do limite, em vez de acumular espera indefinidamente.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class FilaHashCheia(RuntimeError):
+    """A fila do pool de hash atingiu o limite configurado"""
+
+
+class PoolHash:
+    """
+    Executor limitado a `max_workers` threads e `max_fila` tarefas aguardando.
+
+    Mantém contadores e amostras recentes de tempo de espera e de execução
+    para as métricas.
+    """
+
+    def __init__(self, max_workers: int = 4, max_fila: int = 64, amostras: int = 1000):
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hash-senha")
+        self._lock = threading.Lock()
+        self._pendentes = 0  # aguardando + em execução
+        self._em_execucao = 0
+        self._esperas = deque(maxlen=amostras)
+        self._execucoes = deque(maxlen=amostras)
+        self.concluidas = 0
+        self.rejeitadas = 0
+
+    async def executar(self, funcao: Callable[..., Any], *args) -> Any:
+        """Executa `funcao(*args)` no pool sem bloquear o event loop"""
+        with self._lock:
+            if self._pendentes - self._em_execucao >= self.max_fila:
+                self.rejeitadas += 1
+                raise FilaHashCheia("Fila de hash de senhas cheia")
+            self._pendentes += 1
+
+        enfileirada_em = time.perf_counter()
+
+        def tarefa():
+            inicio = time.perf_counter()
+            with self._lock:
+                self._em_execucao += 1
+                self._esperas.append(inicio - enfileirada_em)
+            try:
+                return funcao(*args)
+            finally:
+                with self._lock:
+                    self._em_execucao -= 1
+                    self._pendentes -= 1
+                    self._execucoes.append(time.perf_counter() - inicio)
+                    self.concluidas += 1
+
+        # Se a requisição for cancelada, a tarefa segue no pool e libera
+        # sua vaga ao terminar
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, tarefa)
+
+    def encerrar(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            esperas = sorted(self._esperas)
+            execucoes = sorted(self._execucoes)
+            return {
+                "workers": self.max_workers,
+                "max_fila": self.max_fila,
+                "em_fila": self._pendentes - self._em_execucao,
+                "em_execucao": self._em_execucao,
+                "concluidas": self.concluidas,
+                "rejeitadas": self.rejeitadas,
+                "espera_media_ms": _media_ms(esperas),
+                "espera_p95_ms": _percentil_ms(esperas, 0.95),
+                "execucao_media_ms": _media_ms(execucoes),
+                "execucao_p95_ms": _percentil_ms(execucoes, 0.95),
+            }
+
+
+def _media_ms(valores: list) -> float:
+    return round(sum(valores) / len(valores) * 1000, 2) if valores else 0.0
+
+
+def _percentil_ms(valores: list, fracao: float) -> float:
+    if not valores:
+        return 0.0
+    return round(valores[min(len(valores) - 1, int(len(valores) * fracao))] * 1000, 2)
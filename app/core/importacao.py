@@ -0,0 +1,300 @@
+"""
+Importação em massa do acervo a partir de CSV ou JSONL.
+
+O arquivo é lido em streaming e processado em lotes: cada lote resolve
+autores e editoras pelo nome e confere ISBNs já cadastrados com uma consulta
+por conjunto (IN), insere os livros com executemany e faz commit. Linhas
+inválidas são registradas com o número da linha e não interrompem a
+importação.
+
+Os inserts são feitos via Core, fora dos listeners de estatísticas e de
+versões do catálogo; contadores e versões são ajustados explicitamente a
+cada lote.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.estatisticas import ajustar_estatisticas
+from app.core.search import indexacao_em_lote
+from app.core.versoes import publicar_alteracoes, registrar_alteracoes
+from app.models.models import Autor, Editora, Livro, StatusLivro
+from app.schemas.importacao import LinhaImportacaoLivro
+
+TAMANHO_LOTE = 5000
+MAX_ERROS_DETALHADOS = 1000
+
+# Colunas de `livros` preenchidas pela importação, na ordem das tuplas
+# passadas ao executemany
+COLUNAS_LIVRO = (
+    "titulo", "subtitulo", "autor_id", "editora_id", "isbn", "edicao",
+    "ano_publicacao", "num_paginas", "sinopse", "genero", "idioma", "capa_url",
+)
+_valores_livro = attrgetter(*COLUNAS_LIVRO)
+
+
+def ler_csv(arquivo: TextIO) -> Iterator[object]:
+    """
+    Registros de um CSV com cabeçalho; campos vazios são omitidos (valem
+    os padrões do esquema).
+
+    Registros ilegíveis são entregues como a exceção, para serem reportados
+    sem interromper a leitura.
+    """
+    leitor = csv.DictReader(arquivo)
+    while True:
+        try:
+            linha = next(leitor)
+        except StopIteration:
+            return
+        except csv.Error as erro:
+            yield erro
+            continue
+        yield {campo: valor for campo, valor in linha.items() if campo and valor not in ("", None)}
+
+
+def ler_jsonl(arquivo: TextIO) -> Iterator[object]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas"""
+    for texto in arquivo:
+        texto = texto.strip()
+        if not texto:
+            continue
+        try:
+            yield json.loads(texto)
+        except ValueError as erro:
+            yield erro
+
+
+LEITORES = {"csv": ler_csv, "jsonl": ler_jsonl}
+
+
+def formato_do_arquivo(nome: str) -> Optional[str]:
+    extensao = nome.rsplit(".", 1)[-1].lower() if "." in nome else ""
+    return {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}.get(extensao)
+
+
+def _lotes(linhas: Iterable[object], tamanho: int) -> Iterator[List[Tuple[int, object]]]:
+    """Agrupa os registros em lotes, numerando-os a partir de 1"""
+    lote = []
+    for item in enumerate(linhas, start=1):
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _resolver_nomes(conn: Connection, modelo, nomes: set, criar: bool, ids: Dict[str, int]) -> int:
+    """
+    Completa o mapa nome -> id com os nomes ainda não vistos nesta
+    importação (uma consulta por lote); cria os que faltam se `criar`.
+    Retorna quantos registros foram criados.
+    """
+    nomes = [nome for nome in nomes if nome not in ids]
+    if not nomes:
+        return 0
+
+    ids.update(conn.execute(select(modelo.nome, modelo.id).where(modelo.nome.in_(nomes))).all())
+    faltantes = [nome for nome in nomes if nome not in ids]
+    if not faltantes or not criar:
+        return 0
+
+    conn.execute(insert(modelo.__table__), [{"nome": nome} for nome in faltantes])
+    ids.update(conn.execute(select(modelo.nome, modelo.id).where(modelo.nome.in_(faltantes))).all())
+    return len(faltantes)
+
+
+def _ids_existentes(conn: Connection, modelo, ids: set) -> set:
+    if not ids:
+        return set()
+    return set(conn.execute(select(modelo.id).where(modelo.id.in_(ids))).scalars())
+
+
+def _inserir_livros(conn: Connection, registros: List[tuple]) -> None:
+    """
+    executemany dos livros (tuplas na ordem de `COLUNAS_LIVRO`). No SQLite
+    os parâmetros vão direto ao driver: o processamento por linha do
+    SQLAlchemy custava ~25% da importação.
+    """
+    if conn.dialect.name != "sqlite":
+        conn.execute(insert(Livro.__table__), [dict(zip(COLUNAS_LIVRO, registro)) for registro in registros])
+        return
+
+    colunas = COLUNAS_LIVRO + ("status", "data_cadastro", "atualizado_em")
+    # Mesmos valores que os defaults das colunas gravariam
+    status = StatusLivro.DISPONIVEL.name
+    agora = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+    conn.exec_driver_sql(
+        f"INSERT INTO livros ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        [registro + (status, agora, agora) for registro in registros]
+    )
+
+
+class Importacao:
+    """Acumula o resultado de uma importação (contadores e erros por linha)"""
+
+    def __init__(self, max_erros_detalhados: int = MAX_ERROS_DETALHADOS):
+        self.max_erros_detalhados = max_erros_detalhados
+        self.linhas_lidas = 0
+        self.livros_inseridos = 0
+        self.autores_criados = 0
+        self.editoras_criadas = 0
+        self.total_erros = 0
+        self.erros: List[dict] = []
+        # Nomes já resolvidos nesta importação (evita reconsultar a cada lote)
+        self.ids_autores: Dict[str, int] = {}
+        self.ids_editoras: Dict[str, int] = {}
+        self._inicio = time.perf_counter()
+
+    def erro(self, linha: int, mensagem: str, isbn: Optional[str] = None) -> None:
+        self.total_erros += 1
+        if len(self.erros) < self.max_erros_detalhados:
+            self.erros.append({"linha": linha, "isbn": isbn, "erro": mensagem})
+
+    def resultado(self) -> dict:
+        return {
+            "linhas_lidas": self.linhas_lidas,
+            "livros_inseridos": self.livros_inseridos,
+            "autores_criados": self.autores_criados,
+            "editoras_criadas": self.editoras_criadas,
+            "total_erros": self.total_erros,
+            "erros": self.erros,
+            "duracao_segundos": round(time.perf_counter() - self._inicio, 3),
+        }
+
+
+def _validar(numero: int, dados, importacao: Importacao) -> Optional[LinhaImportacaoLivro]:
+    if isinstance(dados, Exception):
+        importacao.erro(numero, f"Linha ilegível: {dados}")
+        return None
+    if not isinstance(dados, dict):
+        importacao.erro(numero, "Linha deve ser um objeto")
+        return None
+
+    try:
+        linha = LinhaImportacaoLivro(**dados)
+    except ValidationError as erro:
+        mensagens = "; ".join(
+            f"{'.'.join(str(parte) for parte in item['loc'])}: {item['msg']}" for item in erro.errors()
+        )
+        importacao.erro(numero, mensagens, dados.get("isbn"))
+        return None
+
+    if linha.autor_id is None and not linha.autor:
+        importacao.erro(numero, "Informe 'autor' ou 'autor_id'", linha.isbn)
+        return None
+    return linha
+
+
+def _importar_lote(
+    conn: Connection,
+    lote: List[Tuple[int, object]],
+    importacao: Importacao,
+    isbns_vistos: set,
+    criar_autores: bool,
+    criar_editoras: bool
+) -> List[str]:
+    """Importa um lote na transação de `conn`; retorna os recursos do catálogo alterados"""
+    validas = []
+    for numero, dados in lote:
+        linha = _validar(numero, dados, importacao)
+        if linha is None:
+            continue
+        if linha.isbn in isbns_vistos:
+            importacao.erro(numero, "ISBN repetido no arquivo", linha.isbn)
+            continue
+        isbns_vistos.add(linha.isbn)
+        validas.append((numero, linha))
+
+    if not validas:
+        return []
+
+    # Uma consulta por conjunto em vez de três SELECTs por livro
+    autores, editoras = importacao.ids_autores, importacao.ids_editoras
+    autores_criados = _resolver_nomes(
+        conn, Autor, {linha.autor for _, linha in validas if linha.autor_id is None}, criar_autores, autores
+    )
+    editoras_criadas = _resolver_nomes(
+        conn, Editora, {linha.editora for _, linha in validas if linha.editora_id is None and linha.editora},
+        criar_editoras, editoras
+    )
+    importacao.autores_criados += autores_criados
+    importacao.editoras_criadas += editoras_criadas
+    autores_validos = _ids_existentes(conn, Autor, {linha.autor_id for _, linha in validas if linha.autor_id})
+    editoras_validas = _ids_existentes(conn, Editora, {linha.editora_id for _, linha in validas if linha.editora_id})
+    isbns_cadastrados = set(conn.execute(
+        select(Livro.isbn).where(Livro.isbn.in_([linha.isbn for _, linha in validas]))
+    ).scalars())
+
+    registros = []
+    for numero, linha in validas:
+        if linha.isbn in isbns_cadastrados:
+            importacao.erro(numero, "Já existe um livro cadastrado com este ISBN", linha.isbn)
+            continue
+
+        autor_id = linha.autor_id if linha.autor_id in autores_validos else autores.get(linha.autor)
+        if autor_id is None:
+            importacao.erro(numero, "Autor não encontrado", linha.isbn)
+            continue
+
+        editora_id = linha.editora_id
+        if editora_id is not None and editora_id not in editoras_validas:
+            importacao.erro(numero, "Editora não encontrada", linha.isbn)
+            continue
+        if editora_id is None and linha.editora:
+            editora_id = editoras.get(linha.editora)
+            if editora_id is None:
+                importacao.erro(numero, "Editora não encontrada", linha.isbn)
+                continue
+
+        linha.autor_id = autor_id
+        linha.editora_id = editora_id
+        registros.append(_valores_livro(linha))
+
+    if registros:
+        with indexacao_em_lote(conn):
+            _inserir_livros(conn, registros)
+        ajustar_estatisticas(conn, {"total_livros": len(registros)})
+        importacao.livros_inseridos += len(registros)
+    alterados = [
+        recurso for recurso, alterado in (
+            ("livros", registros), ("autores", autores_criados), ("editoras", editoras_criadas)
+        ) if alterado
+    ]
+    registrar_alteracoes(conn, alterados)
+    return alterados
+
+
+def importar_livros(
+    engine: Engine,
+    linhas: Iterable[object],
+    tamanho_lote: int = TAMANHO_LOTE,
+    criar_autores: bool = True,
+    criar_editoras: bool = True,
+    max_erros_detalhados: int = MAX_ERROS_DETALHADOS
+) -> dict:
+    """
+    Importa livros em lotes, cada lote em sua própria transação.
+
+    `linhas` é qualquer iterável de dicionários (ver `ler_csv`/`ler_jsonl`).
+    Autores e editoras informados por nome são criados quando não existem
+    (desative com `criar_autores`/`criar_editoras`).
+    """
+    importacao = Importacao(max_erros_detalhados)
+    isbns_vistos: set = set()
+
+    for lote in _lotes(linhas, tamanho_lote):
+        importacao.linhas_lidas += len(lote)
+        with engine.begin() as conn:
+            alterados = _importar_lote(conn, lote, importacao, isbns_vistos, criar_autores, criar_editoras)
+        publicar_alteracoes(alterados)
+
+    return importacao.resultado()
@@ -0,0 +1,19 @@
+"""
+Registro simples de métricas internas.
+
+Cada subsistema registra uma função que devolve um dicionário com seus
+contadores; o endpoint `/metricas/` apenas agrega essas fontes.
+"""
+from typing import Callable, Dict
+
+_fontes: Dict[str, Callable[[], dict]] = {}
+
+
+def registrar_metricas(nome: str, coletor: Callable[[], dict]) -> None:
+    """Registra (ou substitui) a fonte de métricas `nome`"""
+    _fontes[nome] = coletor
+
+
+def coletar_metricas() -> Dict[str, dict]:
+    """Retorna o estado atual de todas as fontes registradas"""
+    return {nome: coletor() for nome, coletor in _fontes.items()}
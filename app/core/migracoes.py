@@ -0,0 +1,56 @@
+"""
+Aplicação das migrações do Alembic a partir do código (init_db, create_admin).
+
+Equivale a `alembic upgrade head`, mas reconhece bancos criados antes das
+migrações (via `Base.metadata.create_all`): esses são marcados com a revisão
+que corresponde ao esquema de então e recebem só as migrações seguintes.
+"""
+from pathlib import Path
+from typing import Iterable, Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine as engine_padrao
+
+RAIZ = Path(__file__).resolve().parents[2]
+
+# Esquemas que o antigo create_all produzia, do mais novo ao mais antigo: a
+# tabela que aparece em cada um e a revisão que o descreve. O índice de busca
+# (0002) é instalado de novo sem perda, então não entra na detecção.
+ESQUEMAS_LEGADOS = (
+    ("estatisticas_circulacao", "0001"),
+    ("livros", "0000"),
+)
+
+
+def configuracao_alembic() -> Config:
+    config = Config(str(RAIZ / "alembic.ini"))
+    config.set_main_option("script_location", str(RAIZ / "migrations"))
+    # Não reconfigura o logging de quem chamou
+    config.attributes["configurar_logging"] = False
+    return config
+
+
+def revisao_legada(tabelas: Iterable[str]) -> Optional[str]:
+    """Revisão de um banco criado sem migrações (None se não for o caso)"""
+    tabelas = set(tabelas)
+    if "alembic_version" in tabelas:
+        return None
+    for tabela, revisao in ESQUEMAS_LEGADOS:
+        if tabela in tabelas:
+            return revisao
+    return None
+
+
+def atualizar_esquema(engine: Engine = engine_padrao) -> None:
+    """Aplica as migrações pendentes no banco do engine"""
+    config = configuracao_alembic()
+    with engine.begin() as conexao:
+        config.attributes["connection"] = conexao
+        revisao = revisao_legada(inspect(conexao).get_table_names())
+        if revisao:
+            command.stamp(config, revisao)
+        command.upgrade(config, "head")
@@ -0,0 +1,134 @@
+"""
+Paginação por chave (keyset) com cursor opaco.
+
+O cursor guarda os valores das colunas de ordenação do último item da
+página; a próxima página começa estritamente depois dele, então o custo
+não depende da profundidade e escritas concorrentes não duplicam nem
+pulam linhas.
+
+As telas do frontend usam paginação numerada (`PaginaNumerada`), com o
+tamanho da página limitado a `POR_PAGINA_MAXIMO`.
+"""
+import base64
+import json
+from datetime import date, datetime
+from math import ceil
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+POR_PAGINA_PADRAO = 20
+POR_PAGINA_MAXIMO = 100
+
+
+def codificar_cursor(valores: List[Any]) -> str:
+    """Serializa os valores de ordenação em um cursor opaco"""
+    serializaveis = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores]
+    bruto = json.dumps(serializaveis, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, colunas: list) -> List[Any]:
+    """Reconstrói os valores de ordenação a partir do cursor"""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        if not isinstance(valores, list) or len(valores) != len(colunas):
+            raise ValueError("cursor com formato inesperado")
+
+        convertidos = []
+        for coluna, valor in zip(colunas, valores):
+            tipo = coluna.type.python_type
+            if valor is not None and tipo is datetime:
+                valor = datetime.fromisoformat(valor)
+            elif valor is not None and tipo is date:
+                valor = date.fromisoformat(valor)
+            elif valor is not None and (not isinstance(valor, tipo) or isinstance(valor, bool)):
+                # Cursor adulterado: o valor iria para a comparação com a coluna
+                raise ValueError(f"valor inesperado para {coluna.key}")
+            convertidos.append(valor)
+        return convertidos
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def _depois_de(colunas: list, valores: List[Any]):
+    """Monta (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ... para ordenação ascendente"""
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(colunas, valores)):
+        iguais = [c == v for c, v in zip(colunas[:i], valores[:i])]
+        condicoes.append(and_(*iguais, coluna > valor))
+    return or_(*condicoes)
+
+
+def paginar_por_cursor(
+    query: Query,
+    colunas: list,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[list, Optional[str]]:
+    """
+    Aplica a paginação por chave à query.
+
+    `colunas` são as colunas de ordenação (a última deve ser única, em geral
+    o id). Um cursor vazio ou None devolve a primeira página. Retorna os
+    itens e o cursor da próxima página (None quando não há mais itens).
+    """
+    if limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O limite da página deve ser maior que zero"
+        )
+    if cursor:
+        query = query.filter(_depois_de(colunas, decodificar_cursor(cursor, colunas)))
+
+    itens = query.order_by(*[c.asc() for c in colunas]).limit(limit + 1).all()
+
+    proximo = None
+    if len(itens) > limit:
+        itens = itens[:limit]
+        ultimo = itens[-1]
+        proximo = codificar_cursor([getattr(ultimo, c.key) for c in colunas])
+
+    return itens, proximo
+
+
+class PaginaNumerada:
+    """
+    Uma página de uma listagem do frontend. Página e tamanho recebidos na URL
+    são ajustados: o tamanho fica entre 1 e `POR_PAGINA_MAXIMO` e a página
+    entre 1 e a última. Os `itens` são preenchidos pelo chamador a partir de
+    `offset` e `por_pagina`.
+    """
+
+    def __init__(self, total: int, pagina: int, por_pagina: int):
+        self.total = total
+        self.por_pagina = min(max(por_pagina, 1), POR_PAGINA_MAXIMO)
+        self.pagina = min(max(pagina, 1), self.total_paginas)
+        self.itens: list = []
+
+    @property
+    def total_paginas(self) -> int:
+        return max(1, ceil(self.total / self.por_pagina))
+
+    @property
+    def offset(self) -> int:
+        return (self.pagina - 1) * self.por_pagina
+
+    @property
+    def tem_anterior(self) -> bool:
+        return self.pagina > 1
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.pagina < self.total_paginas
+
+    def paginas_vizinhas(self, raio: int = 2) -> range:
+        """Números de página exibidos ao redor da atual"""
+        return range(max(1, self.pagina - raio), min(self.total_paginas, self.pagina + raio) + 1)
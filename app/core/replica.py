@@ -0,0 +1,289 @@
+"""
+Roteamento de sessões entre o banco primário e uma réplica de leitura.
+
+Endpoints somente-leitura do catálogo usam `get_db_leitura` /
+`get_async_db_leitura`; escritas continuam em `get_db`. A réplica pode ser:
+
+- `REPLICA_DATABASE_URL`: um servidor de réplica (ex.: PostgreSQL em streaming);
+- `SQLITE_REPLICA_PATH`: uma cópia do arquivo SQLite, refeita a cada
+  `REPLICA_REFRESH_SEGUNDOS` pela API de backup do SQLite, aberta em modo
+  somente leitura para não disputar locks com o escritor. Com vários
+  workers, uma trava no arquivo `<réplica>.lock` faz só um copiar por vez;
+  os demais encontram a cópia recente e só reabrem as conexões.
+
+Sem nenhuma das duas, as dependências de leitura usam o primário.
+
+Como a réplica pode estar atrasada, toda escrita bem-sucedida devolve o
+instante da escrita assinado (cookie `ultima_escrita` e header
+`X-Ultima-Escrita`, que clientes sem cookies podem reenviar). Enquanto a
+marca tiver menos de `READ_YOUR_WRITES_SEGUNDOS`, as leituras desse cliente
+vão ao primário, em qualquer worker; com a réplica SQLite, só até a réplica
+ser copiada depois da escrita.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import (
+    POOL_OPCOES,
+    USANDO_SQLITE,
+    AsyncSessionLocal,
+    SessionLocal,
+    argumentos_conexao,
+    configurar_sqlite,
+    engine,
+    pragmas_sqlite,
+    url_assincrona,
+)
+from app.core.metrics import registrar_metricas
+
+logger = logging.getLogger(__name__)
+
+METODOS_LEITURA = {"GET", "HEAD", "OPTIONS"}
+
+REPLICA_SQLITE = bool(USANDO_SQLITE and settings.SQLITE_REPLICA_PATH)
+REPLICA_ATIVA = bool(settings.REPLICA_DATABASE_URL or REPLICA_SQLITE)
+
+COOKIE_ESCRITA = "ultima_escrita"
+HEADER_ESCRITA = "X-Ultima-Escrita"
+
+_leituras = {"replica": 0, "primario": 0}
+_copias = {"feitas": 0, "puladas": 0}
+# Cópia da réplica SQLite para a qual as conexões deste processo estão abertas
+_copia_aberta: Optional[float] = None
+
+
+def _url_replica_sqlite(assincrona: bool = False) -> str:
+    caminho = Path(settings.SQLITE_REPLICA_PATH).resolve().as_posix()
+    driver = "sqlite+aiosqlite" if assincrona else "sqlite"
+    return f"{driver}:///file:{caminho}?mode=ro&uri=true"
+
+
+@contextmanager
+def _trava_entre_processos(caminho: Path):
+    """Trava exclusiva em `caminho`, compartilhada pelos workers"""
+    with open(caminho, "a+b") as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+            else:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def replica_copiada_em() -> Optional[float]:
+    """Início da cópia atual da réplica SQLite (mtime do arquivo); None se não há cópia"""
+    try:
+        return os.stat(settings.SQLITE_REPLICA_PATH).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
+def atualizar_replica_sqlite(idade_maxima: float = 0) -> bool:
+    """
+    Copia o banco primário para o arquivo da réplica (troca atômica), a não
+    ser que outro worker tenha feito uma cópia há menos de `idade_maxima`
+    segundos. Devolve se as conexões deste processo passaram a outra cópia.
+    """
+    global _copia_aberta
+    destino = Path(settings.SQLITE_REPLICA_PATH)
+    temporario = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+
+    with _trava_entre_processos(destino.with_name(f"{destino.name}.lock")):
+        copiada_em = replica_copiada_em()
+        if copiada_em is not None and time.time() - copiada_em < idade_maxima:
+            _copias["puladas"] += 1
+        else:
+            inicio = time.time()
+            origem = engine.raw_connection()
+            try:
+                copia = sqlite3.connect(temporario)
+                try:
+                    origem.driver_connection.backup(copia)
+                    # A réplica é aberta somente leitura: sem arquivos -wal/-shm
+                    copia.execute("PRAGMA journal_mode = DELETE")
+                finally:
+                    copia.close()
+            finally:
+                origem.close()
+            # O mtime marca o início da cópia: escritas anteriores estão nela
+            os.utime(temporario, (inicio, inicio))
+            os.replace(temporario, destino)
+            _copias["feitas"] += 1
+            copiada_em = inicio
+
+    if copiada_em == _copia_aberta:
+        return False
+    _copia_aberta = copiada_em
+    # Conexões abertas ainda apontam para o arquivo antigo
+    replica_engine.dispose()
+    return True
+
+
+async def atualizar_replica_sqlite_async(idade_maxima: float = 0) -> None:
+    if await asyncio.to_thread(atualizar_replica_sqlite, idade_maxima):
+        await async_replica_engine.dispose()
+
+
+def criar_engines_replica_sqlite() -> tuple:
+    """Engines (síncrono, assíncrono) somente leitura sobre `SQLITE_REPLICA_PATH`"""
+    sincrono = create_engine(_url_replica_sqlite(), connect_args={"check_same_thread": False}, **POOL_OPCOES)
+    assincrono = create_async_engine(_url_replica_sqlite(assincrona=True), **POOL_OPCOES)
+    # journal_mode/synchronous exigem escrita; a réplica só lê
+    pragmas_leitura = [
+        (nome, valor) for nome, valor in pragmas_sqlite()
+        if nome not in ("journal_mode", "synchronous")
+    ]
+    configurar_sqlite(sincrono, pragmas_leitura)
+    configurar_sqlite(assincrono.sync_engine, pragmas_leitura)
+    return sincrono, assincrono
+
+
+if REPLICA_SQLITE:
+    replica_engine, async_replica_engine = criar_engines_replica_sqlite()
+elif settings.REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        settings.REPLICA_DATABASE_URL, connect_args=argumentos_conexao(), **POOL_OPCOES
+    )
+    async_replica_engine = create_async_engine(
+        url_assincrona(settings.REPLICA_DATABASE_URL),
+        connect_args=argumentos_conexao(),
+        **POOL_OPCOES
+    )
+
+if REPLICA_ATIVA:
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    replica_engine = engine
+    ReplicaSessionLocal = SessionLocal
+    AsyncReplicaSessionLocal = AsyncSessionLocal
+
+
+def _assinatura(valor: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), valor.encode(), hashlib.sha256).hexdigest()
+
+
+def marca_de_escrita(instante: float) -> str:
+    """`instante` assinado, no formato do cookie `ultima_escrita`"""
+    valor = f"{instante:.6f}"
+    return f"{valor}.{_assinatura(valor)}"
+
+
+def ultima_escrita(request: Request) -> Optional[float]:
+    """Instante da última escrita do cliente (cookie ou header), se a assinatura confere"""
+    marca = request.cookies.get(COOKIE_ESCRITA) or request.headers.get(HEADER_ESCRITA)
+    valor, _, assinatura = (marca or "").rpartition(".")
+    if not valor or not hmac.compare_digest(assinatura, _assinatura(valor)):
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        return None
+
+
+def replica_inclui(instante: float) -> bool:
+    """Se as leituras da réplica já incluem o que foi commitado até `instante`"""
+    if REPLICA_SQLITE:
+        copiada_em = replica_copiada_em()
+        return copiada_em is not None and copiada_em > instante
+    # Servidor de réplica: supõe-se atraso menor que READ_YOUR_WRITES_SEGUNDOS
+    return time.time() - instante >= settings.READ_YOUR_WRITES_SEGUNDOS
+
+
+def usar_primario(request: Request) -> bool:
+    """
+    Leitura vai ao primário se não há réplica ou se o cliente escreveu há
+    pouco e a réplica ainda pode não ter a escrita. Decidido uma vez por
+    requisição: o cache de respostas e a sessão seguem a mesma escolha.
+    """
+    if not REPLICA_ATIVA:
+        return True
+    decidido = getattr(request.state, "leitura_no_primario", None)
+    if decidido is not None:
+        return decidido
+    instante = ultima_escrita(request)
+    primario = (
+        instante is not None
+        and time.time() - instante < settings.READ_YOUR_WRITES_SEGUNDOS
+        and not replica_inclui(instante)
+    )
+    request.state.leitura_no_primario = primario
+    _leituras["primario" if primario else "replica"] += 1
+    return primario
+
+
+async def registrar_escritas(request: Request, call_next):
+    """Middleware: marca o cliente com o instante de uma escrita bem-sucedida"""
+    response = await call_next(request)
+    if REPLICA_ATIVA and request.method not in METODOS_LEITURA and response.status_code < 400:
+        # Depois do commit: uma cópia iniciada a partir daqui já tem a escrita
+        marca = marca_de_escrita(time.time())
+        response.headers[HEADER_ESCRITA] = marca
+        response.set_cookie(
+            COOKIE_ESCRITA, marca, max_age=settings.READ_YOUR_WRITES_SEGUNDOS, httponly=True, samesite="lax"
+        )
+    return response
+
+
+def get_db_leitura(request: Request):
+    db = (SessionLocal if usar_primario(request) else ReplicaSessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db_leitura(request: Request):
+    fabrica = AsyncSessionLocal if usar_primario(request) else AsyncReplicaSessionLocal
+    async with fabrica() as db:
+        yield db
+
+
+async def manter_replica_atualizada() -> None:
+    """Tarefa de fundo: refaz a cópia SQLite a cada `REPLICA_REFRESH_SEGUNDOS`"""
+    while True:
+        await asyncio.sleep(settings.REPLICA_REFRESH_SEGUNDOS)
+        try:
+            # Se outro worker acabou de copiar, só passa a ler a cópia dele
+            await atualizar_replica_sqlite_async(idade_maxima=settings.REPLICA_REFRESH_SEGUNDOS / 2)
+        except Exception:
+            logger.exception("Falha ao atualizar a réplica SQLite")
+
+
+registrar_metricas("replica", lambda: {
+    "ativa": REPLICA_ATIVA,
+    "leituras_replica": _leituras["replica"],
+    "leituras_primario": _leituras["primario"],
+    "copias_feitas": _copias["feitas"],
+    "copias_puladas": _copias["puladas"],
+    "copiada_em": replica_copiada_em() if REPLICA_SQLITE else None,
+})
@@ -0,0 +1,207 @@
+"""
+Busca textual do acervo.
+
+Em SQLite o catálogo é indexado em uma tabela virtual FTS5 (`livros_fts`),
+mantida em sincronia por triggers sobre `livros`, `autores` e `editoras`.
+O `rowid` da tabela virtual é o próprio id do livro.
+"""
+import re
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import Integer, column, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.models import Autor, Editora, Livro
+
+FTS_TABLE = "livros_fts"
+
+# Pesos do bm25 na ordem das colunas: titulo, subtitulo, sinopse, autor, editora
+BM25_PESOS = (10.0, 4.0, 1.0, 6.0, 2.0)
+
+_DDL_TRIGGER_INSERCAO = f"""
+    CREATE TRIGGER IF NOT EXISTS livros_fts_ai AFTER INSERT ON livros BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, titulo, subtitulo, sinopse, autor_nome, editora_nome)
+        VALUES (
+            new.id, new.titulo, new.subtitulo, new.sinopse,
+            (SELECT nome FROM autores WHERE id = new.autor_id),
+            (SELECT nome FROM editoras WHERE id = new.editora_id)
+        );
+    END
+"""
+
+_DDL_INDICE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        titulo, subtitulo, sinopse, autor_nome, editora_nome,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    _DDL_TRIGGER_INSERCAO,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS livros_fts_ad AFTER DELETE ON livros BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS livros_fts_au
+    AFTER UPDATE OF titulo, subtitulo, sinopse, autor_id, editora_id ON livros BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, titulo, subtitulo, sinopse, autor_nome, editora_nome)
+        VALUES (
+            new.id, new.titulo, new.subtitulo, new.sinopse,
+            (SELECT nome FROM autores WHERE id = new.autor_id),
+            (SELECT nome FROM editoras WHERE id = new.editora_id)
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS autores_fts_au AFTER UPDATE OF nome ON autores BEGIN
+        UPDATE {FTS_TABLE} SET autor_nome = new.nome
+        WHERE rowid IN (SELECT id FROM livros WHERE autor_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS editoras_fts_au AFTER UPDATE OF nome ON editoras BEGIN
+        UPDATE {FTS_TABLE} SET editora_nome = new.nome
+        WHERE rowid IN (SELECT id FROM livros WHERE editora_id = new.id);
+    END
+    """,
+]
+
+_SQL_POPULAR = f"""
+    INSERT INTO {FTS_TABLE} (rowid, titulo, subtitulo, sinopse, autor_nome, editora_nome)
+    SELECT l.id, l.titulo, l.subtitulo, l.sinopse, a.nome, e.nome
+    FROM livros l
+    LEFT JOIN autores a ON a.id = l.autor_id
+    LEFT JOIN editoras e ON e.id = l.editora_id
+"""
+
+
+def instalar_indice_busca(conn: Connection) -> None:
+    """Cria o índice FTS5 e os triggers na conexão informada (idempotente)"""
+    if conn.dialect.name != "sqlite":
+        return
+
+    existe = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+        {"nome": FTS_TABLE}
+    ).first()
+
+    for ddl in _DDL_INDICE:
+        conn.exec_driver_sql(ddl)
+
+    # Banco já existente: indexa o acervo atual uma única vez
+    if not existe:
+        conn.exec_driver_sql(_SQL_POPULAR)
+
+
+@contextmanager
+def indexacao_em_lote(conn: Connection):
+    """
+    Suspende o trigger de INSERT durante o bloco e indexa de uma vez os
+    livros inseridos nele (o trigger linha a linha custa ~10x mais).
+
+    Tudo acontece na transação da conexão: se o bloco falhar, o rollback
+    restaura o trigger. Como o SQLite tem um único escritor, nenhuma outra
+    conexão insere livros enquanto o trigger está suspenso.
+    """
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+
+    # O driver só abre a transação antes de DML; o DROP TRIGGER precisa dela
+    if not conn.connection.driver_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+    ultimo_id = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM livros").scalar()
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS livros_fts_ai")
+    yield
+    conn.exec_driver_sql(_SQL_POPULAR + " WHERE l.id > ?", (ultimo_id,))
+    conn.exec_driver_sql(_DDL_TRIGGER_INSERCAO)
+
+
+def remover_indice_busca(conn: Connection) -> None:
+    """Remove os triggers e a tabela FTS5"""
+    if conn.dialect.name != "sqlite":
+        return
+
+    for trigger in ("livros_fts_ai", "livros_fts_ad", "livros_fts_au", "autores_fts_au", "editoras_fts_au"):
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def reconstruir_indice_busca(engine: Engine) -> None:
+    """Recria o conteúdo do índice a partir das tabelas do acervo"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+        conn.exec_driver_sql(_SQL_POPULAR)
+
+
+def montar_consulta_fts(termo: str) -> Optional[str]:
+    """
+    Converte o texto digitado em uma consulta FTS5.
+
+    Cada palavra vira um prefixo entre aspas ("dom"* "casm"*), combinados
+    com AND implícito; aspas e operadores digitados pelo usuário são ignorados.
+    """
+    palavras = re.findall(r"\w+", termo or "", flags=re.UNICODE)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar_ids_livros(db: Session, termo: str, skip: int = 0, limit: int = 100) -> Optional[List[int]]:
+    """
+    Retorna os ids dos livros que casam com o termo, ordenados por relevância.
+
+    Retorna None quando o índice FTS não está disponível (banco que não é
+    SQLite), para que o chamador use a busca por LIKE.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return None
+
+    consulta = montar_consulta_fts(termo)
+    if consulta is None:
+        return []
+
+    pesos = ", ".join(str(peso) for peso in BM25_PESOS)
+    resultado = db.execute(
+        text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :consulta "
+            f"ORDER BY bm25({FTS_TABLE}, {pesos}) LIMIT :limit OFFSET :skip"
+        ),
+        {"consulta": consulta, "limit": limit, "skip": skip}
+    )
+    return [row[0] for row in resultado]
+
+
+def filtro_busca_livros(db: Session, termo: str):
+    """
+    Condição WHERE que restringe `Livro` aos resultados da busca, sem ranking.
+
+    Usada quando a ordenação é imposta por outra chave (paginação por cursor)
+    e como busca por LIKE em bancos sem o índice FTS.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        consulta = montar_consulta_fts(termo)
+        if consulta is None:
+            return Livro.id.in_([])
+        ids = text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :consulta"
+        ).bindparams(consulta=consulta).columns(column("rowid", Integer))
+        return Livro.id.in_(ids)
+
+    padrao = f"%{termo}%"
+    return or_(
+        Livro.titulo.ilike(padrao),
+        Livro.subtitulo.ilike(padrao),
+        Livro.sinopse.ilike(padrao),
+        Livro.autor_id.in_(select(Autor.id).where(Autor.nome.ilike(padrao))),
+        Livro.editora_id.in_(select(Editora.id).where(Editora.nome.ilike(padrao)))
+    )
@@ -0,0 +1,186 @@
+"""
+Serialização rápida das respostas da API.
+
+- `RespostaSerializada` é a classe de resposta padrão da aplicação: gera o
+  JSON com orjson (stdlib `json` se o pacote não estiver instalado) e, para
+  clientes que enviam `Accept: application/msgpack`, entrega MessagePack
+  com o mesmo conteúdo.
+- `lista_confiavel`/`pagina_confiavel` são o caminho dos endpoints de
+  listagem: leem das linhas do ORM (que já vêm tipadas do banco) só os
+  campos do schema e devolvem a resposta pronta. O `response_model` da rota
+  continua documentando o formato, mas nada é validado de novo: o caminho
+  padrão do FastAPI valida cada linha, converte os modelos em dicionários,
+  valida outra vez e só então serializa. Com `campos_pedidos`, as listagens
+  aceitam `fields=`/`expand=` e devolvem só parte do schema.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional, Tuple, Type, Union, get_args, get_origin
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # sem o pacote, json da stdlib
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # sem o pacote, só JSON
+    msgpack = None
+
+MSGPACK = "application/msgpack"
+TIPOS_MSGPACK = {MSGPACK, "application/x-msgpack"}
+
+
+def aceita_msgpack(cabecalhos: Headers) -> bool:
+    """Se o cliente pediu MessagePack no Accept (e o pacote está instalado)"""
+    if msgpack is None:
+        return False
+    for item in cabecalhos.get("accept", "").split(","):
+        tipo, _, parametros = item.strip().partition(";")
+        if tipo.lower() in TIPOS_MSGPACK and parametros.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+
+def _para_msgpack(valor: Any) -> Any:
+    """Tipos sem equivalente no MessagePack, no mesmo formato do JSON"""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    return jsonable_encoder(valor)
+
+
+class RespostaSerializada(JSONResponse):
+    """JSON via orjson; MessagePack quando o Accept da requisição pede"""
+
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 media_type: Optional[str] = None, background: Optional[BackgroundTask] = None):
+        self.conteudo = content
+        self.em_msgpack = False
+        super().__init__(content, status_code, headers, media_type, background)
+        if msgpack is not None:
+            self.headers.append("Vary", "Accept")
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return json.dumps(
+                content, default=jsonable_encoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+            ).encode("utf-8")
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+    def negociar(self, cabecalhos: Headers) -> None:
+        """Troca o corpo por MessagePack se a requisição pediu"""
+        if self.em_msgpack or not aceita_msgpack(cabecalhos):
+            return
+        self.body = msgpack.packb(self.conteudo, default=_para_msgpack)
+        self.headers["Content-Type"] = MSGPACK
+        self.headers["Content-Length"] = str(len(self.body))
+        self.em_msgpack = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.negociar(Headers(scope=scope))
+        await super().__call__(scope, receive, send)
+
+
+@lru_cache(maxsize=None)
+def _campos(modelo: Type[BaseModel]) -> tuple:
+    """(nome, schema aninhado ou None, se é lista) de cada campo do modelo"""
+    campos = []
+    for nome, campo in modelo.model_fields.items():
+        anotacao, lista = campo.annotation, False
+        if get_origin(anotacao) is Union:
+            argumentos = [argumento for argumento in get_args(anotacao) if argumento is not type(None)]
+            if len(argumentos) == 1:
+                anotacao = argumentos[0]
+        if get_origin(anotacao) in (list, List):
+            anotacao, lista = get_args(anotacao)[0], True
+        aninhado = anotacao if isinstance(anotacao, type) and issubclass(anotacao, BaseModel) else None
+        campos.append((nome, aninhado, lista))
+    return tuple(campos)
+
+
+def campos_pedidos(modelo: Type[BaseModel], fields: Optional[str], expand: Optional[str],
+                   relacoes: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Campos de `modelo` pedidos pela requisição, na ordem do schema.
+
+    `fields` e `expand` são listas separadas por vírgula: `fields` escolhe os
+    campos simples (padrão: todos) e `expand` os relacionamentos (`relacoes`)
+    incluídos. Sem nenhum dos dois, valem todos os campos; o `id` vem sempre.
+    """
+    todos = tuple(modelo.model_fields)
+    if fields is None and expand is None:
+        return todos
+    relacoes = set(relacoes)
+    simples = [nome for nome in todos if nome not in relacoes]
+
+    def separar(valor: Optional[str], validos: list, parametro: str) -> set:
+        nomes = {nome.strip() for nome in (valor or "").split(",") if nome.strip()}
+        invalidos = nomes - set(validos)
+        if invalidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{parametro} inválido: {', '.join(sorted(invalidos))}. Use: {', '.join(validos)}"
+            )
+        return nomes
+
+    pedidos = separar(fields, simples, "fields") if fields is not None else set(simples)
+    pedidos |= separar(expand, [nome for nome in todos if nome in relacoes], "expand")
+    pedidos.add("id")
+    return tuple(nome for nome in todos if nome in pedidos)
+
+
+def linha_confiavel(modelo: Type[BaseModel], objeto: Any, campos: Optional[Tuple[str, ...]] = None) -> dict:
+    """
+    Os campos de `modelo` (ou só `campos`) lidos de `objeto` (linha do ORM),
+    sem validação. Datas e enums ficam como estão; a serialização cuida deles.
+    """
+    valores = {}
+    for nome, aninhado, lista in _campos(modelo):
+        if campos is not None and nome not in campos:
+            continue
+        valor = getattr(objeto, nome)
+        if aninhado is not None and valor is not None:
+            if lista:
+                valor = [linha_confiavel(aninhado, item) for item in valor]
+            else:
+                valor = linha_confiavel(aninhado, valor)
+        valores[nome] = valor
+    return valores
+
+
+def resposta_confiavel(conteudo: Any, response: Optional[Response] = None) -> RespostaSerializada:
+    """Resposta pronta com `conteudo`, levando os cabeçalhos e o status já definidos em `response`"""
+    resposta = RespostaSerializada(conteudo)
+    if response is not None:
+        if response.status_code:
+            resposta.status_code = response.status_code
+        resposta.headers.raw.extend(response.headers.raw)
+    return resposta
+
+
+def lista_confiavel(modelo: Type[BaseModel], linhas: List[Any], response: Optional[Response] = None,
+                    campos: Optional[Tuple[str, ...]] = None) -> RespostaSerializada:
+    """Resposta `List[modelo]` com as linhas do ORM"""
+    return resposta_confiavel([linha_confiavel(modelo, linha, campos) for linha in linhas], response)
+
+
+def pagina_confiavel(modelo: Type[BaseModel], linhas: List[Any], next_cursor: Optional[str],
+                     response: Optional[Response] = None,
+                     campos: Optional[Tuple[str, ...]] = None) -> RespostaSerializada:
+    """Resposta `PaginaCursor[modelo]` com as linhas do ORM"""
+    return resposta_confiavel({
+        "items": [linha_confiavel(modelo, linha, campos) for linha in linhas], "next_cursor": next_cursor
+    }, response)
@@ -0,0 +1,36 @@
+"""
+Tarefas periódicas executadas dentro do próprio processo da aplicação.
+
+Cada tarefa roda em uma thread (a lógica usa a API síncrona do banco) em
+intervalos fixos. O resultado de cada execução é gravado em
+`execucoes_tarefas`.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import insert, update
+
+from app.models.models import ExecucaoTarefa
+
+logger = logging.getLogger(__name__)
+
+
+def registrar_execucao(conn, nome: str, iniciada_em: datetime, duracao_ms: float, linhas: int) -> None:
+    """Grava (ou substitui) a última execução da tarefa `nome`"""
+    tabela = ExecucaoTarefa.__table__
+    valores = {"iniciada_em": iniciada_em, "duracao_ms": duracao_ms, "linhas_afetadas": linhas}
+    resultado = conn.execute(update(tabela).where(tabela.c.nome == nome).values(**valores))
+    if resultado.rowcount == 0:
+        conn.execute(insert(tabela).values(nome=nome, **valores))
+
+
+async def executar_periodicamente(nome: str, funcao: Callable[[], object], intervalo_segundos: float) -> None:
+    """Executa `funcao` na inicialização e a cada intervalo, até ser cancelada"""
+    while True:
+        try:
+            await asyncio.to_thread(funcao)
+        except Exception:
+            logger.exception("Falha na tarefa periódica %s", nome)
+        await asyncio.sleep(intervalo_segundos)
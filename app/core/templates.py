@@ -0,0 +1,116 @@
+"""
+Ambiente Jinja2 único da aplicação.
+
+Em desenvolvimento (padrão) cada renderização confere a data dos arquivos e
+recompila os templates alterados. Com `TEMPLATES_MODO_PRODUCAO=True`:
+
+- auto-reload desligado: depois de compilado, um template não é mais
+  conferido no disco;
+- cache de bytecode em disco (`TEMPLATES_CACHE_DIR`): workers novos e
+  reinícios carregam o código já compilado em vez de recompilar o template;
+- fragmentos em cache: trechos marcados com `{% fragmento "nome", arg... %}`
+  são renderizados uma vez por combinação de argumentos e reaproveitados.
+  Servem para partes que só dependem desses argumentos (navegação, cabeçalho,
+  rodapé); texto puro já é uma constante no código compilado e não ganha
+  nada com o cache.
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
+from jinja2.ext import Extension
+
+from app.core.assets import asset
+from app.core.cache import CacheLRU
+from app.core.config import JINJA2_FILTERS, settings
+from app.core.metrics import registrar_metricas
+
+DIRETORIO_TEMPLATES = Path(__file__).resolve().parent.parent / "templates"
+
+
+class FragmentosEmCache(Extension):
+    """`{% fragmento "nome", arg... %}...{% endfragmento %}`, ativo só no modo de produção"""
+
+    tags = {"fragmento"}
+
+    def __init__(self, environment: Environment):
+        super().__init__(environment)
+        environment.extend(fragmentos_em_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        argumentos = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            argumentos.append(parser.parse_expression())
+        corpo = parser.parse_statements(("name:endfragmento",), drop_needle=True)
+        # O template faz parte da chave: o mesmo nome pode ser usado em arquivos diferentes
+        chamada = self.call_method("_renderizar", [nodes.Const(parser.name), nodes.List(argumentos)])
+        return nodes.CallBlock(chamada, [], [], corpo).set_lineno(lineno)
+
+    def _renderizar(self, template: str, argumentos: list, caller) -> str:
+        cache: Optional[CacheLRU] = self.environment.fragmentos_em_cache
+        if cache is None:
+            return caller()
+        chave = (template, *argumentos)
+        fragmento = cache.obter(chave)
+        if fragmento is None:
+            fragmento = caller()
+            cache.definir(chave, fragmento)
+        return fragmento
+
+
+def criar_ambiente(modo_producao: bool = settings.TEMPLATES_MODO_PRODUCAO,
+                   diretorio_cache: Optional[str] = settings.TEMPLATES_CACHE_DIR) -> Environment:
+    """Monta o ambiente Jinja2 com os filtros e globais da aplicação"""
+    ambiente = Environment(
+        loader=FileSystemLoader(str(DIRETORIO_TEMPLATES)),
+        autoescape=True,
+        auto_reload=settings.TEMPLATES_AUTO_RELOAD and not modo_producao,
+        extensions=[FragmentosEmCache],
+    )
+    if modo_producao:
+        if diretorio_cache:
+            Path(diretorio_cache).mkdir(parents=True, exist_ok=True)
+        # Sem diretório configurado, o Jinja2 usa um diretório temporário do usuário
+        ambiente.bytecode_cache = FileSystemBytecodeCache(diretorio_cache)
+        ambiente.fragmentos_em_cache = CacheLRU(
+            max_itens=settings.TEMPLATES_FRAGMENTOS_MAX_ITENS, ttl=float("inf")
+        )
+
+    ambiente.filters.update(JINJA2_FILTERS)
+    ambiente.globals.update({
+        'settings': settings,
+        'tojson': json.dumps,
+        'asset': asset
+    })
+    return ambiente
+
+
+def precarregar_templates(ambiente: Environment) -> int:
+    """Compila (ou lê do cache de bytecode) todos os templates; retorna quantos"""
+    nomes = ambiente.list_templates(extensions=["html"])
+    for nome in nomes:
+        ambiente.get_template(nome)
+    return len(nomes)
+
+
+templates = Jinja2Templates(env=criar_ambiente())
+
+
+def _estatisticas() -> dict:
+    ambiente = templates.env
+    estatisticas = {
+        "modo_producao": settings.TEMPLATES_MODO_PRODUCAO,
+        "auto_reload": ambiente.auto_reload,
+        "cache_bytecode": ambiente.bytecode_cache is not None,
+        "templates_compilados": len(ambiente.cache) if ambiente.cache is not None else 0,
+    }
+    fragmentos = ambiente.fragmentos_em_cache
+    if fragmentos is not None:
+        estatisticas["fragmentos"] = fragmentos.estatisticas()
+    return estatisticas
+
+
+registrar_metricas("templates", _estatisticas)
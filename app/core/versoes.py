@@ -0,0 +1,189 @@
+"""
+Versões do catálogo para requisições condicionais (ETag / Last-Modified).
+
+Cada coleção (`livros`, `autores`, `editoras`, `categorias`) e cada entidade
+alterada ou removida (`livros:42`) tem um contador em `versoes_recursos`,
+incrementado por um listener `after_flush` na mesma transação da escrita.
+Os GETs do catálogo leem os contadores (busca por chave primária) antes da
+consulta e respondem 304 a um `If-None-Match` que já tem a versão atual,
+sem executar a consulta da lista.
+
+Escritas feitas com UPDATE/INSERT em massa (Core) não passam pelo listener;
+quem as faz deve chamar `registrar_alteracoes` explicitamente.
+
+As chaves alteradas por uma sessão são publicadas depois do commit para os
+interessados registrados com `ao_publicar_alteracoes` (ex.: o cache de
+respostas, que invalida as entradas com essas tags).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registrar_metricas
+from app.models.models import Autor, Categoria, Editora, Livro, VersaoRecurso
+
+RECURSOS = {Livro: "livros", Autor: "autores", Editora: "editoras", Categoria: "categorias"}
+
+# Chaves de que depende a representação de cada coleção (o livro traz autor,
+# editora e categorias embutidos)
+DEPENDENCIAS = {
+    "livros": ("livros", "autores", "editoras", "categorias"),
+    "autores": ("autores",),
+    "editoras": ("editoras",),
+}
+
+_respostas = {"304": 0, "200": 0}
+_ouvintes: List[Callable[[Set[str]], None]] = []
+
+CHAVES_PENDENTES = "versoes_alteradas"
+
+
+def chaves_do_recurso(recurso: str, entidade_id: Optional[int] = None) -> List[str]:
+    """Chaves de versão de que depende uma coleção ou uma entidade dela"""
+    chaves = list(DEPENDENCIAS[recurso])
+    if entidade_id is not None:
+        # A entidade não depende das outras do mesmo tipo
+        chaves[0] = f"{recurso}:{entidade_id}"
+    return chaves
+
+
+def versoes_atuais(conexao, chaves: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+    """Versão e data da última alteração das chaves que já foram alteradas"""
+    tabela = VersaoRecurso.__table__
+    consulta = select(tabela.c.chave, tabela.c.versao, tabela.c.atualizado_em).where(tabela.c.chave.in_(list(chaves)))
+    return {chave: (versao, atualizado_em) for chave, versao, atualizado_em in conexao.execute(consulta)}
+
+
+def ao_publicar_alteracoes(funcao: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Registra `funcao` para receber as chaves alteradas após cada commit"""
+    _ouvintes.append(funcao)
+    return funcao
+
+
+def publicar_alteracoes(chaves: Iterable[str]) -> None:
+    chaves = set(chaves)
+    if chaves:
+        for funcao in _ouvintes:
+            funcao(chaves)
+
+
+def registrar_alteracoes(conexao, chaves: Iterable[str]) -> None:
+    """
+    Incrementa (ou cria) a versão de cada chave na transação da conexão ou
+    sessão informada. Com uma sessão, as chaves são publicadas após o commit;
+    com uma conexão, quem faz o commit chama `publicar_alteracoes`.
+    """
+    agora = datetime.utcnow()
+    valores = [{"chave": chave, "versao": 1, "atualizado_em": agora} for chave in sorted(set(chaves))]
+    if not valores:
+        return
+
+    if isinstance(conexao, Session):
+        conexao.info.setdefault(CHAVES_PENDENTES, set()).update(chave["chave"] for chave in valores)
+        conexao = conexao.connection()
+
+    tabela = VersaoRecurso.__table__
+    insert = insert_postgresql if conexao.dialect.name == "postgresql" else insert_sqlite
+    comando = insert(tabela).values(valores)
+    conexao.execute(comando.on_conflict_do_update(
+        index_elements=[tabela.c.chave],
+        set_={"versao": tabela.c.versao + 1, "atualizado_em": comando.excluded.atualizado_em}
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _incrementar_versoes(session: Session, flush_context) -> None:
+    chaves = set()
+    for obj in session.new:
+        recurso = RECURSOS.get(type(obj))
+        if recurso:
+            chaves.add(recurso)
+
+    for obj in session.dirty:
+        recurso = RECURSOS.get(type(obj))
+        if recurso and session.is_modified(obj):
+            chaves.update((recurso, f"{recurso}:{obj.id}"))
+
+    for obj in session.deleted:
+        recurso = RECURSOS.get(type(obj))
+        if recurso:
+            chaves.update((recurso, f"{recurso}:{obj.id}"))
+
+    if chaves:
+        registrar_alteracoes(session, chaves)
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_apos_commit(session: Session) -> None:
+    publicar_alteracoes(session.info.pop(CHAVES_PENDENTES, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_apos_rollback(session: Session) -> None:
+    session.info.pop(CHAVES_PENDENTES, None)
+
+
+def _etag_conhecida(cabecalho: str, etag: str) -> bool:
+    """Comparação fraca (RFC 9110) com a lista do If-None-Match"""
+    if cabecalho.strip() == "*":
+        return True
+    atual = etag.removeprefix("W/")
+    return any(item.strip().removeprefix("W/") == atual for item in cabecalho.split(","))
+
+
+def _nao_modificado_desde(cabecalho: str, modificado: datetime) -> bool:
+    try:
+        referencia = parsedate_to_datetime(cabecalho)
+    except (TypeError, ValueError):
+        return False
+    if referencia.tzinfo is None:
+        referencia = referencia.replace(tzinfo=timezone.utc)
+    return modificado.replace(microsecond=0) <= referencia
+
+
+def cliente_atualizado(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """Se o cliente já tem a versão `etag` (If-None-Match ou, sem ele, If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_conhecida(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if not (if_modified_since and last_modified):
+        return False
+    return _nao_modificado_desde(if_modified_since, parsedate_to_datetime(last_modified))
+
+
+def resposta_condicional(request: Request, response: Response, db: Session, recurso: str,
+                         entidade_id: Optional[int] = None) -> Optional[Response]:
+    """
+    Define ETag, Last-Modified e Cache-Control de um GET do catálogo a partir
+    das versões atuais. Retorna uma resposta 304 se o cliente já tem essa
+    versão; caso contrário None, e o endpoint segue com a consulta.
+    """
+    chaves = chaves_do_recurso(recurso, entidade_id)
+    versoes = versoes_atuais(db, chaves)
+    etag = 'W/"' + "-".join(str(versoes.get(chave, (0, None))[0]) for chave in chaves) + '"'
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    datas = [atualizado_em for _, atualizado_em in versoes.values()]
+    if datas:
+        cabecalhos["Last-Modified"] = format_datetime(max(datas).replace(tzinfo=timezone.utc), usegmt=True)
+
+    if cliente_atualizado(request, etag, cabecalhos.get("Last-Modified")):
+        _respostas["304"] += 1
+        return Response(status_code=304, headers=cabecalhos)
+
+    _respostas["200"] += 1
+    response.headers.update(cabecalhos)
+    return None
+
+
+registrar_metricas("requisicoes_condicionais", lambda: {
+    "respostas_304": _respostas["304"],
+    "respostas_200": _respostas["200"],
+})
@@ -1,27 +1,90 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from pathlib import Path
-from app.core.database import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from app.core.database import get_async_db
+from app.core.replica import get_async_db_leitura
 from app.models import models
 from app.models.models import Emprestimo, UsuarioAuth
 from app.core.auth import get_current_user
+from app.core.circulacao import STATUS_EM_ABERTO
+from app.core.pagination import POR_PAGINA_PADRAO, PaginaNumerada
+from app.core.search import filtro_busca_livros
+from app.core.templates import templates
+from app.core.estatisticas import (
+    obter_estatisticas,
+    livros_populares,
+    emprestimos_recentes
+)
 
-# Configuração dos templates
-BASE_DIR = Path(__file__).resolve().parent.parent
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, "templates")))
 # Cria o router para as rotas do frontend
 frontend_router = APIRouter()
 
 # Alias para compatibilidade com código existente
 router = frontend_router
 
+# Colunas aceitas em ?ordem= nas listagens de livros (o id desempata)
+ORDENACOES_LIVROS = {
+    "titulo": models.Livro.titulo,
+    "ano": models.Livro.ano_publicacao,
+    "cadastro": models.Livro.data_cadastro,
+}
+
 # Função para verificar se o usuário é admin
 def is_admin(user: UsuarioAuth) -> bool:
     return user.is_admin
 
 
+def _filtro_status(valor: Optional[str]) -> Optional[models.StatusLivro]:
+    """Status de ?status=; valores desconhecidos são ignorados"""
+    return models.StatusLivro.__members__.get(valor or "")
+
+
+def _parametros_da_listagem(**parametros) -> dict:
+    """Parâmetros preservados nos links de página e de ordenação"""
+    return {nome: valor for nome, valor in parametros.items() if valor not in (None, "")}
+
+
+async def _pagina_de_livros(
+    db: AsyncSession,
+    condicoes: list,
+    total: int,
+    pagina: int,
+    por_pagina: int,
+    ordem: str,
+    direcao: str,
+    *opcoes
+) -> PaginaNumerada:
+    """Busca só os livros da página pedida, na ordem pedida"""
+    pagina = PaginaNumerada(total, pagina, por_pagina)
+    coluna = ORDENACOES_LIVROS.get(ordem, models.Livro.titulo)
+    ordenacao = [coluna.desc(), models.Livro.id.desc()] if direcao == "desc" else [coluna, models.Livro.id]
+    pagina.itens = (await db.execute(
+        select(models.Livro)
+        .options(*opcoes)
+        .where(*condicoes)
+        .order_by(*ordenacao)
+        .limit(pagina.por_pagina)
+        .offset(pagina.offset)
+    )).scalars().all()
+    return pagina
+
+
+async def _contagem_por_status(db: AsyncSession, condicao) -> dict:
+    """Quantidade de livros por status e o total, em uma consulta agregada"""
+    contagem = {status_livro.name: 0 for status_livro in models.StatusLivro}
+    contagem["total"] = 0
+    for status_livro, quantidade in await db.execute(
+        select(models.Livro.status, func.count()).where(condicao).group_by(models.Livro.status)
+    ):
+        if status_livro is not None:
+            contagem[status_livro.name] = quantidade
+        contagem["total"] += quantidade
+    return contagem
+
+
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("home.html", {"request": request})
@@ -29,12 +92,39 @@ async def home(request: Request):
 @router.get("/livros", response_class=HTMLResponse)
 async def listar_livros(
     request: Request,
-    db: Session = Depends(get_db)
+    pagina: int = 1,
+    por_pagina: int = POR_PAGINA_PADRAO,
+    ordem: str = "titulo",
+    direcao: str = "asc",
+    busca: Optional[str] = None,
+    status_livro: Optional[str] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_async_db_leitura)
 ):
-    livros = db.query(models.Livro).all()
+    # Filtros e contagem no banco; só a página pedida é carregada
+    condicoes = []
+    if busca and busca.strip():
+        condicoes.append(filtro_busca_livros(db, busca.strip()))
+    filtro_status = _filtro_status(status_livro)
+    if filtro_status:
+        condicoes.append(models.Livro.status == filtro_status)
+
+    total = (await db.execute(
+        select(func.count()).select_from(models.Livro).where(*condicoes)
+    )).scalar_one()
+    pagina_livros = await _pagina_de_livros(
+        db, condicoes, total, pagina, por_pagina, ordem, direcao, joinedload(models.Livro.autor)
+    )
     return templates.TemplateResponse(
         "livros/lista.html",
-        {"request": request, "livros": livros}
+        {
+            "request": request,
+            "pagina": pagina_livros,
+            "livros": pagina_livros.itens,
+            "parametros": _parametros_da_listagem(
+                busca=busca, status=filtro_status.name if filtro_status else None,
+                ordem=ordem, direcao=direcao, por_pagina=pagina_livros.por_pagina
+            )
+        }
     )
 
 @router.get("/livros/novo", response_class=HTMLResponse)
@@ -55,10 +145,14 @@ async def editar_livro(request: Request, livro_id: int):
 async def visualizar_livro(
     request: Request, 
     livro_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_leitura)
 ):
-    # Busca o livro pelo ID
-    livro = db.query(models.Livro).filter(models.Livro.id == livro_id).first()
+    # Busca o livro pelo ID (autor e editora são exibidos no template)
+    livro = (await db.execute(
+        select(models.Livro)
+        .options(joinedload(models.Livro.autor), joinedload(models.Livro.editora))
+        .where(models.Livro.id == livro_id)
+    )).scalars().first()
     if not livro:
         raise HTTPException(status_code=404, detail="Livro não encontrado")
         
@@ -73,7 +167,7 @@ async def visualizar_livro(
 
 # Rotas para Editoras (apenas admins)
 @router.get("/editoras", response_class=HTMLResponse)
-async def listar_editoras_page(request: Request, db: Session = Depends(get_db)):
+async def listar_editoras_page(request: Request):
     return templates.TemplateResponse(
         "editoras/lista.html",
         {"request": request}
@@ -97,15 +191,27 @@ async def editar_editora(request: Request, editora_id: int):
 async def visualizar_editora(
     request: Request, 
     editora_id: int, 
-    db: Session = Depends(get_db)
+    pagina: int = 1,
+    por_pagina: int = POR_PAGINA_PADRAO,
+    ordem: str = "titulo",
+    direcao: str = "asc",
+    status_livro: Optional[str] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_async_db_leitura)
 ):
     # Busca a editora pelo ID
-    editora = db.query(models.Editora).filter(models.Editora.id == editora_id).first()
+    editora = await db.get(models.Editora, editora_id)
     if not editora:
         raise HTTPException(status_code=404, detail="Editora não encontrada")
         
-    # Busca os livros da editora
-    livros = db.query(models.Livro).filter(models.Livro.editora_id == editora_id).all()
+    # Resumo por status em uma consulta agregada; a tabela traz só uma página
+    condicao = models.Livro.editora_id == editora_id
+    contagem = await _contagem_por_status(db, condicao)
+    filtro_status = _filtro_status(status_livro)
+    condicoes = [condicao] + ([models.Livro.status == filtro_status] if filtro_status else [])
+    pagina_livros = await _pagina_de_livros(
+        db, condicoes, contagem[filtro_status.name] if filtro_status else contagem["total"],
+        pagina, por_pagina, ordem, direcao, joinedload(models.Livro.autor)
+    )
     
     return templates.TemplateResponse(
         "editoras/detalhes.html",
@@ -113,7 +219,13 @@ async def visualizar_editora(
             "request": request, 
             "editora_id": editora_id,
             "editora": editora,
-            "livros": livros
+            "contagem": contagem,
+            "pagina": pagina_livros,
+            "livros": pagina_livros.itens,
+            "parametros": _parametros_da_listagem(
+                status=filtro_status.name if filtro_status else None,
+                ordem=ordem, direcao=direcao, por_pagina=pagina_livros.por_pagina
+            )
         }
     )
 
@@ -134,7 +246,7 @@ async def novo_emprestimo(request: Request):
 
 # Rotas para Autores
 @router.get("/autores", response_class=HTMLResponse)
-async def listar_autores(request: Request, db: Session = Depends(get_db)):
+async def listar_autores(request: Request):
     return templates.TemplateResponse(
         "autores/lista.html",
         {"request": request}
@@ -158,15 +270,28 @@ async def editar_autor(request: Request, autor_id: int):
 async def visualizar_autor(
     request: Request, 
     autor_id: int, 
-    db: Session = Depends(get_db)
+    pagina: int = 1,
+    por_pagina: int = POR_PAGINA_PADRAO,
+    ordem: str = "titulo",
+    direcao: str = "asc",
+    status_livro: Optional[str] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_async_db_leitura)
 ):
     # Busca o autor pelo ID
-    autor = db.query(models.Autor).filter(models.Autor.id == autor_id).first()
+    autor = await db.get(models.Autor, autor_id)
     if not autor:
         raise HTTPException(status_code=404, detail="Autor não encontrado")
         
-    # Busca os livros do autor
-    livros = db.query(models.Livro).filter(models.Livro.autor_id == autor_id).all()
+    # Resumo por status em uma consulta agregada; a tabela traz só uma
+    # página de livros (a editora é exibida na tabela)
+    condicao = models.Livro.autor_id == autor_id
+    contagem = await _contagem_por_status(db, condicao)
+    filtro_status = _filtro_status(status_livro)
+    condicoes = [condicao] + ([models.Livro.status == filtro_status] if filtro_status else [])
+    pagina_livros = await _pagina_de_livros(
+        db, condicoes, contagem[filtro_status.name] if filtro_status else contagem["total"],
+        pagina, por_pagina, ordem, direcao, joinedload(models.Livro.editora)
+    )
     
     return templates.TemplateResponse(
         "autores/detalhes.html",
@@ -174,7 +299,13 @@ async def visualizar_autor(
             "request": request, 
             "autor_id": autor_id,
             "autor": autor,
-            "livros": livros
+            "contagem": contagem,
+            "pagina": pagina_livros,
+            "livros": pagina_livros.itens,
+            "parametros": _parametros_da_listagem(
+                status=filtro_status.name if filtro_status else None,
+                ordem=ordem, direcao=direcao, por_pagina=pagina_livros.por_pagina
+            )
         }
     )
 
@@ -205,18 +336,20 @@ async def editar_usuario(request: Request, usuario_id: int):
 async def visualizar_usuario(
     request: Request, 
     usuario_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_leitura)
 ):
     # Busca o usuário pelo ID
-    usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+    usuario = await db.get(models.Usuario, usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    # Busca os empréstimos ativos do usuário
-    emprestimos = db.query(models.Emprestimo).filter(
-        models.Emprestimo.usuario_id == usuario_id,
-        models.Emprestimo.status == "ativo"
-    ).all()
+    # Busca os empréstimos em aberto do usuário (inclusive atrasados)
+    emprestimos = (await db.execute(
+        select(models.Emprestimo).where(
+            models.Emprestimo.usuario_id == usuario_id,
+            models.Emprestimo.status.in_(STATUS_EM_ABERTO)
+        )
+    )).scalars().all()
     
     return templates.TemplateResponse(
         "usuarios/detalhes.html",
@@ -250,71 +383,25 @@ async def register_page(request: Request):
         {"request": request}
     )
 
+def _montar_stats_dashboard(db: Session) -> dict:
+    # Contadores mantidos incrementalmente (ver app/core/estatisticas.py)
+    estatisticas = obter_estatisticas(db)
+    
+    return {
+        "total_livros": estatisticas.total_livros,
+        "emprestimos_ativos": estatisticas.emprestimos_ativos,
+        "emprestimos_atrasados": estatisticas.emprestimos_atrasados,
+        "usuarios_ativos": estatisticas.usuarios_ativos,
+        "livros_populares": livros_populares(db),
+        "emprestimos_recentes": emprestimos_recentes(db)
+    }
+
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db)):
+async def dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
-        # Calcular estatísticas reais do banco de dados
-        from app.models.models import Livro, Usuario, StatusEmprestimo
-        from datetime import datetime
-        
-        # Total de livros
-        total_livros = db.query(Livro).count()
-        
-        # Empréstimos ativos
-        emprestimos_ativos = db.query(Emprestimo).filter(
-            Emprestimo.status == StatusEmprestimo.ATIVO
-        ).count()
-        
-        # Empréstimos atrasados (data de devolução passou e ainda está ativo)
-        hoje = datetime.now().date()
-        emprestimos_atrasados = db.query(Emprestimo).filter(
-            Emprestimo.status == StatusEmprestimo.ATIVO,
-            Emprestimo.data_devolucao_prevista < hoje
-        ).count()
-        
-        # Usuários ativos
-        usuarios_ativos = db.query(Usuario).filter(Usuario.ativo == True).count()
-        
-        # Livros mais populares (versão simplificada e consistente)
-        from sqlalchemy import func
-        
-        # Buscar os primeiros 3 livros com seus autores (dados consistentes)
-        primeiros_livros = db.query(Livro, models.Autor).join(
-            models.Autor, Livro.autor_id == models.Autor.id
-        ).limit(3).all()
-        
-        # Criar lista com contagem real de empréstimos
-        livros_populares = []
-        for livro, autor in primeiros_livros:
-            # Contar empréstimos reais para este livro
-            total_emprestimos = db.query(Emprestimo).filter(
-                Emprestimo.livro_id == livro.id
-            ).count()
-            
-            livros_populares.append({
-                'titulo': livro.titulo,
-                'autor_nome': autor.nome,
-                'total_emprestimos': total_emprestimos
-            })
-        
-        # Empréstimos recentes (últimos 5)
-        emprestimos_recentes = db.query(Emprestimo).join(
-            Livro, Emprestimo.livro_id == Livro.id
-        ).join(
-            Usuario, Emprestimo.usuario_id == Usuario.id
-        ).order_by(
-            Emprestimo.data_emprestimo.desc()
-        ).limit(5).all()
-        
-        # Estatísticas para o template
-        stats = {
-            "total_livros": total_livros,
-            "emprestimos_ativos": emprestimos_ativos,
-            "emprestimos_atrasados": emprestimos_atrasados,
-            "usuarios_ativos": usuarios_ativos,
-            "livros_populares": livros_populares,
-            "emprestimos_recentes": emprestimos_recentes
-        }
+        # Os helpers de estatísticas usam a API síncrona; run_sync os executa
+        # sobre a conexão assíncrona sem bloquear o event loop
+        stats = await db.run_sync(_montar_stats_dashboard)
         
     except Exception as e:
         # Em caso de erro, usar valores padrão
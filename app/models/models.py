@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, DateTime, Float, Text, Enum
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, DateTime, Float, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from enum import Enum as PyEnum
@@ -62,6 +62,11 @@ class Categoria(Base):
 
 class Livro(Base):
     __tablename__ = "livros"
+    __table_args__ = (
+        # Páginas de autor e editora: livros em ordem alfabética, paginados
+        Index("ix_livros_autor_titulo", "autor_id", "titulo"),
+        Index("ix_livros_editora_titulo", "editora_id", "titulo"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(200), index=True, nullable=False)
@@ -75,9 +80,11 @@ class Livro(Base):
     sinopse = Column(Text)
     genero = Column(String(50), nullable=True)  # Campo para compatibilidade com rotas existentes
     idioma = Column(String(20), default="Português")
-    status = Column(Enum(StatusLivro), default=StatusLivro.DISPONIVEL)
+    status = Column(Enum(StatusLivro), default=StatusLivro.DISPONIVEL, index=True)
     capa_url = Column(String(255), nullable=True)
     data_cadastro = Column(DateTime, default=datetime.utcnow)
+    # Também preenchido em UPDATEs via Core (`onupdate`); usado pelo `since` da exportação
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     autor = relationship("Autor", back_populates="livros")
     editora = relationship("Editora", back_populates="livros")
@@ -99,6 +106,7 @@ class Usuario(Base):
     endereco = Column(Text)
     data_nascimento = Column(Date)
     data_cadastro = Column(DateTime, default=datetime.utcnow)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     ativo = Column(Boolean, default=True)
     
     emprestimos = relationship("Emprestimo", back_populates="usuario")
@@ -106,6 +114,24 @@ class Usuario(Base):
 
 class Emprestimo(Base):
     __tablename__ = "emprestimos"
+    __table_args__ = (
+        # Verificação de empréstimo duplicado e listagens por usuário
+        Index("ix_emprestimos_usuario_livro_status", "usuario_id", "livro_id", "status"),
+        # Contagem de atrasados (status + prazo vencido)
+        Index("ix_emprestimos_status_prevista", "status", "data_devolucao_prevista"),
+        # Único parcial: no máximo um empréstimo em aberto por livro
+        Index(
+            "ux_emprestimos_livro_em_aberto", "livro_id", unique=True,
+            sqlite_where=text("status IN ('ATIVO', 'ATRASADO')"),
+            postgresql_where=text("status IN ('ATIVO', 'ATRASADO')")
+        ),
+        # Parcial: listagem e contagem dos atrasados marcados pela varredura
+        Index(
+            "ix_emprestimos_atrasados", "data_devolucao_prevista",
+            sqlite_where=text("status = 'ATRASADO'"),
+            postgresql_where=text("status = 'ATRASADO'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
@@ -116,6 +142,7 @@ class Emprestimo(Base):
     status = Column(Enum(StatusEmprestimo), default=StatusEmprestimo.ATIVO)
     multa = Column(Float, default=0.0)
     observacoes = Column(Text, nullable=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     usuario = relationship("Usuario", back_populates="emprestimos")
     livro = relationship("Livro", back_populates="emprestimos")
@@ -143,13 +170,21 @@ class UsuarioAuth(Base):
 
 class SolicitacaoAutor(Base):
     __tablename__ = "solicitacoes_autores"
+    __table_args__ = (
+        # Parcial: fila de solicitações aguardando análise
+        Index(
+            "ix_solicitacoes_autores_pendentes", "data_solicitacao",
+            sqlite_where=text("status = 'PENDENTE'"),
+            postgresql_where=text("status = 'PENDENTE'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(100), nullable=False)
     nacionalidade = Column(String(50))
     data_nascimento = Column(Date)
     biografia = Column(Text, nullable=True)
-    status = Column(Enum(StatusSolicitacao), default=StatusSolicitacao.PENDENTE, nullable=False)
+    status = Column(Enum(StatusSolicitacao), default=StatusSolicitacao.PENDENTE, nullable=False, index=True)
     solicitante_id = Column(Integer, ForeignKey("usuarios_auth.id"), nullable=False)
     data_solicitacao = Column(DateTime, default=datetime.utcnow)
     data_aprovacao = Column(DateTime, nullable=True)
@@ -165,9 +200,30 @@ class StatusReserva(str, PyEnum):
     ATIVA = "ativa"
     CANCELADA = "cancelada"
     CONCLUIDA = "concluida"
+    EXPIRADA = "expirada"
 
 class Reserva(Base):
     __tablename__ = "reservas"
+    __table_args__ = (
+        # Reservas do usuário por livro e status
+        Index("ix_reservas_usuario_livro_status", "usuario_id", "livro_id", "status"),
+        # Único parcial: no máximo uma reserva em aberto por usuário e livro
+        Index(
+            "ux_reservas_usuario_livro_em_aberto", "usuario_id", "livro_id", unique=True,
+            sqlite_where=text("status IN ('PENDENTE', 'ATIVA')"),
+            postgresql_where=text("status IN ('PENDENTE', 'ATIVA')")
+        ),
+        # Fila de cada livro: cabeça, cauda e posição são buscas no índice
+        Index("ix_reservas_fila", "livro_id", "status", "posicao"),
+        # Único parcial: duas reservas pendentes nunca ficam com a mesma senha
+        Index(
+            "ux_reservas_fila_posicao", "livro_id", "posicao", unique=True,
+            sqlite_where=text("status = 'PENDENTE'"),
+            postgresql_where=text("status = 'PENDENTE'")
+        ),
+        # Expiração das reservas ativas não retiradas
+        Index("ix_reservas_status_validade", "status", "data_validade"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
@@ -175,6 +231,44 @@ class Reserva(Base):
     data_reserva = Column(DateTime, default=datetime.utcnow)
     status = Column(Enum(StatusReserva), default=StatusReserva.PENDENTE)
     data_validade = Column(DateTime, nullable=True)
+    # Senha na fila do livro; as pendentes de um livro são sempre consecutivas
+    posicao = Column(Integer, nullable=True)
 
     usuario = relationship("Usuario", back_populates="reservas")
     livro = relationship("Livro", back_populates="reservas")
+
+class EstatisticasCirculacao(Base):
+    """Contadores do dashboard, mantidos incrementalmente a cada escrita (linha única)"""
+    __tablename__ = "estatisticas_circulacao"
+
+    id = Column(Integer, primary_key=True)
+    total_livros = Column(Integer, default=0, nullable=False)
+    total_emprestimos = Column(Integer, default=0, nullable=False)
+    emprestimos_ativos = Column(Integer, default=0, nullable=False)
+    emprestimos_atrasados = Column(Integer, default=0, nullable=False)
+    usuarios_ativos = Column(Integer, default=0, nullable=False)
+    atualizado_em = Column(DateTime, default=datetime.utcnow)
+
+class ExecucaoTarefa(Base):
+    """Última execução de cada tarefa agendada (ex.: varredura de atrasos)"""
+    __tablename__ = "execucoes_tarefas"
+
+    nome = Column(String(50), primary_key=True)
+    iniciada_em = Column(DateTime, nullable=False)
+    duracao_ms = Column(Float, nullable=False)
+    linhas_afetadas = Column(Integer, default=0, nullable=False)
+
+class VersaoRecurso(Base):
+    """Versão de uma coleção (`livros`) ou entidade (`livros:42`) do catálogo, para ETags"""
+    __tablename__ = "versoes_recursos"
+
+    chave = Column(String(60), primary_key=True)
+    versao = Column(Integer, default=1, nullable=False)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class EstatisticaLivro(Base):
+    """Total de empréstimos por livro, usado no ranking de livros populares"""
+    __tablename__ = "estatisticas_livros"
+
+    livro_id = Column(Integer, ForeignKey("livros.id"), primary_key=True)
+    total_emprestimos = Column(Integer, default=0, nullable=False, index=True)
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class LivroPopular(BaseModel):
+    livro_id: int
+    titulo: str
+    autor_nome: Optional[str] = None
+    total_emprestimos: int
+
+class Estatisticas(BaseModel):
+    total_livros: int
+    total_emprestimos: int
+    emprestimos_ativos: int
+    emprestimos_atrasados: int
+    usuarios_ativos: int
+    livros_populares: List[LivroPopular] = []
+    atualizado_em: Optional[datetime] = None
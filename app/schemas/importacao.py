@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.schemas.book import LivroBase
+
+class LinhaImportacaoLivro(LivroBase):
+    """Linha do arquivo de importação: autor/editora por id ou por nome"""
+    autor_id: Optional[int] = Field(None, gt=0)
+    autor: Optional[str] = Field(None, max_length=100, example="Machado de Assis")
+    editora: Optional[str] = Field(None, max_length=100, example="Companhia das Letras")
+
+class ErroImportacao(BaseModel):
+    linha: int
+    isbn: Optional[str] = None
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    linhas_lidas: int
+    livros_inseridos: int
+    autores_criados: int
+    editoras_criadas: int
+    total_erros: int
+    erros: List[ErroImportacao] = []
+    duracao_segundos: float
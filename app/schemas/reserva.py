@@ -18,6 +18,12 @@ class Reserva(ReservaBase):
     data_reserva: datetime
     status: StatusReserva
     data_validade: Optional[datetime] = None
+    # Só para reservas pendentes: 1 = próxima a ser atendida
+    posicao_fila: Optional[int] = None
+
+    # Dados relacionados
+    livro_titulo: Optional[str] = None
+    usuario_nome: Optional[str] = None
 
     class Config:
         from_attributes = True
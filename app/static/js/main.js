@@ -32,6 +32,31 @@ function formatarTelefone(telefone) {
     return telefone;
 }
 
+/**
+ * Aplica uma máscara de digitação aos campos (substitui o plugin jquery.mask)
+ * @param {string} seletor - Seletor CSS dos campos
+ * @param {string} mascara - Máscara em que cada '0' é um dígito, ex.: 000.000.000-00
+ */
+function aplicarMascara(seletor, mascara) {
+    const formatar = (valor) => {
+        const digitos = valor.replace(/\D/g, '');
+        let resultado = '';
+        let i = 0;
+        for (const simbolo of mascara) {
+            if (i >= digitos.length) break;
+            resultado += simbolo === '0' ? digitos[i++] : simbolo;
+        }
+        return resultado;
+    };
+
+    document.querySelectorAll(seletor).forEach(campo => {
+        campo.maxLength = mascara.length;
+        campo.addEventListener('input', () => {
+            campo.value = formatar(campo.value);
+        });
+    });
+}
+
 /**
  * Função para formatar data
  * @param {string} dataString - Data no formato ISO (YYYY-MM-DD)
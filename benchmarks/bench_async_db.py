@@ -0,0 +1,116 @@
+"""
+Benchmark: sessão síncrona vs AsyncSession dentro de handlers `async def`.
+
+Monta duas rotas equivalentes sobre o banco configurado, cada uma executando
+uma consulta lenta (CTE recursiva), e dispara N requisições concorrentes
+contra cada uma. Enquanto a carga roda, uma rota trivial (`/ping`) é sondada
+a cada 10 ms: com a sessão síncrona a consulta bloqueia o event loop e o
+ping espera a consulta terminar; com a AsyncSession ele responde na hora.
+Em máquinas com vários núcleos a vazão da rota lenta também cresce, pois o
+SQLite libera o GIL durante a execução da consulta.
+
+Uso:
+    python benchmarks/bench_async_db.py [--requisicoes 50] [--concorrencia 10] [--linhas 200000]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import async_engine, get_async_db, get_db
+
+CONSULTA_LENTA = text(
+    "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :linhas) "
+    "SELECT count(*) FROM seq"
+)
+
+
+def montar_app(linhas: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def rota_sync(db: Session = Depends(get_db)):
+        return {"total": db.execute(CONSULTA_LENTA, {"linhas": linhas}).scalar()}
+
+    @app.get("/async")
+    async def rota_async(db: AsyncSession = Depends(get_async_db)):
+        return {"total": (await db.execute(CONSULTA_LENTA, {"linhas": linhas})).scalar()}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def medir(cliente: httpx.AsyncClient, rota: str, requisicoes: int, concorrencia: int) -> dict:
+    limite = asyncio.Semaphore(concorrencia)
+    latencias = []
+
+    async def uma():
+        async with limite:
+            inicio = time.perf_counter()
+            resposta = await cliente.get(rota)
+            resposta.raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+
+    pings = []
+    terminou = asyncio.Event()
+
+    async def sondar():
+        # Mede do instante em que o ping deveria sair até a resposta, o que
+        # inclui o tempo em que o event loop ficou bloqueado
+        while not terminou.is_set():
+            previsto = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            await cliente.get("/ping")
+            pings.append(time.perf_counter() - previsto)
+
+    sonda = asyncio.create_task(sondar())
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma() for _ in range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+    terminou.set()
+    await sonda
+
+    return {
+        "rota": rota,
+        "req/s": round(requisicoes / duracao, 1),
+        "p50 (ms)": _percentil(latencias, 0.50),
+        "p95 (ms)": _percentil(latencias, 0.95),
+        "ping p95 (ms)": _percentil(pings, 0.95),
+        "ping max (ms)": _percentil(pings, 1.0),
+    }
+
+
+def _percentil(valores: list, fracao: float) -> float:
+    valores = sorted(valores)
+    indice = min(len(valores) - 1, int(len(valores) * fracao))
+    return round(valores[indice] * 1000, 1)
+
+
+async def main(requisicoes: int, concorrencia: int, linhas: int) -> None:
+    transporte = httpx.ASGITransport(app=montar_app(linhas))
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        # Aquecimento (abre conexões e a thread do aiosqlite)
+        await cliente.get("/sync")
+        await cliente.get("/async")
+
+        for rota in ("/sync", "/async"):
+            print(await medir(cliente, rota, requisicoes, concorrencia))
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requisicoes", type=int, default=50)
+    parser.add_argument("--concorrencia", type=int, default=10)
+    parser.add_argument("--linhas", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requisicoes, args.concorrencia, args.linhas))
@@ -0,0 +1,111 @@
+"""
+Benchmark: GETs do catálogo com e sem o cache de respostas.
+
+Popula um banco SQLite temporário e dispara uma carga de leitura (lista de
+livros com variações de página e busca, e detalhes de livros) com uma
+escrita a cada `--escrita-a-cada` leituras, que invalida parte do cache.
+Compara requisições/s e taxa de acerto em três modos:
+
+    - sem cache
+    - memoria: `BackendMemoria` do processo (gerações lidas em `versoes_recursos`)
+    - chave-valor: `BackendChaveValor` sobre um cliente falso local com a
+      API do redis-py (mede o custo de serialização e das chamadas, sem rede)
+
+Uso:
+    python benchmarks/bench_cache_respostas.py [--requisicoes 3000] [--livros 500] [--escrita-a-cada 50]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+DIRETORIO = tempfile.mkdtemp(prefix="bench-cache-")
+# Antes de importar a aplicação: o banco e o cache são configurados no import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'bench.db')}"
+os.environ.setdefault("CACHE_RESPOSTAS_BACKEND", "memoria")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core import cache_respostas as modulo_cache  # noqa: E402
+from app.core.auth import require_admin  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.core.migracoes import atualizar_esquema  # noqa: E402
+from app.models.models import Autor, Editora, Livro, UsuarioAuth  # noqa: E402
+from main import app  # noqa: E402
+from tests.cliente_falso import ClienteFalso  # noqa: E402
+
+
+def popular(livros: int) -> None:
+    atualizar_esquema(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Autor.__table__), [{"id": i, "nome": f"Autor {i}"} for i in range(1, 51)])
+        conn.execute(insert(Editora.__table__), [{"id": i, "nome": f"Editora {i}"} for i in range(1, 21)])
+        conn.execute(insert(Livro.__table__), [
+            {"id": i, "titulo": f"Livro {i}", "isbn": str(9780000000000 + i),
+             "autor_id": i % 50 + 1, "editora_id": i % 20 + 1}
+            for i in range(1, livros + 1)
+        ])
+
+
+def roteiro(args) -> list:
+    sorteio = random.Random(42)
+    urls = []
+    for i in range(args.requisicoes):
+        if i and i % args.escrita_a_cada == 0:
+            urls.append(("PUT", sorteio.randint(1, args.livros)))
+            continue
+        tipo = sorteio.random()
+        if tipo < 0.4:
+            urls.append(("GET", f"/api/v1/livros/?skip={sorteio.randint(0, 4) * 20}&limit=20"))
+        elif tipo < 0.5:
+            urls.append(("GET", f"/api/v1/livros/?search=Livro {sorteio.randint(1, 9)}"))
+        else:
+            # Detalhes concentrados em poucos livros populares
+            urls.append(("GET", f"/api/v1/livros/{int(sorteio.paretovariate(1.2)) % args.livros + 1}"))
+    return urls
+
+
+def medir(nome: str, cache, cliente: TestClient, urls: list) -> dict:
+    modulo_cache.cache_respostas = cache
+    inicio = time.perf_counter()
+    for i, (metodo, alvo) in enumerate(urls):
+        if metodo == "PUT":
+            # Título único por modo: a escrita sempre altera o livro
+            titulo = f"Livro {alvo} ({nome} {i})"
+            cliente.put(f"/api/v1/livros/{alvo}", json={"titulo": titulo}).raise_for_status()
+        else:
+            cliente.get(alvo).raise_for_status()
+    duracao = time.perf_counter() - inicio
+    resultado = {"modo": nome, "requisições/s": round(len(urls) / duracao)}
+    if cache is not None:
+        estatisticas = cache.estatisticas()
+        resultado.update(taxa_acerto=estatisticas["taxa_acerto"], invalidacoes=estatisticas["invalidacoes"])
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requisicoes", type=int, default=3000)
+    parser.add_argument("--livros", type=int, default=500)
+    parser.add_argument("--escrita-a-cada", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        popular(args.livros)
+        app.dependency_overrides[require_admin] = lambda: UsuarioAuth(
+            id=1, is_admin=True, matricula="BENCH", nome="Bench", email="bench@bench"
+        )
+        urls = roteiro(args)
+        ttl = 300
+        with TestClient(app) as cliente:
+            print(medir("sem cache", None, cliente, urls))
+            print(medir("memoria", modulo_cache.CacheRespostas(modulo_cache.BackendMemoria(4096, ttl), ttl), cliente, urls))
+            print(medir("chave-valor", modulo_cache.CacheRespostas(
+                modulo_cache.BackendChaveValor(ClienteFalso()), ttl
+            ), cliente, urls))
+    finally:
+        engine.dispose()
+        shutil.rmtree(DIRETORIO, ignore_errors=True)
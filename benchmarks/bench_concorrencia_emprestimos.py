@@ -0,0 +1,186 @@
+"""
+Benchmark: retirada de livros e reservas sob concorrência.
+
+Várias threads disputam os mesmos livros em um banco SQLite temporário com
+o esquema das migrações. Cada modo mede a vazão (tentativas/s) e conta as
+duplicatas que sobraram no banco:
+
+    - ler-conferir-gravar: o fluxo antigo (SELECT do status, SELECT do
+      empréstimo/reserva existente, depois a escrita), sem os índices únicos
+    - update condicional: `retirar_livros` (UPDATE ... WHERE status =
+      'DISPONIVEL' com conferência das linhas alteradas; a leitura prévia só
+      recusa cedo) e, nas reservas, o INSERT barrado pelo índice único parcial
+
+Uso:
+    python benchmarks/bench_concorrencia_emprestimos.py [--threads 8] [--tentativas 4000] [--livros 200]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.circulacao import STATUS_EM_ABERTO, retirar_livros
+from app.core.database import POOL_OPCOES, configurar_sqlite
+from app.core.fila_reservas import concluir_reservas, proxima_posicao
+from app.core.migracoes import atualizar_esquema
+from app.models.models import (
+    Autor,
+    Emprestimo,
+    Livro,
+    Reserva,
+    StatusLivro,
+    StatusReserva,
+    Usuario,
+)
+
+USUARIOS = 50
+
+
+def criar_engine(diretorio: str, livros: int, emprestados: bool, sem_indices_unicos: bool):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(diretorio, 'bench.db')}",
+        connect_args={"check_same_thread": False},
+        **POOL_OPCOES
+    )
+    configurar_sqlite(engine)
+    atualizar_esquema(engine)
+    status = StatusLivro.EMPRESTADO if emprestados else StatusLivro.DISPONIVEL
+    with engine.begin() as conn:
+        if sem_indices_unicos:
+            conn.execute(text("DROP INDEX ux_emprestimos_livro_em_aberto"))
+            conn.execute(text("DROP INDEX ux_reservas_usuario_livro_em_aberto"))
+        conn.execute(insert(Autor.__table__).values(id=1, nome="Autor"))
+        conn.execute(insert(Livro.__table__), [
+            {"id": i, "titulo": f"Livro {i}", "isbn": str(9780000000000 + i), "autor_id": 1, "status": status}
+            for i in range(1, livros + 1)
+        ])
+        conn.execute(insert(Usuario.__table__), [
+            {"id": i, "nome": f"Usuário {i}", "email": f"u{i}@bench", "matricula": f"B{i}", "ativo": True}
+            for i in range(1, USUARIOS + 1)
+        ])
+    return engine
+
+
+def emprestar_lendo(db: Session, livro_id: int, usuario_id: int) -> bool:
+    livro = db.get(Livro, livro_id)
+    if livro.status != StatusLivro.DISPONIVEL:
+        return False
+    if db.query(Emprestimo.id).filter(
+        Emprestimo.usuario_id == usuario_id,
+        Emprestimo.livro_id == livro_id,
+        Emprestimo.status.in_(STATUS_EM_ABERTO)
+    ).first():
+        return False
+    livro.status = StatusLivro.EMPRESTADO
+    db.add(Emprestimo(usuario_id=usuario_id, livro_id=livro_id))
+    db.commit()
+    return True
+
+
+def emprestar_condicional(db: Session, livro_id: int, usuario_id: int) -> bool:
+    # Como o endpoint: a leitura só serve para recusar cedo, sem pegar o lock de escrita
+    if db.get(Livro, livro_id).status != StatusLivro.DISPONIVEL:
+        return False
+    if not retirar_livros(db, [livro_id], usuario_id):
+        db.rollback()
+        return False
+    concluir_reservas(db, [livro_id], usuario_id)
+    db.add(Emprestimo(usuario_id=usuario_id, livro_id=livro_id))
+    db.commit()
+    return True
+
+
+def reservar_lendo(db: Session, livro_id: int, usuario_id: int) -> bool:
+    if db.query(Reserva.id).filter(
+        Reserva.usuario_id == usuario_id,
+        Reserva.livro_id == livro_id,
+        Reserva.status.in_([StatusReserva.PENDENTE, StatusReserva.ATIVA])
+    ).first():
+        return False
+    db.add(Reserva(usuario_id=usuario_id, livro_id=livro_id, posicao=proxima_posicao(livro_id)))
+    db.commit()
+    return True
+
+
+def reservar_condicional(db: Session, livro_id: int, usuario_id: int) -> bool:
+    db.add(Reserva(usuario_id=usuario_id, livro_id=livro_id, posicao=proxima_posicao(livro_id)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def duplicatas_emprestimos(db: Session) -> int:
+    abertos = db.query(Emprestimo.livro_id).filter(Emprestimo.status.in_(STATUS_EM_ABERTO))
+    return abertos.count() - abertos.distinct().count()
+
+
+def duplicatas_reservas(db: Session) -> int:
+    abertas = db.query(Reserva.usuario_id, Reserva.livro_id).filter(
+        Reserva.status.in_([StatusReserva.PENDENTE, StatusReserva.ATIVA])
+    )
+    return abertas.count() - abertas.distinct().count()
+
+
+def medir(nome: str, operacao, duplicatas, args, emprestados: bool, sem_indices_unicos: bool) -> dict:
+    diretorio = tempfile.mkdtemp(prefix="bench-concorrencia-")
+    engine = criar_engine(diretorio, args.livros, emprestados, sem_indices_unicos)
+    sorteio = random.Random(42)
+    tentativas = [
+        (sorteio.randint(1, args.livros), sorteio.randint(1, USUARIOS)) for _ in range(args.tentativas)
+    ]
+    bloqueios = 0
+
+    def executar(parte):
+        nonlocal bloqueios
+        sucessos = 0
+        for livro_id, usuario_id in parte:
+            with Session(engine, autoflush=False) as db:
+                try:
+                    sucessos += operacao(db, livro_id, usuario_id)
+                except OperationalError:
+                    bloqueios += 1
+        return sucessos
+
+    partes = [tentativas[i::args.threads] for i in range(args.threads)]
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as executor:
+            sucessos = sum(executor.map(executar, partes))
+        duracao = time.perf_counter() - inicio
+        with Session(engine) as db:
+            repetidas = duplicatas(db)
+    finally:
+        engine.dispose()
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return {
+        "modo": nome,
+        "tentativas/s": round(args.tentativas / duracao),
+        "sucessos": sucessos,
+        "duplicatas": repetidas,
+        "erros de bloqueio": bloqueios,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--tentativas", type=int, default=4000)
+    parser.add_argument("--livros", type=int, default=200)
+    args = parser.parse_args()
+
+    print("empréstimos")
+    print(medir("ler-conferir-gravar", emprestar_lendo, duplicatas_emprestimos, args, False, True))
+    print(medir("update condicional", emprestar_condicional, duplicatas_emprestimos, args, False, False))
+    print("reservas")
+    print(medir("ler-conferir-gravar", reservar_lendo, duplicatas_reservas, args, True, True))
+    print(medir("índice único", reservar_condicional, duplicatas_reservas, args, True, False))
@@ -0,0 +1,101 @@
+"""
+Benchmark: importação em massa em lotes vs cadastro linha a linha pelo ORM.
+
+Gera um CSV sintético (autores e editoras por nome, alguns repetidos) e o
+importa em um banco SQLite temporário com o esquema das migrações:
+
+    - orm: o que o endpoint de cadastro faz para cada livro (SELECT do autor,
+      SELECT do ISBN, session.add e commit), sobre uma amostra menor
+    - lotes: `importar_livros`, com consultas por conjunto, executemany e a
+      indexação FTS feita uma vez por lote
+
+Uso:
+    python benchmarks/bench_importacao.py [--linhas 200000] [--amostra-orm 5000] [--lote 5000]
+"""
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import POOL_OPCOES, configurar_sqlite
+from app.core.importacao import importar_livros, ler_csv
+from app.core.migracoes import atualizar_esquema
+from app.models.models import Autor, Editora, Livro
+
+
+def gerar_csv(linhas: int, inicio_isbn: int = 9780000000000) -> str:
+    saida = ["titulo,isbn,autor,editora,ano_publicacao,num_paginas,sinopse"]
+    for i in range(linhas):
+        saida.append(
+            f"Livro {i},{inicio_isbn + i},Autor {i % 5000},Editora {i % 300},"
+            f"{1900 + i % 120},{100 + i % 500},Sinopse do livro {i} sobre o assunto {i % 77}"
+        )
+    return "\n".join(saida) + "\n"
+
+
+def criar_engine(diretorio: str):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(diretorio, 'bench.db')}",
+        connect_args={"check_same_thread": False},
+        **POOL_OPCOES
+    )
+    configurar_sqlite(engine)
+    atualizar_esquema(engine)
+    return engine
+
+
+def importar_orm(engine, conteudo: str) -> None:
+    with Session(engine) as db:
+        for dados in ler_csv(io.StringIO(conteudo)):
+            autor = db.query(Autor).filter(Autor.nome == dados["autor"]).first()
+            if not autor:
+                autor = Autor(nome=dados["autor"])
+                db.add(autor)
+                db.flush()
+            editora = db.query(Editora).filter(Editora.nome == dados["editora"]).first()
+            if not editora:
+                editora = Editora(nome=dados["editora"])
+                db.add(editora)
+                db.flush()
+            if db.query(Livro).filter(Livro.isbn == dados["isbn"]).first():
+                continue
+            db.add(Livro(
+                titulo=dados["titulo"], isbn=dados["isbn"], autor_id=autor.id, editora_id=editora.id,
+                ano_publicacao=int(dados["ano_publicacao"]), num_paginas=int(dados["num_paginas"]),
+                sinopse=dados["sinopse"]
+            ))
+            db.commit()
+
+
+def medir(nome: str, linhas: int, funcao) -> dict:
+    diretorio = tempfile.mkdtemp(prefix="bench-importacao-")
+    engine = criar_engine(diretorio)
+    try:
+        inicio = time.perf_counter()
+        funcao(engine)
+        duracao = time.perf_counter() - inicio
+    finally:
+        engine.dispose()
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return {"modo": nome, "linhas": linhas, "segundos": round(duracao, 2), "linhas/s": round(linhas / duracao)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--amostra-orm", type=int, default=5000)
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    amostra = gerar_csv(args.amostra_orm)
+    print(medir("orm", args.amostra_orm, lambda engine: importar_orm(engine, amostra)))
+
+    conteudo = gerar_csv(args.linhas)
+    print(medir("lotes", args.linhas, lambda engine: importar_livros(
+        engine, ler_csv(io.StringIO(conteudo)), tamanho_lote=args.lote
+    )))
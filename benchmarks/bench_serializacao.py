@@ -0,0 +1,180 @@
+"""
+Benchmark: serialização das listagens da API, por endpoint.
+
+Popula um banco SQLite temporário, carrega as linhas de cada listagem uma
+vez (relacionamentos já carregados, para medir só a serialização) e compara
+o custo de gerar o corpo da resposta:
+
+    - response_model + json: caminho padrão do FastAPI (converte as linhas,
+      revalida contra o `response_model` e serializa com o `json` da stdlib)
+    - response_model + orjson: o mesmo, com `RespostaSerializada`
+    - confiável + orjson: só os campos do schema lidos das linhas, sem
+      validação (o caminho usado pelos endpoints de listagem)
+    - confiável + msgpack: o mesmo, para `Accept: application/msgpack`
+
+Uso:
+    python benchmarks/bench_serializacao.py [--repeticoes 50] [--linhas 500]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DIRETORIO = tempfile.mkdtemp(prefix="bench-serializacao-")
+# Antes de importar a aplicação: o banco é configurado no import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'bench.db')}"
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import joinedload, selectinload  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+from app.api.endpoints.editoras import EditoraResponse  # noqa: E402
+from app.api.endpoints.emprestimos import EmprestimoResponse, _dados_emprestimo  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.core.migracoes import atualizar_esquema  # noqa: E402
+from app.core.serializacao import RespostaSerializada, linha_confiavel, resposta_confiavel  # noqa: E402
+from app.models.models import (  # noqa: E402
+    Autor, Editora, Emprestimo, Livro, StatusEmprestimo, Usuario
+)
+from app.schemas.author import Autor as AutorSchema  # noqa: E402
+from app.schemas.book import Livro as LivroSchema  # noqa: E402
+from main import app  # noqa: E402
+
+SINOPSE = "Romance narrado em primeira pessoa, com reflexões sobre memória, ciúme e o passar do tempo. " * 4
+ACEITA_MSGPACK = Headers({"accept": "application/msgpack"})
+
+
+def popular(linhas: int) -> None:
+    atualizar_esquema(engine)
+    agora = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Autor.__table__), [
+            {"id": i, "nome": f"Autor {i}", "nacionalidade": "Brasileira", "biografia": SINOPSE}
+            for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(Editora.__table__), [
+            {"id": i, "nome": f"Editora {i}", "endereco": "São Paulo, SP", "email": f"contato{i}@editora.com"}
+            for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(Livro.__table__), [
+            {"id": i, "titulo": f"Livro {i}", "isbn": str(9780000000000 + i), "autor_id": i,
+             "editora_id": i, "sinopse": SINOPSE, "genero": "Romance", "ano_publicacao": 1900 + i % 120}
+            for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(Usuario.__table__), [
+            {"id": i, "nome": f"Usuário {i}", "email": f"u{i}@bench", "matricula": f"B{i:05d}"}
+            for i in range(1, 51)
+        ])
+        conn.execute(insert(Emprestimo.__table__), [
+            {"id": i, "usuario_id": i % 50 + 1, "livro_id": i, "data_emprestimo": agora,
+             "data_devolucao_prevista": agora + timedelta(days=14), "data_devolucao_real": agora + timedelta(days=7),
+             "status": StatusEmprestimo.DEVOLVIDO, "multa": 0.0}
+            for i in range(1, linhas + 1)
+        ])
+
+
+def campo_de_resposta(caminho: str):
+    """`response_field` do GET `caminho`, como o FastAPI usa para validar a resposta"""
+    for rota in app.routes:
+        if isinstance(rota, APIRoute) and rota.path == caminho and "GET" in rota.methods:
+            return rota.response_field
+    raise LookupError(caminho)
+
+
+def casos(db) -> list:
+    """(endpoint, conteúdo do caminho padrão, conteúdo do caminho confiável)"""
+    livros = db.query(Livro).options(
+        joinedload(Livro.autor), joinedload(Livro.editora), selectinload(Livro.categorias)
+    ).order_by(Livro.titulo).all()
+    autores = db.query(Autor).order_by(Autor.nome).all()
+    editoras = db.query(Editora).all()
+    emprestimos = db.query(Emprestimo).options(
+        joinedload(Emprestimo.usuario), joinedload(Emprestimo.livro).joinedload(Livro.autor)
+    ).all()
+    # Caminho anterior dos empréstimos: cada item validado ao montar e de novo pelo FastAPI
+    emprestimos_validados = lambda: [  # noqa: E731
+        EmprestimoResponse(**_dados_emprestimo(emprestimo)) for emprestimo in emprestimos
+    ]
+    return [
+        ("/api/v1/livros/", lambda: livros,
+         lambda: [linha_confiavel(LivroSchema, livro) for livro in livros]),
+        ("/api/v1/autores/", lambda: autores,
+         lambda: [linha_confiavel(AutorSchema, autor) for autor in autores]),
+        ("/api/v1/editoras/", lambda: editoras,
+         lambda: [linha_confiavel(EditoraResponse, editora) for editora in editoras]),
+        ("/api/v1/emprestimos/", emprestimos_validados,
+         lambda: [_dados_emprestimo(emprestimo) for emprestimo in emprestimos]),
+    ]
+
+
+async def caminho_padrao(campo, conteudo, classe) -> bytes:
+    dados = await serialize_response(field=campo, response_content=conteudo, is_coroutine=True)
+    return classe(dados).body
+
+
+def caminho_confiavel(conteudo, msgpack: bool) -> bytes:
+    resposta = resposta_confiavel(conteudo)
+    if msgpack:
+        resposta.negociar(ACEITA_MSGPACK)
+    return resposta.body
+
+
+async def medir(funcao, repeticoes: int) -> tuple:
+    """(ms por resposta, bytes do corpo)"""
+    corpo = await funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        await funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000, len(corpo)
+
+
+async def principal(args) -> None:
+    db = SessionLocal()
+    try:
+        print(f"{'endpoint':24} {'modo':26} {'ms/resposta':>11} {'bytes':>9} {'ganho':>6}")
+        for caminho, padrao, confiavel in casos(db):
+            campo = campo_de_resposta(caminho)
+
+            async def padrao_json():
+                return await caminho_padrao(campo, padrao(), JSONResponse)
+
+            async def padrao_orjson():
+                return await caminho_padrao(campo, padrao(), RespostaSerializada)
+
+            async def confiavel_orjson():
+                return caminho_confiavel(confiavel(), msgpack=False)
+
+            async def confiavel_msgpack():
+                return caminho_confiavel(confiavel(), msgpack=True)
+
+            base = None
+            for nome, funcao in (
+                ("response_model + json", padrao_json),
+                ("response_model + orjson", padrao_orjson),
+                ("confiável + orjson", confiavel_orjson),
+                ("confiável + msgpack", confiavel_msgpack),
+            ):
+                ms, tamanho = await medir(funcao, args.repeticoes)
+                base = base or ms
+                print(f"{caminho:24} {nome:26} {ms:11.2f} {tamanho:9} {base / ms:5.1f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=50)
+    parser.add_argument("--linhas", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        popular(args.linhas)
+        asyncio.run(principal(args))
+    finally:
+        engine.dispose()
+        shutil.rmtree(DIRETORIO, ignore_errors=True)
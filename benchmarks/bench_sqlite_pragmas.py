@@ -0,0 +1,112 @@
+"""
+Benchmark: leituras concorrentes durante escritas, SQLite "puro" vs perfil configurado.
+
+Para cada perfil cria um banco temporário com o acervo sintético, inicia uma
+thread escritora (inserções com commit a cada linha) e N threads leitoras
+(consultas de listagem) por alguns segundos. Reporta leituras/s, escritas/s
+e quantos "database is locked" ocorreram.
+
+    - padrao: engine como era antes (rollback journal, sem PRAGMAs)
+    - perfil: PRAGMAs de `Settings` (WAL, synchronous, mmap, cache, busy_timeout...)
+
+Uso:
+    python benchmarks/bench_sqlite_pragmas.py [--leitores 4] [--segundos 5] [--livros 20000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import POOL_OPCOES, configurar_sqlite
+
+CONSULTA_LEITURA = text(
+    "SELECT id, titulo FROM livros WHERE titulo >= :inicio ORDER BY titulo LIMIT 50"
+)
+
+
+def criar_banco(caminho: str, livros: int) -> None:
+    engine = create_engine(f"sqlite:///{caminho}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE livros (id INTEGER PRIMARY KEY, titulo TEXT NOT NULL)")
+        conn.exec_driver_sql("CREATE INDEX ix_livros_titulo ON livros (titulo)")
+        conn.execute(
+            text("INSERT INTO livros (titulo) VALUES (:titulo)"),
+            [{"titulo": f"Livro {i:07d}"} for i in range(livros)]
+        )
+    engine.dispose()
+
+
+def executar(perfil: str, leitores: int, segundos: float, livros: int) -> dict:
+    diretorio = tempfile.mkdtemp(prefix="bench-sqlite-")
+    caminho = os.path.join(diretorio, "bench.db")
+    criar_banco(caminho, livros)
+
+    if perfil == "padrao":
+        engine = create_engine(f"sqlite:///{caminho}", connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(
+            f"sqlite:///{caminho}", connect_args={"check_same_thread": False}, **POOL_OPCOES
+        )
+        configurar_sqlite(engine)
+
+    contadores = {"leituras": 0, "escritas": 0, "bloqueios": 0}
+    lock = threading.Lock()
+    fim = time.perf_counter() + segundos
+
+    def contar(chave: str) -> None:
+        with lock:
+            contadores[chave] += 1
+
+    def escritor():
+        i = 0
+        while time.perf_counter() < fim:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO livros (titulo) VALUES (:titulo)"), {"titulo": f"Novo {i}"})
+                contar("escritas")
+            except OperationalError:
+                contar("bloqueios")
+            i += 1
+
+    def leitor(semente: int):
+        i = semente
+        while time.perf_counter() < fim:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(CONSULTA_LEITURA, {"inicio": f"Livro {i % livros:07d}"}).all()
+                contar("leituras")
+            except OperationalError:
+                contar("bloqueios")
+            i += 7919
+
+    threads = [threading.Thread(target=escritor)]
+    threads += [threading.Thread(target=leitor, args=(n,)) for n in range(leitores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "perfil": perfil,
+        "leituras/s": round(contadores["leituras"] / segundos, 1),
+        "escritas/s": round(contadores["escritas"] / segundos, 1),
+        "database is locked": contadores["bloqueios"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leitores", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--livros", type=int, default=20000)
+    args = parser.parse_args()
+
+    for perfil in ("padrao", "perfil"):
+        print(executar(perfil, args.leitores, args.segundos, args.livros))
@@ -0,0 +1,140 @@
+"""
+Benchmark: compilação e renderização de cada template, desenvolvimento vs produção.
+
+Para cada template da aplicação mede:
+
+    - compilação: carregar o template em um ambiente novo (como um worker
+      recém-iniciado), sem cache de bytecode e com o cache de bytecode já
+      preenchido (`TEMPLATES_MODO_PRODUCAO`)
+    - renderização: `get_template` + `render` por requisição no ambiente de
+      desenvolvimento (auto-reload confere o arquivo a cada vez) e no de
+      produção (sem auto-reload, fragmentos em cache)
+
+O contexto é fictício (objetos em memória), então só o custo do Jinja2 é
+medido, sem banco.
+
+Uso:
+    python benchmarks/bench_templates.py [--repeticoes 300] [--template livros/lista.html]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from fastapi.templating import Jinja2Templates
+from starlette.requests import Request
+
+from app.core.pagination import PaginaNumerada
+from app.core.templates import criar_ambiente
+from app.models.models import StatusEmprestimo, StatusLivro
+from main import app
+
+
+def ambiente(**opcoes):
+    """Ambiente como o da aplicação, com o `url_for` do Starlette"""
+    return Jinja2Templates(env=criar_ambiente(**opcoes)).env
+
+
+def requisicao(caminho: str) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": caminho, "root_path": "", "scheme": "http",
+        "server": ("bench", 80), "query_string": b"", "headers": [], "app": app, "router": app.router,
+    })
+
+
+def contexto(nome: str) -> dict:
+    """Contexto com as variáveis usadas pelas páginas (as que sobram são ignoradas)"""
+    autor = SimpleNamespace(
+        id=1, nome="Machado de Assis", nacionalidade="Brasileira",
+        data_nascimento=date(1839, 6, 21), biografia="Escritor brasileiro."
+    )
+    editora = SimpleNamespace(
+        id=1, nome="Editora Exemplo", cidade="São Paulo", pais="Brasil",
+        telefone="(11) 0000-0000", email="contato@exemplo.com", website="https://exemplo.com"
+    )
+    livros = [
+        SimpleNamespace(
+            id=i, titulo=f"Livro {i}", subtitulo=None, autor=autor, editora=editora, isbn=str(9780000000000 + i),
+            edicao=1, ano_publicacao=1900 + i, num_paginas=200, sinopse="Sinopse.", genero="Romance",
+            idioma="Português", status=StatusLivro.DISPONIVEL if i % 3 else StatusLivro.EMPRESTADO,
+            capa_url=None, categorias=[], data_cadastro=datetime(2024, 1, 1)
+        )
+        for i in range(1, 21)
+    ]
+    pagina = PaginaNumerada(total=1000, pagina=3, por_pagina=20)
+    pagina.itens = livros
+    usuario = SimpleNamespace(
+        id=1, nome="Leitor", email="leitor@exemplo.com", matricula="A001", cpf=None, telefone=None,
+        endereco=None, curso="Letras", tipo="ALUNO", ativo=True, data_nascimento=date(2000, 1, 1),
+        data_cadastro=datetime(2024, 1, 1)
+    )
+    emprestimos = [
+        SimpleNamespace(
+            livro=livro, usuario=usuario, data_emprestimo=datetime(2024, 1, 1), status=StatusEmprestimo.ATIVO
+        )
+        for livro in livros[:5]
+    ]
+    secao = nome.split("/")[0] if "/" in nome else ""
+    return {
+        "request": requisicao(f"/{secao}"),
+        "livro": livros[0], "livro_id": 1, "autor": autor, "autor_id": 1, "editora": editora,
+        "editora_id": 1, "usuario": usuario, "usuario_id": 1, "emprestimos": emprestimos, "livros": livros, "pagina": pagina,
+        "parametros": {"ordem": "titulo", "direcao": "asc", "por_pagina": 20},
+        "contagem": {"total": 1000, "DISPONIVEL": 667, "EMPRESTADO": 333, "EM_MANUTENCAO": 0},
+        "stats": {
+            "total_livros": 1000, "emprestimos_ativos": 10, "emprestimos_atrasados": 2, "usuarios_ativos": 50,
+            "emprestimos_recentes": emprestimos,
+            "livros_populares": [
+                {"titulo": livro.titulo, "autor_nome": autor.nome, "total_emprestimos": 10} for livro in livros[:5]
+            ],
+        },
+    }
+
+
+def medir_compilacao(nome: str, repeticoes: int, diretorio_cache: str) -> tuple:
+    """ms para carregar o template em ambientes novos: sem e com cache de bytecode"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        ambiente(modo_producao=False).get_template(nome)
+    sem_cache = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    ambiente(modo_producao=True, diretorio_cache=diretorio_cache).get_template(nome)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        ambiente(modo_producao=True, diretorio_cache=diretorio_cache).get_template(nome)
+    com_cache = (time.perf_counter() - inicio) / repeticoes * 1000
+    return sem_cache, com_cache
+
+
+def medir_renderizacao(env, nome: str, repeticoes: int) -> float:
+    """Renderizações por segundo, buscando o template a cada vez como o TemplateResponse"""
+    dados = contexto(nome)
+    env.get_template(nome).render(dados)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        env.get_template(nome).render(dados)
+    return repeticoes / (time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=300)
+    parser.add_argument("--template", action="append", help="Limita a um ou mais templates")
+    args = parser.parse_args()
+
+    diretorio_cache = tempfile.mkdtemp(prefix="bench-templates-")
+    desenvolvimento = ambiente(modo_producao=False)
+    producao = ambiente(modo_producao=True, diretorio_cache=diretorio_cache)
+    nomes = args.template or desenvolvimento.list_templates(extensions=["html"])
+
+    print(f"{'template':32} {'compila ms':>10} {'bytecode ms':>11} {'dev rend/s':>11} {'prod rend/s':>12}")
+    try:
+        for nome in nomes:
+            sem_cache, com_cache = medir_compilacao(nome, max(args.repeticoes // 10, 5), diretorio_cache)
+            dev = medir_renderizacao(desenvolvimento, nome, args.repeticoes)
+            prod = medir_renderizacao(producao, nome, args.repeticoes)
+            print(f"{nome:32} {sem_cache:10.2f} {com_cache:11.2f} {dev:11.0f} {prod:12.0f}")
+    finally:
+        shutil.rmtree(diretorio_cache, ignore_errors=True)
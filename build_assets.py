@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+build_assets.py
+
+Gera os assets estáticos de produção em `app/static_build`: nomes com o hash
+do conteúdo, `manifest.json` usado pelos templates e variantes pré-comprimidas
+(.gz e, com o pacote `brotli` instalado, .br). Rode a cada deploy; sem o
+build, os arquivos de `app/static` são servidos como estão.
+
+Exemplo de uso:
+  python build_assets.py
+
+Observação: este script espera ser executado a partir da raiz do projeto (onde está o arquivo `main.py`).
+"""
+
+from app.core.assets import DIRETORIO_BUILD, construir_assets
+
+
+def main():
+    resumo = construir_assets()
+    print(f"✅ {resumo['arquivos']} arquivos gerados em {DIRETORIO_BUILD}")
+    print(f"   {resumo['variantes_comprimidas']} variantes comprimidas"
+          + ("" if resumo["brotli"] else " (sem brotli: instale o pacote para gerar .br)"))
+
+
+if __name__ == "__main__":
+    main()
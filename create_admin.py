@@ -13,7 +13,8 @@ Observação: este script espera ser executado a partir da raiz do projeto (onde
 
 import argparse
 import getpass
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal
+from app.core.migracoes import atualizar_esquema
 from app.core.auth import get_password_hash
 from app.models.models import UsuarioAuth
 
@@ -30,8 +31,8 @@ def parse_args():
 def main():
     args = parse_args()
 
-    # Garante que as tabelas existem
-    Base.metadata.create_all(bind=engine)
+    # Garante que as tabelas existem (migrações do Alembic)
+    atualizar_esquema()
 
     # Open DB session early so we can generate matricula if needed
     db = SessionLocal()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+importar_livros.py
+
+Importa livros em massa a partir de um arquivo CSV (com cabeçalho) ou JSONL.
+As colunas são as do cadastro de livros; o autor e a editora podem ser
+informados por id (`autor_id`, `editora_id`) ou por nome (`autor`, `editora`).
+
+Exemplo de uso:
+  python importar_livros.py acervo.csv
+  python importar_livros.py acervo.jsonl --lote 10000 --sem-criar-autores
+
+Observação: este script espera ser executado a partir da raiz do projeto (onde está o arquivo `main.py`).
+"""
+
+import argparse
+import sys
+from app.core.database import engine
+from app.core.importacao import LEITORES, TAMANHO_LOTE, formato_do_arquivo, importar_livros
+from app.core.migracoes import atualizar_esquema
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importar livros em massa (CSV ou JSONL)")
+    parser.add_argument("arquivo", help="Caminho do arquivo a importar")
+    parser.add_argument("--formato", choices=sorted(LEITORES), default=None, help="Formato do arquivo. Se omitido, é deduzido pela extensão")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help=f"Linhas por transação (padrão: {TAMANHO_LOTE})")
+    parser.add_argument("--sem-criar-autores", action="store_true", help="Rejeitar linhas com autor inexistente em vez de criá-lo")
+    parser.add_argument("--sem-criar-editoras", action="store_true", help="Rejeitar linhas com editora inexistente em vez de criá-la")
+    parser.add_argument("--mostrar-erros", type=int, default=20, help="Quantos erros listar ao final (padrão: 20)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    formato = args.formato or formato_do_arquivo(args.arquivo)
+    if formato is None:
+        print("Não foi possível deduzir o formato pela extensão; use --formato csv|jsonl")
+        sys.exit(1)
+
+    atualizar_esquema()
+
+    with open(args.arquivo, encoding="utf-8-sig", newline="") as arquivo:
+        resultado = importar_livros(
+            engine,
+            LEITORES[formato](arquivo),
+            tamanho_lote=args.lote,
+            criar_autores=not args.sem_criar_autores,
+            criar_editoras=not args.sem_criar_editoras
+        )
+
+    duracao = resultado["duracao_segundos"]
+    print(f"Linhas lidas: {resultado['linhas_lidas']}")
+    print(f"Livros inseridos: {resultado['livros_inseridos']}")
+    print(f"Autores criados: {resultado['autores_criados']}")
+    print(f"Editoras criadas: {resultado['editoras_criadas']}")
+    print(f"Erros: {resultado['total_erros']}")
+    if duracao:
+        print(f"Duração: {duracao:.2f}s ({resultado['linhas_lidas'] / duracao:.0f} linhas/s)")
+
+    for erro in resultado["erros"][:args.mostrar_erros]:
+        isbn = f" (ISBN {erro['isbn']})" if erro["isbn"] else ""
+        print(f"  linha {erro['linha']}{isbn}: {erro['erro']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,19 +10,20 @@ e recriar o banco do zero (útil quando o modelo foi alterado).
 import argparse
 from pathlib import Path
 
-from app.core.database import engine, SessionLocal, Base
+from app.core.database import SessionLocal
 from app.models.models import (
     Autor, Editora, Categoria, Livro, Usuario, UsuarioAuth,
     StatusLivro, TipoUsuario, LivroCategoria
 )
 from app.core.auth import get_password_hash
+from app.core.migracoes import atualizar_esquema
 from datetime import datetime, date
 import sys
 
 def create_tables():
-    """Cria todas as tabelas no banco de dados"""
-    print("Criando tabelas no banco de dados...")
-    Base.metadata.create_all(bind=engine)
+    """Cria/atualiza as tabelas aplicando as migrações do Alembic"""
+    print("Aplicando migrações no banco de dados...")
+    atualizar_esquema()
     print("✅ Tabelas criadas com sucesso!")
 
 def populate_initial_data():
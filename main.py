@@ -1,19 +1,28 @@
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-import json
+import asyncio
 
 from app.api.api import api_router
 from app.frontend.views import frontend_router
-from app.core.database import engine, Base
-from app.core.config import settings, JINJA2_FILTERS
-
-# Cria as tabelas do banco de dados
-Base.metadata.create_all(bind=engine)
+from app.core.database import async_engine
+from app.core.assets import ArquivosEstaticos
+from app.core.compressao import CompressaoRespostas
+from app.core.serializacao import RespostaSerializada
+from app.core.auth import pool_hash
+from app.core.atrasos import varrer_atrasos_periodicamente
+from app.core.fila_reservas import expirar_reservas_periodicamente
+from app.core.replica import (
+    REPLICA_SQLITE,
+    atualizar_replica_sqlite,
+    manter_replica_atualizada,
+    registrar_escritas,
+)
+from app.core.config import settings
+from app.core.templates import precarregar_templates, templates
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+# orjson, com MessagePack para `Accept: application/msgpack`
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, default_response_class=RespostaSerializada)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,21 +32,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-templates = Jinja2Templates(directory="app/templates")
-templates.env.auto_reload = settings.TEMPLATES_AUTO_RELOAD
+# Janela de read-your-writes da réplica de leitura
+app.middleware("http")(registrar_escritas)
 
-for name, function in JINJA2_FILTERS.items():
-    templates.env.filters[name] = function
-
-templates.env.globals.update({
-    'settings': settings,
-    'tojson': json.dumps
-})
+# Adicionado por último: envolve os demais e comprime a resposta final
+if settings.COMPRESSAO_ATIVA:
+    app.add_middleware(CompressaoRespostas)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 app.include_router(frontend_router)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Assets com hash e pré-comprimidos quando há build (python build_assets.py)
+app.mount("/static", ArquivosEstaticos(), name="static")
+
+@app.on_event("startup")
+async def iniciar_replica():
+    if REPLICA_SQLITE:
+        # Primeira cópia antes de atender leituras (ou a de outro worker, se
+        # recente); depois, atualização periódica
+        await asyncio.to_thread(atualizar_replica_sqlite, settings.REPLICA_REFRESH_SEGUNDOS / 2)
+        app.state.tarefa_replica = asyncio.create_task(manter_replica_atualizada())
+
+@app.on_event("startup")
+async def compilar_templates():
+    if settings.TEMPLATES_MODO_PRODUCAO:
+        # Compila (ou lê do cache de bytecode) antes da primeira requisição
+        await asyncio.to_thread(precarregar_templates, templates.env)
+
+@app.on_event("startup")
+async def iniciar_varredura_atrasos():
+    app.state.tarefa_atrasos = asyncio.create_task(varrer_atrasos_periodicamente())
+
+@app.on_event("startup")
+async def iniciar_expiracao_reservas():
+    app.state.tarefa_reservas = asyncio.create_task(expirar_reservas_periodicamente())
+
+@app.on_event("shutdown")
+async def fechar_conexoes():
+    # Encerra as tarefas de fundo, as conexões (e threads) do aiosqlite e o pool de hash
+    for nome in ("tarefa_replica", "tarefa_atrasos", "tarefa_reservas"):
+        tarefa = getattr(app.state, nome, None)
+        if tarefa is not None:
+            tarefa.cancel()
+    await async_engine.dispose()
+    pool_hash.encerrar()
 
 if __name__ == "__main__":
+    # O esquema é versionado pelo Alembic; em produção rode `alembic upgrade head`
+    from app.core.migracoes import atualizar_esquema
+    atualizar_esquema()
     uvicorn.run("main:app", host="0.0.0.0", port=8001, workers=1, reload=True, log_level="info")
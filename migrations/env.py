@@ -0,0 +1,72 @@
+"""
+Ambiente do Alembic.
+
+Usa o mesmo engine da aplicação (DATABASE_URL e PRAGMAs do SQLite) e o
+metadata dos modelos, para que `alembic revision --autogenerate` compare o
+banco com `app/models/models.py`.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.database import Base, SQLALCHEMY_DATABASE_URL, engine
+import app.models.models  # noqa: F401  (registra as tabelas no metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configurar_logging", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tabelas mantidas fora dos modelos (índice FTS5 e suas tabelas internas)
+TABELAS_IGNORADAS_PREFIXO = ("livros_fts",)
+
+
+def incluir_objeto(objeto, nome, tipo, reflected, compare_to):
+    if tipo == "table" and nome and nome.startswith(TABELAS_IGNORADAS_PREFIXO):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=incluir_objeto,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    conexao = config.attributes.get("connection")
+    if conexao is not None:
+        _executar(conexao)
+        return
+
+    with engine.connect() as conexao:
+        _executar(conexao)
+
+
+def _executar(conexao) -> None:
+    context.configure(
+        connection=conexao,
+        target_metadata=target_metadata,
+        # ALTER TABLE no SQLite é limitado; o modo batch recria a tabela
+        render_as_batch=True,
+        include_object=incluir_objeto,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,27 @@
+"""índice de busca FTS5 do acervo (somente SQLite)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 07:11:41.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.search import instalar_indice_busca, remover_indice_busca
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    instalar_indice_busca(op.get_bind())
+
+
+def downgrade() -> None:
+    remover_indice_busca(op.get_bind())
@@ -0,0 +1,23 @@
+"""Cliente chave-valor falso para o `BackendChaveValor` (testes e benchmark)"""
+import threading
+
+
+class ClienteFalso:
+    """Subconjunto da API do redis-py sobre um dicionário (sem expiração)"""
+
+    def __init__(self):
+        self.dados = {}
+        self.lock = threading.Lock()
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.dados[chave] = valor
+
+    def mget(self, chaves):
+        return [self.dados.get(chave) for chave in chaves]
+
+    def incr(self, chave):
+        with self.lock:
+            self.dados[chave] = str(int(self.dados.get(chave, 0)) + 1).encode()
@@ -0,0 +1,141 @@
+"""
+Fixtures dos testes: banco com o esquema das migrações, cliente HTTP
+autenticado como admin e contador de comandos SQL.
+
+O banco é um SQLite temporário, ou o de `TEST_DATABASE_URL` quando definida
+(ex.: um PostgreSQL local, para exercitar os upserts, os índices únicos
+parciais e o RETURNING nesse dialeto). Esse banco deve ser descartável: as
+tabelas são esvaziadas antes de cada teste. Testes marcados com `sqlite`
+(índice FTS5, réplica por cópia do arquivo) são pulados fora do SQLite.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+DIRETORIO = tempfile.mkdtemp(prefix="biblioteca-testes-")
+# Antes de importar a aplicação: o banco é configurado no import
+os.environ["DATABASE_URL"] = (
+    os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(DIRETORIO, 'testes.db')}"
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core import cache_respostas as modulo_cache  # noqa: E402
+from app.core import replica  # noqa: E402
+from app.core.auth import auth_cache, get_current_user, require_admin  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import USANDO_SQLITE, Base, SessionLocal, engine  # noqa: E402
+from app.core.migracoes import atualizar_esquema  # noqa: E402
+from app.models.models import UsuarioAuth  # noqa: E402
+from main import app  # noqa: E402
+
+ADMIN = UsuarioAuth(id=1, matricula="ADMIN", nome="Admin", email="admin@teste", is_admin=True)
+
+
+def pytest_collection_modifyitems(config, items):
+    if USANDO_SQLITE:
+        return
+    pular = pytest.mark.skip(reason="depende do SQLite")
+    for item in items:
+        if "sqlite" in item.keywords:
+            item.add_marker(pular)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def esquema():
+    atualizar_esquema(engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(DIRETORIO, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def banco_limpo(esquema):
+    """Cada teste começa com as tabelas vazias e os caches do processo zerados"""
+    with engine.begin() as conexao:
+        for tabela in reversed(Base.metadata.sorted_tables):
+            conexao.execute(tabela.delete())
+    if modulo_cache.cache_respostas is not None:
+        modulo_cache.cache_respostas.backend = modulo_cache.criar_backend()
+    auth_cache.limpar()
+    yield
+
+
+@pytest.fixture
+def db():
+    sessao = SessionLocal()
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+
+
+@pytest.fixture
+def cliente():
+    """Cliente HTTP com as dependências de autenticação resolvendo para um admin"""
+    app.dependency_overrides[require_admin] = lambda: ADMIN
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def replica_sqlite(monkeypatch):
+    """Réplica SQLite ativa, como com `SQLITE_REPLICA_PATH` configurado; já copiada"""
+    if not USANDO_SQLITE:
+        pytest.skip("réplica por cópia do arquivo: só SQLite")
+    caminho = os.path.join(DIRETORIO, "replica.db")
+    monkeypatch.setattr(settings, "SQLITE_REPLICA_PATH", caminho)
+    sincrono, assincrono = replica.criar_engines_replica_sqlite()
+    for nome, valor in {
+        "REPLICA_SQLITE": True,
+        "REPLICA_ATIVA": True,
+        "replica_engine": sincrono,
+        "async_replica_engine": assincrono,
+        "ReplicaSessionLocal": sessionmaker(autocommit=False, autoflush=False, bind=sincrono),
+        "AsyncReplicaSessionLocal": async_sessionmaker(
+            assincrono, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        ),
+        "_copia_aberta": None,
+    }.items():
+        monkeypatch.setattr(replica, nome, valor, raising=False)
+    replica.atualizar_replica_sqlite()
+    yield caminho
+    sincrono.dispose()
+    os.remove(caminho)
+
+
+class ContadorComandos:
+    """Conta os comandos SQL executados no primário e na réplica"""
+
+    def __init__(self):
+        self.comandos = []
+        self._engines = {id(engine): engine, id(replica.replica_engine): replica.replica_engine}
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.comandos.append(statement)
+
+    def __enter__(self):
+        for alvo in self._engines.values():
+            event.listen(alvo, "before_cursor_execute", self._registrar)
+        return self
+
+    def __exit__(self, *exc):
+        for alvo in self._engines.values():
+            event.remove(alvo, "before_cursor_execute", self._registrar)
+
+    @property
+    def total(self) -> int:
+        return len(self.comandos)
+
+
+@pytest.fixture
+def contar_comandos():
+    return ContadorComandos
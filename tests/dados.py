@@ -0,0 +1,76 @@
+"""Criação de linhas para os testes (na sessão recebida, sem commit)"""
+from datetime import datetime, timedelta
+from itertools import count
+
+from sqlalchemy import text
+
+from app.models.models import (
+    Autor, Emprestimo, Livro, Reserva, SolicitacaoAutor, StatusEmprestimo, StatusLivro, StatusReserva,
+    Usuario, UsuarioAuth,
+)
+from conftest import ADMIN
+
+# Sufixos únicos (ISBN, e-mail, matrícula) entre chamadas no mesmo teste
+_sequencia = count(1)
+
+
+def criar_autor(db, nome: str = "Machado de Assis") -> Autor:
+    autor = Autor(nome=nome)
+    db.add(autor)
+    db.flush()
+    return autor
+
+
+def criar_livros(db, quantidade: int, autor: Autor = None, status: StatusLivro = StatusLivro.DISPONIVEL) -> list:
+    autor = autor or criar_autor(db)
+    livros = []
+    for _ in range(quantidade):
+        i = next(_sequencia)
+        livros.append(Livro(titulo=f"Livro {i}", isbn=f"978{i:010d}", autor_id=autor.id, status=status))
+    db.add_all(livros)
+    db.flush()
+    return livros
+
+
+def criar_usuarios(db, quantidade: int) -> list:
+    usuarios = []
+    for _ in range(quantidade):
+        i = next(_sequencia)
+        usuarios.append(Usuario(nome=f"Usuário {i}", email=f"u{i}@teste", matricula=f"M{i:05d}"))
+    db.add_all(usuarios)
+    db.flush()
+    return usuarios
+
+
+def criar_emprestimo(db, usuario: Usuario, livro: Livro, dias_atras: int = 0) -> Emprestimo:
+    inicio = datetime.utcnow() - timedelta(days=dias_atras)
+    emprestimo = Emprestimo(
+        usuario_id=usuario.id, livro_id=livro.id, status=StatusEmprestimo.ATIVO,
+        data_emprestimo=inicio, data_devolucao_prevista=inicio + timedelta(days=14)
+    )
+    livro.status = StatusLivro.EMPRESTADO
+    db.add(emprestimo)
+    db.flush()
+    return emprestimo
+
+
+def criar_reserva(db, usuario: Usuario, livro: Livro, posicao: int) -> Reserva:
+    reserva = Reserva(usuario_id=usuario.id, livro_id=livro.id, status=StatusReserva.PENDENTE, posicao=posicao)
+    db.add(reserva)
+    db.flush()
+    return reserva
+
+
+def criar_solicitacao(db, nome: str) -> SolicitacaoAutor:
+    if db.get(UsuarioAuth, ADMIN.id) is None:
+        db.add(UsuarioAuth(id=ADMIN.id, matricula=ADMIN.matricula, nome=ADMIN.nome, email=ADMIN.email,
+                           senha_hash="x", is_admin=True))
+        db.flush()
+    solicitacao = SolicitacaoAutor(nome=nome, solicitante_id=ADMIN.id)
+    db.add(solicitacao)
+    db.flush()
+    return solicitacao
+
+
+def contar_linhas(db, tabela: str) -> int:
+    return db.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
@@ -0,0 +1,91 @@
+"""Varredura de atrasos: marcação em massa, multas e registro da execução"""
+from datetime import timedelta
+
+import pytest
+
+from app.core.atrasos import NOME_TAREFA, varrer_atrasos
+from app.core.circulacao import MULTA_POR_DIA, calcular_multa
+from app.core.database import engine
+from app.core.estatisticas import obter_estatisticas
+from app.models.models import Emprestimo, ExecucaoTarefa, StatusEmprestimo
+
+from dados import criar_emprestimo, criar_livros, criar_usuarios
+
+
+@pytest.fixture
+def emprestimos(db):
+    """Um empréstimo vencido, um no prazo e um devolvido com atraso"""
+    usuario, = criar_usuarios(db, 1)
+    vencido, no_prazo, devolvido = criar_livros(db, 3)
+    atrasado = criar_emprestimo(db, usuario, vencido, dias_atras=17)
+    em_dia = criar_emprestimo(db, usuario, no_prazo, dias_atras=1)
+    finalizado = criar_emprestimo(db, usuario, devolvido, dias_atras=30)
+    finalizado.status = StatusEmprestimo.DEVOLVIDO
+    finalizado.data_devolucao_real = finalizado.data_devolucao_prevista
+    db.commit()
+    # Cria a linha de estatísticas antes da varredura
+    obter_estatisticas(db)
+    db.commit()
+    return atrasado.id, em_dia.id, finalizado.id
+
+
+def _ler(db, emprestimo_id: int) -> Emprestimo:
+    db.expire_all()
+    return db.get(Emprestimo, emprestimo_id)
+
+
+def test_marca_vencidos_e_calcula_a_multa(db, emprestimos):
+    atrasado_id, em_dia_id, finalizado_id = emprestimos
+    prevista = _ler(db, atrasado_id).data_devolucao_prevista
+    agora = prevista + timedelta(days=3, hours=1)
+
+    resumo = varrer_atrasos(engine, agora)
+
+    assert (resumo["marcados"], resumo["multas_atualizadas"]) == (1, 1)
+    atrasado = _ler(db, atrasado_id)
+    assert atrasado.status == StatusEmprestimo.ATRASADO
+    assert atrasado.multa == calcular_multa(prevista, agora) == 3 * MULTA_POR_DIA
+    # Alteração visível para a exportação incremental
+    assert atrasado.atualizado_em == agora
+    assert _ler(db, em_dia_id).status == StatusEmprestimo.ATIVO
+    assert _ler(db, em_dia_id).multa == 0
+    assert _ler(db, finalizado_id).status == StatusEmprestimo.DEVOLVIDO
+    assert obter_estatisticas(db).emprestimos_atrasados == 1
+
+
+def test_segunda_execucao_nao_altera_nada(db, emprestimos):
+    atrasado_id, _, _ = emprestimos
+    agora = _ler(db, atrasado_id).data_devolucao_prevista + timedelta(days=3, hours=1)
+
+    varrer_atrasos(engine, agora)
+    resumo = varrer_atrasos(engine, agora + timedelta(hours=1))
+
+    assert (resumo["marcados"], resumo["multas_atualizadas"]) == (0, 0)
+    assert _ler(db, atrasado_id).multa == 3 * MULTA_POR_DIA
+    assert _ler(db, atrasado_id).atualizado_em == agora
+    assert obter_estatisticas(db).emprestimos_atrasados == 1
+
+
+def test_multa_acumula_a_cada_dia(db, emprestimos):
+    atrasado_id, _, _ = emprestimos
+    agora = _ler(db, atrasado_id).data_devolucao_prevista + timedelta(days=3, hours=1)
+
+    varrer_atrasos(engine, agora)
+    resumo = varrer_atrasos(engine, agora + timedelta(days=1))
+
+    assert (resumo["marcados"], resumo["multas_atualizadas"]) == (0, 1)
+    assert _ler(db, atrasado_id).multa == 4 * MULTA_POR_DIA
+
+
+def test_registra_a_ultima_execucao(db, emprestimos):
+    atrasado_id, _, _ = emprestimos
+    agora = _ler(db, atrasado_id).data_devolucao_prevista + timedelta(days=3, hours=1)
+    assert varrer_atrasos(engine, agora - timedelta(minutes=5))["marcados"] == 1
+    varrer_atrasos(engine, agora)
+
+    db.expire_all()
+    execucoes = db.query(ExecucaoTarefa).all()
+    assert [(execucao.nome, execucao.iniciada_em, execucao.linhas_afetadas) for execucao in execucoes] == [
+        (NOME_TAREFA, agora, 0)
+    ]
+    assert execucoes[0].duracao_ms >= 0
@@ -0,0 +1,77 @@
+"""Cache de usuários autenticados: acertos e invalidação entre workers"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import auth
+from app.core.database import SessionLocal
+from app.models.models import UsuarioAuth
+from main import app
+
+
+@pytest.fixture
+def admin(db):
+    usuario = UsuarioAuth(matricula="2026000001", nome="Ana", email="ana@teste", senha_hash="x", is_admin=True)
+    db.add(usuario)
+    db.commit()
+    token = auth.create_access_token({"sub": usuario.email, "user_id": usuario.id})
+    return usuario.id, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def outro_worker(monkeypatch):
+    """Escritas como em outro processo: o cache local não é limpo no commit"""
+    monkeypatch.setattr(auth, "invalidar_usuario_cache", lambda **_: 0)
+
+
+def _alterar(usuario_id: int, **valores) -> None:
+    with SessionLocal() as outra:
+        usuario = outra.get(UsuarioAuth, usuario_id)
+        if valores:
+            for campo, valor in valores.items():
+                setattr(usuario, campo, valor)
+        else:
+            outra.delete(usuario)
+        outra.commit()
+
+
+def test_acerto_nao_decodifica_nem_busca_o_usuario(admin, contar_comandos, monkeypatch):
+    _, cabecalhos = admin
+    cliente = TestClient(app)
+    assert cliente.get("/api/v1/auth/me", headers=cabecalhos).json()["email"] == "ana@teste"
+
+    def decodificar(_):
+        raise AssertionError("token decodificado de novo")
+
+    monkeypatch.setattr(auth, "_decode_token", decodificar)
+    with contar_comandos() as contador:
+        assert cliente.get("/api/v1/auth/me", headers=cabecalhos).status_code == 200
+    assert not [comando for comando in contador.comandos if "FROM usuarios_auth" in comando]
+    assert auth.auth_cache.estatisticas()["acertos"] >= 1
+
+
+def test_admin_rebaixado_em_outro_worker_perde_o_acesso(admin, outro_worker):
+    usuario_id, cabecalhos = admin
+    cliente = TestClient(app)
+    assert cliente.get("/api/v1/estatisticas/", headers=cabecalhos).status_code == 200
+
+    _alterar(usuario_id, is_admin=False)
+    assert cliente.get("/api/v1/estatisticas/", headers=cabecalhos).status_code == 403
+
+
+def test_usuario_removido_em_outro_worker_perde_o_acesso(admin, outro_worker):
+    usuario_id, cabecalhos = admin
+    cliente = TestClient(app)
+    assert cliente.get("/api/v1/auth/me", headers=cabecalhos).status_code == 200
+
+    _alterar(usuario_id)
+    assert cliente.get("/api/v1/auth/me", headers=cabecalhos).status_code == 401
+
+
+def test_alteracao_no_mesmo_processo_limpa_o_cache(admin):
+    usuario_id, cabecalhos = admin
+    cliente = TestClient(app)
+    assert cliente.get("/api/v1/auth/me", headers=cabecalhos).json()["nome"] == "Ana"
+
+    _alterar(usuario_id, nome="Ana Maria")
+    assert auth.auth_cache.estatisticas()["itens"] == 0
+    assert cliente.get("/api/v1/auth/me", headers=cabecalhos).json()["nome"] == "Ana Maria"
@@ -0,0 +1,83 @@
+"""Busca textual: índice FTS5 em sincronia pelos triggers e ordenação por bm25"""
+import pytest
+
+from app.core.search import buscar_ids_livros, montar_consulta_fts
+from app.models.models import Editora
+
+from dados import criar_autor, criar_livros
+
+pytestmark = pytest.mark.sqlite
+
+
+def _buscar(db, termo: str) -> list:
+    db.commit()
+    return buscar_ids_livros(db, termo)
+
+
+def test_insercao_indexa_com_prefixo_e_sem_acentos(db):
+    livro, = criar_livros(db, 1)
+    livro.titulo = "Memórias Póstumas de Brás Cubas"
+    db.flush()
+
+    assert _buscar(db, "memorias") == [livro.id]
+    assert _buscar(db, "bras cub") == [livro.id]
+    assert _buscar(db, "Machado") == [livro.id]
+    assert _buscar(db, "quincas") == []
+
+
+def test_alteracao_e_remocao_atualizam_o_indice(db):
+    livro, outro = criar_livros(db, 2)
+    livro.titulo = "Dom Casmurro"
+    db.commit()
+    assert _buscar(db, "casmurro") == [livro.id]
+
+    livro.titulo = "Quincas Borba"
+    livro.sinopse = "Rubião herda a fortuna do filósofo"
+    db.flush()
+    assert _buscar(db, "casmurro") == []
+    assert _buscar(db, "quincas") == [livro.id]
+    assert _buscar(db, "filosofo") == [livro.id]
+
+    db.delete(livro)
+    db.flush()
+    assert _buscar(db, "quincas") == []
+    assert _buscar(db, outro.titulo) == [outro.id]
+
+
+def test_renomear_autor_e_editora_reindexa_os_livros(db):
+    autor = criar_autor(db, "Machado de Assis")
+    editora = Editora(nome="Garnier")
+    db.add(editora)
+    livros = criar_livros(db, 2, autor=autor)
+    livros[0].editora = editora
+    sem_relacao, = criar_livros(db, 1, autor=criar_autor(db, "Clarice Lispector"))
+    db.commit()
+
+    autor.nome = "Joaquim Maria"
+    editora.nome = "Companhia das Letras"
+    db.flush()
+
+    assert sorted(_buscar(db, "joaquim")) == sorted(livro.id for livro in livros)
+    assert _buscar(db, "machado") == []
+    assert _buscar(db, "companhia") == [livros[0].id]
+    assert _buscar(db, "garnier") == []
+    assert _buscar(db, "clarice") == [sem_relacao.id]
+
+
+def test_titulo_pesa_mais_que_a_sinopse(db, cliente):
+    na_sinopse, no_titulo, no_autor = criar_livros(db, 3, autor=criar_autor(db, "Autora Desconhecida"))
+    na_sinopse.sinopse = "Um romance sobre o sertão"
+    no_titulo.titulo = "Grande Sertão: Veredas"
+    no_autor.autor = criar_autor(db, "Sertão Editorial")
+    db.commit()
+
+    esperado = [no_titulo.id, no_autor.id, na_sinopse.id]
+    assert _buscar(db, "sertao") == esperado
+    resposta = cliente.get("/api/v1/livros/", params={"search": "sertão"})
+    assert [livro["id"] for livro in resposta.json()] == esperado
+
+
+def test_operadores_digitados_sao_ignorados(db):
+    assert montar_consulta_fts('dom" OR casm*') == '"dom"* "OR"* "casm"*'
+    assert montar_consulta_fts("  -- ") is None
+    assert _buscar(db, 'NEAR(") *') == []
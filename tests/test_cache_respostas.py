@@ -0,0 +1,58 @@
+"""Cache de respostas: invalidação entre processos nos dois backends"""
+import pytest
+from fastapi import Response
+
+from app.core import cache_respostas as modulo_cache
+from app.core.cache_respostas import BackendChaveValor, BackendMemoria, CacheRespostas
+from app.core.versoes import chaves_do_recurso
+
+from cliente_falso import ClienteFalso
+from dados import criar_livros
+
+
+@pytest.fixture
+def dois_workers(monkeypatch):
+    """Dois caches `memoria`, um por worker; as requisições vão ao primeiro"""
+    primeiro, segundo = (CacheRespostas(BackendMemoria(64, 300), 300) for _ in range(2))
+    monkeypatch.setattr(modulo_cache, "cache_respostas", primeiro)
+    return primeiro, segundo
+
+
+def test_escrita_em_outro_worker_invalida_o_cache_em_memoria(db, cliente, dois_workers, monkeypatch):
+    primeiro, segundo = dois_workers
+    livro, = criar_livros(db, 1)
+    db.commit()
+    url = f"/api/v1/livros/{livro.id}"
+
+    assert cliente.get(url).headers["x-cache"] == "MISS"
+    guardada = cliente.get(url)
+    assert guardada.headers["x-cache"] == "HIT"
+
+    # A escrita acontece no outro worker: só o cache dele recebe a invalidação
+    monkeypatch.setattr(modulo_cache, "cache_respostas", segundo)
+    assert cliente.put(url, json={"titulo": "Título revisto"}).status_code == 200
+    monkeypatch.setattr(modulo_cache, "cache_respostas", primeiro)
+
+    resposta = cliente.get(url)
+    assert resposta.headers["x-cache"] == "MISS"
+    assert resposta.json()["titulo"] == "Título revisto"
+    # O ETag guardado antes da escrita também não vale mais
+    condicional = cliente.get(url, headers={"If-None-Match": guardada.headers["etag"]})
+    assert condicional.status_code == 200
+    assert condicional.json()["titulo"] == "Título revisto"
+
+
+def test_chave_valor_compartilha_entradas_e_invalidacoes():
+    cliente = ClienteFalso()
+    primeiro, segundo = (CacheRespostas(BackendChaveValor(cliente), 300) for _ in range(2))
+    tags = chaves_do_recurso("livros", 1)
+    chave = "/api/v1/livros/1?"
+
+    primeiro.guardar(chave, tags, primeiro.backend.geracoes(tags), Response(b'{"id": 1}', media_type="application/json"))
+    entrada = segundo.buscar(chave)
+    assert entrada["corpo"] == b'{"id": 1}'
+    assert entrada["cabecalhos"]["content-type"] == "application/json"
+
+    segundo.invalidar({"livros:1"})
+    assert primeiro.buscar(chave) is None
+    assert segundo.buscar(chave) is None
@@ -0,0 +1,114 @@
+"""`fields=`/`expand=` nos livros: resposta e consulta só com o que foi pedido"""
+import re
+
+import pytest
+
+from app.core.serializacao import campos_pedidos
+from app.schemas.book import Livro
+
+from dados import criar_livros
+
+RELACOES = ("autor", "editora", "categorias")
+
+
+def _consultar(cliente, contar_comandos, caminho: str, **parametros):
+    """Resposta do GET e os SELECTs de livros e dos relacionamentos executados nele"""
+    with contar_comandos() as contador:
+        resposta = cliente.get(caminho, params=parametros)
+    selects = [comando for comando in contador.comandos if comando.lstrip().startswith("SELECT")]
+    # Fora os de versoes_recursos (ETag e cache de respostas)
+    return resposta, [comando for comando in selects if "versoes_recursos" not in comando]
+
+
+def _colunas_de_livros(comando: str) -> set:
+    return set(re.findall(r"\blivros\.(\w+)", re.split(r"\sFROM\s", comando)[0]))
+
+
+@pytest.fixture
+def livros(db):
+    livros = criar_livros(db, 3)
+    db.commit()
+    return livros
+
+
+def test_fields_le_so_as_colunas_pedidas(cliente, contar_comandos, livros):
+    resposta, selects = _consultar(cliente, contar_comandos, "/api/v1/livros/", fields="titulo,status")
+
+    assert resposta.status_code == 200
+    assert [set(item) for item in resposta.json()] == [{"id", "titulo", "status"}] * 3
+    # Uma consulta, sem JOIN nem carga dos relacionamentos
+    assert len(selects) == 1
+    assert _colunas_de_livros(selects[0]) == {"id", "titulo", "status"}
+    assert "autores" not in selects[0] and "categorias" not in selects[0]
+
+
+def test_fields_vazio_traz_so_o_id(cliente, contar_comandos, livros):
+    resposta, selects = _consultar(cliente, contar_comandos, "/api/v1/livros/", fields="")
+
+    assert resposta.json() == [{"id": livro.id} for livro in sorted(livros, key=lambda livro: livro.titulo)]
+    assert len(selects) == 1
+    assert _colunas_de_livros(selects[0]) == {"id"}
+
+
+def test_expand_carrega_so_os_relacionamentos_pedidos(cliente, contar_comandos, livros):
+    resposta, selects = _consultar(cliente, contar_comandos, "/api/v1/livros/", expand="autor")
+
+    item = resposta.json()[0]
+    assert item["autor"]["nome"] == "Machado de Assis"
+    assert not set(item) & {"editora", "categorias"}
+    assert set(item) == set(Livro.model_fields) - {"editora", "categorias"}
+    assert len(selects) == 1
+    assert "JOIN autores" in selects[0] and "editoras" not in selects[0]
+
+
+def test_sem_fields_nem_expand_traz_tudo(cliente, contar_comandos, livros):
+    resposta, selects = _consultar(cliente, contar_comandos, "/api/v1/livros/")
+
+    assert set(resposta.json()[0]) == set(Livro.model_fields)
+    # Livros com autor e editora em um JOIN; categorias em um SELECT ... IN
+    assert len(selects) == 2
+    assert "sinopse" in _colunas_de_livros(selects[0])
+
+
+def test_cursor_le_o_titulo_mesmo_sem_pedir(cliente, contar_comandos, livros):
+    resposta, selects = _consultar(cliente, contar_comandos, "/api/v1/livros/", fields="", cursor="", limit=2)
+
+    pagina = resposta.json()
+    assert [set(item) for item in pagina["items"]] == [{"id"}] * 2
+    # O título entra no próximo cursor
+    assert _colunas_de_livros(selects[0]) == {"id", "titulo"}
+
+    seguinte = cliente.get("/api/v1/livros/", params={"fields": "", "cursor": pagina["next_cursor"], "limit": 2})
+    ids = [item["id"] for item in pagina["items"] + seguinte.json()["items"]]
+    assert sorted(ids) == sorted(livro.id for livro in livros)
+
+
+def test_detalhe_aceita_fields(cliente, contar_comandos, livros):
+    livro = livros[0]
+    resposta, selects = _consultar(cliente, contar_comandos, f"/api/v1/livros/{livro.id}", fields="isbn")
+
+    assert resposta.json() == {"id": livro.id, "isbn": livro.isbn}
+    assert _colunas_de_livros(selects[0]) == {"id", "isbn"}
+
+
+@pytest.mark.parametrize("parametros, mensagem", [
+    ({"fields": "titulo,preco"}, "fields inválido: preco"),
+    ({"fields": "autor"}, "fields inválido: autor"),
+    ({"expand": "titulo"}, "expand inválido: titulo"),
+    ({"expand": "autor,exemplares"}, "expand inválido: exemplares"),
+])
+@pytest.mark.parametrize("caminho", ["/api/v1/livros/", "/api/v1/livros/1"])
+def test_campos_desconhecidos_sao_recusados(cliente, caminho, parametros, mensagem):
+    resposta = cliente.get(caminho, params=parametros)
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"].startswith(mensagem)
+
+
+def test_campos_pedidos_segue_a_ordem_do_schema():
+    todos = tuple(Livro.model_fields)
+    assert campos_pedidos(Livro, None, None, RELACOES) == todos
+    assert campos_pedidos(Livro, " status , titulo ", "categorias", RELACOES) == tuple(
+        nome for nome in todos if nome in {"id", "titulo", "status", "categorias"}
+    )
+    # expand vazio: todos os campos simples e nenhum relacionamento
+    assert campos_pedidos(Livro, None, "", RELACOES) == tuple(nome for nome in todos if nome not in RELACOES)
@@ -0,0 +1,45 @@
+"""Compressão negociada: Vary em toda resposta comprimível e HEAD intocado"""
+from dados import criar_livros
+
+
+def _vary(resposta) -> list:
+    return [valor.strip().lower() for valor in resposta.headers.get("vary", "").split(",") if valor.strip()]
+
+
+def test_resposta_grande_e_comprimida(db, cliente):
+    criar_livros(db, 30)
+    db.commit()
+
+    resposta = cliente.get("/api/v1/livros/", headers={"Accept-Encoding": "gzip"})
+    assert resposta.status_code == 200
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert _vary(resposta).count("accept-encoding") == 1
+    assert resposta.headers["etag"].startswith("W/")
+    assert len(resposta.json()) == 30
+
+
+def test_vary_tambem_nas_respostas_nao_comprimidas(db, cliente):
+    livro, = criar_livros(db, 1)
+    criar_livros(db, 29)
+    db.commit()
+
+    # Corpo abaixo do tamanho mínimo
+    pequena = cliente.get(f"/api/v1/livros/{livro.id}", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pequena.headers
+    assert "accept-encoding" in _vary(pequena)
+
+    # Cliente sem gzip/br: mesma URL que outro cliente recebe comprimida
+    sem_codificacao = cliente.get("/api/v1/livros/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sem_codificacao.headers
+    assert "accept-encoding" in _vary(sem_codificacao)
+
+
+def test_head_passa_sem_compressao(cliente):
+    original = cliente.get("/static/css/style.css", headers={"Accept-Encoding": "identity"})
+    assert cliente.get("/static/css/style.css", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+
+    head = cliente.head("/static/css/style.css", headers={"Accept-Encoding": "gzip"})
+    assert head.status_code == 200
+    assert "content-encoding" not in head.headers
+    # Content-Length do arquivo, não o de um corpo vazio comprimido
+    assert int(head.headers["content-length"]) == len(original.content)
@@ -0,0 +1,86 @@
+"""
+As listagens com relacionamentos carregam tudo em um número fixo de
+comandos SQL, independente da quantidade de linhas (sem N+1).
+"""
+import pytest
+
+from dados import criar_emprestimo, criar_livros, criar_reserva, criar_solicitacao, criar_usuarios
+
+
+def _popular_emprestimos(db, quantidade: int) -> int:
+    """`quantidade` empréstimos de usuários diferentes; devolve o id de um usuário com `quantidade` empréstimos"""
+    livros = criar_livros(db, quantidade * 2)
+    usuarios = criar_usuarios(db, quantidade + 1)
+    leitor = usuarios[-1]
+    for i in range(quantidade):
+        criar_emprestimo(db, usuarios[i], livros[i])
+        criar_emprestimo(db, leitor, livros[quantidade + i])
+    db.commit()
+    return leitor.id
+
+
+def _popular_reservas(db, quantidade: int) -> None:
+    for usuario, livro in zip(criar_usuarios(db, quantidade), criar_livros(db, quantidade)):
+        criar_reserva(db, usuario, livro, posicao=1)
+    db.commit()
+
+
+def _popular_solicitacoes(db, quantidade: int) -> None:
+    for i in range(quantidade):
+        criar_solicitacao(db, f"Autor solicitado {i}")
+    db.commit()
+
+
+def _comandos(cliente, contar_comandos, caminho: str, esperados: int) -> int:
+    """Comandos SQL executados pelo GET `caminho`, que deve listar `esperados` itens"""
+    with contar_comandos() as contador:
+        resposta = cliente.get(caminho)
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    itens = corpo["items"] if isinstance(corpo, dict) else corpo
+    assert len(itens) == esperados
+    assert contador.total > 0
+    return contador.total
+
+
+@pytest.mark.parametrize("caminho", ["/api/v1/emprestimos/", "/api/v1/emprestimos/?cursor="])
+def test_listar_emprestimos_numero_fixo_de_comandos(db, cliente, contar_comandos, caminho):
+    _popular_emprestimos(db, 1)
+    com_poucos = _comandos(cliente, contar_comandos, caminho, 2)
+
+    _popular_emprestimos(db, 10)
+    com_muitos = _comandos(cliente, contar_comandos, caminho, 22)
+
+    assert com_poucos == com_muitos
+
+
+def test_listar_emprestimos_usuario_numero_fixo_de_comandos(db, cliente, contar_comandos):
+    leitor = _popular_emprestimos(db, 1)
+    com_um = _comandos(cliente, contar_comandos, f"/api/v1/emprestimos/usuario/{leitor}", 1)
+
+    leitor = _popular_emprestimos(db, 10)
+    com_muitos = _comandos(cliente, contar_comandos, f"/api/v1/emprestimos/usuario/{leitor}", 10)
+
+    assert com_um == com_muitos
+
+
+@pytest.mark.parametrize("caminho", ["/api/v1/solicitacoes-autores/", "/api/v1/solicitacoes-autores/?cursor="])
+def test_listar_solicitacoes_autores_numero_fixo_de_comandos(db, cliente, contar_comandos, caminho):
+    _popular_solicitacoes(db, 1)
+    com_uma = _comandos(cliente, contar_comandos, caminho, 1)
+
+    _popular_solicitacoes(db, 9)
+    com_muitas = _comandos(cliente, contar_comandos, caminho, 10)
+
+    assert com_uma == com_muitas
+
+
+@pytest.mark.parametrize("caminho", ["/api/v1/reservas/", "/api/v1/reservas/?cursor="])
+def test_read_reservas_numero_fixo_de_comandos(db, cliente, contar_comandos, caminho):
+    _popular_reservas(db, 1)
+    com_uma = _comandos(cliente, contar_comandos, caminho, 1)
+
+    _popular_reservas(db, 9)
+    com_muitas = _comandos(cliente, contar_comandos, caminho, 10)
+
+    assert com_uma == com_muitas
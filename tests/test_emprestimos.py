@@ -0,0 +1,87 @@
+"""Retirada e reserva com escritas condicionais (sem checar-e-depois-agir)"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.core.database import SessionLocal, engine
+from app.models.models import Emprestimo, Livro, Reserva, StatusLivro, StatusReserva, Usuario
+
+from dados import criar_emprestimo, criar_livros, criar_reserva, criar_usuarios
+
+
+@contextmanager
+def concorrente_antes(prefixo: str, escrita):
+    """Roda `escrita` em outra sessão logo antes do primeiro comando que começa com `prefixo`"""
+    executado = []
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(prefixo) and not executado:
+            executado.append(True)
+            with SessionLocal() as outra:
+                escrita(outra)
+                outra.commit()
+
+    event.listen(engine, "before_cursor_execute", antes)
+    try:
+        yield executado
+    finally:
+        event.remove(engine, "before_cursor_execute", antes)
+
+
+def test_retirada_simultanea_gera_um_unico_emprestimo(db, cliente):
+    leitor, outro = criar_usuarios(db, 2)
+    livro, = criar_livros(db, 1)
+    db.commit()
+    livro_id, leitor_id, outro_id = livro.id, leitor.id, outro.id
+
+    def outra_retirada(outra):
+        # A leitura do livro já viu DISPONIVEL; outra requisição retira antes do UPDATE
+        criar_emprestimo(outra, outra.get(Usuario, outro_id), outra.get(Livro, livro_id))
+
+    with concorrente_antes("UPDATE livros", outra_retirada) as executado:
+        resposta = cliente.post("/api/v1/emprestimos/", json={"usuario_id": leitor_id, "livro_id": livro_id})
+
+    assert executado
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == (
+        f"Livro não está disponível para empréstimo. Status atual: {StatusLivro.EMPRESTADO.value}"
+    )
+    assert [e.usuario_id for e in db.query(Emprestimo).filter(Emprestimo.livro_id == livro_id)] == [outro_id]
+
+
+def test_livro_guardado_so_sai_para_quem_reservou(db, cliente):
+    dono_da_reserva, outro = criar_usuarios(db, 2)
+    livro, = criar_livros(db, 1)
+    reserva = criar_reserva(db, dono_da_reserva, livro, posicao=1)
+    reserva.status = StatusReserva.ATIVA
+    db.commit()
+
+    resposta = cliente.post("/api/v1/emprestimos/", json={"usuario_id": outro.id, "livro_id": livro.id})
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "Livro reservado para outro usuário"
+
+    resposta = cliente.post("/api/v1/emprestimos/", json={"usuario_id": dono_da_reserva.id, "livro_id": livro.id})
+    assert resposta.status_code == 201, resposta.text
+    db.expire_all()
+    assert db.get(Reserva, reserva.id).status == StatusReserva.CONCLUIDA
+    assert db.get(Livro, livro.id).status == StatusLivro.EMPRESTADO
+
+
+def test_reserva_simultanea_do_mesmo_usuario_e_recusada(db, cliente):
+    leitor, outro = criar_usuarios(db, 2)
+    livro, = criar_livros(db, 1)
+    criar_emprestimo(db, leitor, livro)
+    db.commit()
+    livro_id, outro_id = livro.id, outro.id
+
+    def mesma_reserva(outra):
+        criar_reserva(outra, outra.get(Usuario, outro_id), outra.get(Livro, livro_id), posicao=1)
+
+    # A outra reserva entra entre a leitura do livro e o INSERT desta
+    with concorrente_antes("INSERT INTO reservas", mesma_reserva) as executado:
+        resposta = cliente.post("/api/v1/reservas/", json={"usuario_id": outro_id, "livro_id": livro_id})
+
+    assert executado
+    assert resposta.status_code == 400
+    assert "já possui" in resposta.json()["detail"]
+    assert db.query(Reserva).filter(Reserva.livro_id == livro_id).count() == 1
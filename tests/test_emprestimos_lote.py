@@ -0,0 +1,79 @@
+"""Empréstimos e devoluções em lote"""
+from app.models.models import Livro, Reserva, StatusLivro, StatusReserva
+
+from dados import criar_emprestimo, criar_livros, criar_reserva, criar_usuarios
+
+
+def _erros(resposta) -> dict:
+    assert resposta.status_code == 200, resposta.text
+    return {item["livro_id"]: item["erro"] for item in resposta.json()["itens"] if not item["sucesso"]}
+
+
+def test_lote_reporta_cada_recusa(db, cliente):
+    leitor, outro = criar_usuarios(db, 2)
+    livre, com_outro, com_leitor, guardado = criar_livros(db, 4)
+    criar_emprestimo(db, outro, com_outro)
+    criar_emprestimo(db, leitor, com_leitor)
+    reserva = criar_reserva(db, outro, guardado, posicao=1)
+    reserva.status = StatusReserva.ATIVA
+    db.commit()
+
+    resposta = cliente.post("/api/v1/emprestimos/lote", json={
+        "usuario_id": leitor.id,
+        "livro_ids": [livre.id, com_outro.id, com_leitor.id, guardado.id, livre.id, 999999],
+    })
+
+    assert resposta.json()["sucessos"] == 1
+    assert _erros(resposta) == {
+        com_outro.id: f"Livro não está disponível para empréstimo. Status atual: {StatusLivro.EMPRESTADO.value}",
+        com_leitor.id: "Usuário já possui um empréstimo ativo deste livro",
+        guardado.id: "Livro reservado para outro usuário",
+        livre.id: "Livro repetido no lote",
+        999999: "Livro não encontrado",
+    }
+    db.expire_all()
+    assert db.get(Livro, livre.id).status == StatusLivro.EMPRESTADO
+
+
+def test_lote_explica_as_recusas_com_numero_fixo_de_comandos(db, cliente, contar_comandos):
+    leitor, outro = criar_usuarios(db, 2)
+    livros = criar_livros(db, 6)
+    for livro in livros[1:]:
+        criar_emprestimo(db, outro, livro)
+    db.commit()
+    usuario_id, livro_ids = leitor.id, [livro.id for livro in livros[1:]]
+
+    def comandos(livro_ids: list) -> int:
+        with contar_comandos() as contador:
+            resposta = cliente.post("/api/v1/emprestimos/lote", json={"usuario_id": usuario_id, "livro_ids": livro_ids})
+        assert len(_erros(resposta)) == len(livro_ids)
+        return contador.total
+
+    assert comandos(livro_ids[:1]) == comandos(livro_ids)
+
+
+def test_devolucao_em_lote_promove_as_filas(db, cliente, contar_comandos):
+    leitor, *fila = criar_usuarios(db, 3)
+    com_fila, outro_com_fila, sem_fila = criar_livros(db, 3)
+    emprestimos = [criar_emprestimo(db, leitor, livro) for livro in (com_fila, outro_com_fila, sem_fila)]
+    for posicao, usuario in enumerate(fila, start=1):
+        criar_reserva(db, usuario, com_fila, posicao)
+    criar_reserva(db, fila[0], outro_com_fila, 1)
+    db.commit()
+    emprestimo_ids = [emprestimo.id for emprestimo in emprestimos]
+
+    with contar_comandos() as contador:
+        resposta = cliente.put("/api/v1/emprestimos/lote/devolver", json={"emprestimo_ids": emprestimo_ids})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["sucessos"] == 3
+    # Um único comando (o UPDATE) lê e promove as filas de todos os livros devolvidos
+    assert [comando.split()[0] for comando in contador.comandos if "reservas" in comando] == ["UPDATE"]
+
+    reservas = {
+        (reserva.livro_id, reserva.usuario_id): reserva for reserva in db.query(Reserva)
+    }
+    assert reservas[(com_fila.id, fila[0].id)].status == StatusReserva.ATIVA
+    assert reservas[(com_fila.id, fila[0].id)].data_validade is not None
+    assert reservas[(com_fila.id, fila[1].id)].status == StatusReserva.PENDENTE
+    assert reservas[(outro_com_fila.id, fila[0].id)].status == StatusReserva.ATIVA
+    assert db.get(Livro, sem_fila.id).status == StatusLivro.DISPONIVEL
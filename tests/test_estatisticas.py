@@ -0,0 +1,73 @@
+"""Estatísticas de circulação: linha única mantida pelos flushes"""
+from sqlalchemy import event, insert
+
+from app.core.database import engine
+from app.core.estatisticas import ESTATISTICAS_ID, obter_estatisticas
+from app.models.models import EstatisticaLivro, EstatisticasCirculacao
+
+from dados import criar_emprestimo, criar_livros, criar_usuarios
+
+
+def test_primeiras_leituras_simultaneas_nao_conflitam(db):
+    criar_livros(db, 2)
+    db.commit()
+    tabela = EstatisticasCirculacao.__table__
+    concorrente = []
+
+    def outra_leitura_antes(conn, cursor, statement, parameters, context, executemany):
+        # Outra requisição cria a linha logo antes do INSERT desta
+        if statement.startswith(f"INSERT INTO {tabela.name}") and not concorrente:
+            concorrente.append(True)
+            with engine.begin() as outra:
+                outra.execute(insert(tabela).values(id=ESTATISTICAS_ID, total_livros=2))
+
+    event.listen(engine, "before_cursor_execute", outra_leitura_antes)
+    try:
+        estatisticas = obter_estatisticas(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", outra_leitura_antes)
+    assert concorrente
+    assert estatisticas.total_livros == 2
+    assert db.query(EstatisticasCirculacao).count() == 1
+
+
+def test_contadores_acompanham_as_escritas(db, cliente):
+    assert obter_estatisticas(db).total_livros == 0
+
+    livros = criar_livros(db, 3)
+    usuario, = criar_usuarios(db, 1)
+    criar_emprestimo(db, usuario, livros[0])
+    db.commit()
+
+    resposta = cliente.get("/api/v1/estatisticas/")
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert (corpo["total_livros"], corpo["total_emprestimos"], corpo["emprestimos_ativos"]) == (3, 1, 1)
+    assert corpo["usuarios_ativos"] == 1
+    assert corpo["livros_populares"][0]["livro_id"] == livros[0].id
+
+
+def test_primeiros_emprestimos_simultaneos_do_mesmo_livro(db):
+    usuario, = criar_usuarios(db, 1)
+    livro, = criar_livros(db, 1)
+    db.commit()
+    livro_id = livro.id
+    concorrente = []
+
+    def outro_emprestimo_antes(conn, cursor, statement, parameters, context, executemany):
+        # Outro empréstimo do mesmo livro cria a linha logo antes; na mesma
+        # conexão, já que o SQLite não aceita um segundo escritor
+        if statement.startswith("INSERT INTO estatisticas_livros") and not concorrente:
+            concorrente.append(True)
+            cursor.connection.execute(
+                f"INSERT INTO estatisticas_livros (livro_id, total_emprestimos) VALUES ({int(livro_id)}, 1)"
+            )
+
+    event.listen(engine, "before_cursor_execute", outro_emprestimo_antes)
+    try:
+        criar_emprestimo(db, usuario, livro)
+        db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", outro_emprestimo_antes)
+    assert concorrente
+    assert db.get(EstatisticaLivro, livro_id).total_emprestimos == 2
@@ -0,0 +1,93 @@
+"""Exportação em streaming (CSV/NDJSON) e o filtro incremental `since`"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.core.atrasos import varrer_atrasos
+from app.core.database import engine
+from app.models.models import Emprestimo, Livro, StatusEmprestimo, StatusLivro, Usuario
+
+from dados import criar_emprestimo, criar_livros, criar_usuarios
+
+
+def _ndjson(cliente, caminho: str, **parametros) -> list:
+    resposta = cliente.get(caminho, params=parametros)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+def _envelhecer(db, modelo) -> None:
+    """Data de cadastro e de alteração de todas as linhas no passado"""
+    ontem = datetime.utcnow() - timedelta(days=1)
+    db.execute(update(modelo).values(data_cadastro=ontem, atualizado_em=ontem))
+    db.commit()
+
+
+def test_exporta_acervo_em_csv(db, cliente):
+    livros = criar_livros(db, 3)
+    db.commit()
+
+    resposta = cliente.get("/api/v1/exportar/livros", params={"formato": "csv"})
+    assert resposta.status_code == 200
+    linhas = list(csv.DictReader(io.StringIO(resposta.text)))
+    assert [int(linha["id"]) for linha in linhas] == [livro.id for livro in livros]
+    assert linhas[0]["autor"] == "Machado de Assis"
+    assert linhas[0]["status"] == StatusLivro.DISPONIVEL.value
+
+
+def test_since_traz_livros_alterados_depois_do_cadastro(db, cliente):
+    alterado, emprestado, intocado = criar_livros(db, 3)
+    _envelhecer(db, Livro)
+    marco = datetime.utcnow() - timedelta(seconds=1)
+
+    assert cliente.put(f"/api/v1/livros/{alterado.id}", json={"titulo": "Título revisto"}).status_code == 200
+    # UPDATE via Core (como o das retiradas condicionais) também marca a linha
+    db.execute(update(Livro).where(Livro.id == emprestado.id).values(status=StatusLivro.EMPRESTADO))
+    db.commit()
+
+    exportados = _ndjson(cliente, "/api/v1/exportar/livros", since=marco.isoformat())
+    assert [(livro["id"], livro["titulo"]) for livro in exportados] == [
+        (alterado.id, "Título revisto"), (emprestado.id, emprestado.titulo)
+    ]
+    assert intocado.id not in {livro["id"] for livro in exportados}
+
+
+def test_since_traz_usuarios_alterados(db, cliente):
+    desativado, intocado = criar_usuarios(db, 2)
+    _envelhecer(db, Usuario)
+    marco = datetime.utcnow() - timedelta(seconds=1)
+
+    desativado.ativo = False
+    db.commit()
+
+    exportados = _ndjson(cliente, "/api/v1/exportar/usuarios", since=marco.isoformat())
+    assert [(usuario["id"], usuario["ativo"]) for usuario in exportados] == [(desativado.id, False)]
+
+
+def test_since_traz_emprestimos_marcados_pela_varredura(db, cliente):
+    usuario, = criar_usuarios(db, 1)
+    vencido, devolvido, em_dia = criar_livros(db, 3)
+    atrasado = criar_emprestimo(db, usuario, vencido, dias_atras=20)
+    devolucao = criar_emprestimo(db, usuario, devolvido, dias_atras=2)
+    criar_emprestimo(db, usuario, em_dia, dias_atras=1)
+    db.commit()
+    db.execute(update(Emprestimo).values(atualizado_em=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+    marco = datetime.utcnow() - timedelta(seconds=1)
+
+    # A varredura altera status e multa com UPDATE em massa, sem passar pelo ORM
+    assert varrer_atrasos(engine)["marcados"] == 1
+    devolucao = db.get(Emprestimo, devolucao.id)
+    devolucao.status = StatusEmprestimo.DEVOLVIDO
+    devolucao.data_devolucao_real = datetime.utcnow()
+    db.commit()
+
+    exportados = _ndjson(cliente, "/api/v1/exportar/emprestimos", since=marco.isoformat())
+    assert [(emprestimo["id"], emprestimo["status"]) for emprestimo in exportados] == [
+        (atrasado.id, StatusEmprestimo.ATRASADO.value), (devolucao.id, StatusEmprestimo.DEVOLVIDO.value)
+    ]
+    assert exportados[0]["multa"] > 0
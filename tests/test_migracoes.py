@@ -0,0 +1,70 @@
+"""Migrações: bancos criados pelo antigo create_all chegam ao head"""
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.migracoes import atualizar_esquema, configuracao_alembic, revisao_legada
+from app.core.search import buscar_ids_livros, instalar_indice_busca
+
+pytestmark = pytest.mark.sqlite
+
+
+def _banco_legado(caminho, revisao: str, com_indice_busca: bool = False):
+    """Banco com o esquema da revisão, mas sem alembic_version (como o create_all deixava)"""
+    engine = create_engine(f"sqlite:///{caminho}")
+    config = configuracao_alembic()
+    with engine.begin() as conexao:
+        config.attributes["connection"] = conexao
+        command.upgrade(config, revisao)
+        conexao.exec_driver_sql("DROP TABLE alembic_version")
+        if com_indice_busca:
+            instalar_indice_busca(conexao)
+        conexao.exec_driver_sql("INSERT INTO autores (id, nome) VALUES (1, 'Machado de Assis')")
+        conexao.exec_driver_sql(
+            "INSERT INTO livros (id, titulo, autor_id, isbn, status) "
+            "VALUES (1, 'Dom Casmurro', 1, '9788535910667', 'DISPONIVEL')"
+        )
+    return engine
+
+
+def _conferir_head(engine):
+    head = ScriptDirectory.from_config(configuracao_alembic()).get_current_head()
+    with engine.connect() as conexao:
+        assert conexao.execute(text("SELECT version_num FROM alembic_version")).scalar() == head
+        tabelas = inspect(conexao).get_table_names()
+        assert {"estatisticas_circulacao", "estatisticas_livros", "livros_fts"} <= set(tabelas)
+        # Acervo preservado e indexado pela 0002
+        assert conexao.execute(text("SELECT titulo FROM livros")).scalars().all() == ["Dom Casmurro"]
+    with Session(engine) as db:
+        assert buscar_ids_livros(db, "casmurro") == [1]
+
+
+def test_banco_do_esquema_base_chega_ao_head(tmp_path):
+    engine = _banco_legado(tmp_path / "base.db", "0000")
+    try:
+        atualizar_esquema(engine)
+        _conferir_head(engine)
+    finally:
+        engine.dispose()
+
+
+def test_banco_com_estatisticas_e_indice_chega_ao_head(tmp_path):
+    engine = _banco_legado(tmp_path / "estatisticas.db", "0001", com_indice_busca=True)
+    try:
+        atualizar_esquema(engine)
+        _conferir_head(engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.parametrize("tabelas, revisao", [
+    ([], None),
+    (["alembic_version", "livros"], None),
+    (["autores", "livros", "emprestimos"], "0000"),
+    (["livros", "estatisticas_circulacao", "estatisticas_livros"], "0001"),
+    (["livros", "estatisticas_circulacao", "livros_fts"], "0001"),
+])
+def test_revisao_legada(tabelas, revisao):
+    assert revisao_legada(tabelas) == revisao
@@ -0,0 +1,94 @@
+"""Paginação por cursor: páginas sem repetição, desempate pelo id e cursores inválidos"""
+import base64
+import json
+
+import pytest
+
+from dados import criar_emprestimo, criar_livros, criar_usuarios
+
+
+def _cursor(valores) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+
+def _pagina(cliente, caminho: str, cursor: str, limit: int) -> dict:
+    resposta = cliente.get(caminho, params={"cursor": cursor, "limit": limit})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def _percorrer(cliente, caminho: str, limit: int) -> list:
+    paginas, cursor = [], ""
+    while cursor is not None:
+        corpo = _pagina(cliente, caminho, cursor, limit)
+        paginas.append([item["id"] for item in corpo["items"]])
+        cursor = corpo["next_cursor"]
+    return paginas
+
+
+def test_percorre_livros_desempatando_titulos_iguais_pelo_id(db, cliente):
+    livros = criar_livros(db, 5)
+    for livro, titulo in zip(livros, ["B", "A", "B", "A", "B"]):
+        livro.titulo = titulo
+    db.commit()
+    b1, a1, b2, a2, b3 = (livro.id for livro in livros)
+
+    assert _percorrer(cliente, "/api/v1/livros/", limit=2) == [[a1, a2], [b1, b2], [b3]]
+
+
+def test_insercao_entre_paginas_nao_repete_nem_pula(db, cliente):
+    livros = criar_livros(db, 4)
+    for livro, titulo in zip(livros, ["A", "B", "D", "E"]):
+        livro.titulo = titulo
+    db.commit()
+
+    primeira = _pagina(cliente, "/api/v1/livros/", "", 2)
+    assert [item["titulo"] for item in primeira["items"]] == ["A", "B"]
+    # Entra antes do cursor (não aparece) e depois dele (aparece na ordem)
+    antes, depois = criar_livros(db, 2)
+    antes.titulo, depois.titulo = "AA", "C"
+    db.commit()
+
+    segunda = _pagina(cliente, "/api/v1/livros/", primeira["next_cursor"], 10)
+    assert [item["titulo"] for item in segunda["items"]] == ["C", "D", "E"]
+    assert segunda["next_cursor"] is None
+
+
+def test_cursor_com_data_nos_emprestimos(db, cliente):
+    usuario, = criar_usuarios(db, 1)
+    livros = criar_livros(db, 3)
+    emprestimos = [criar_emprestimo(db, usuario, livro, dias_atras=dias) for livro, dias in zip(livros, (1, 3, 2))]
+    db.commit()
+
+    assert _percorrer(cliente, "/api/v1/emprestimos/", limit=2) == [
+        [emprestimos[1].id, emprestimos[2].id], [emprestimos[0].id]
+    ]
+
+
+@pytest.mark.parametrize("cursor", [
+    "nao-e-base64!",
+    _cursor({"titulo": "A"}),
+    _cursor(["A"]),
+    _cursor(["A", 1, 2]),
+    _cursor(["A", "1 OR 1=1"]),
+    _cursor([["A"], {"id": 1}]),
+    _cursor([1, True]),
+])
+def test_cursor_invalido_ou_adulterado(db, cliente, cursor):
+    criar_livros(db, 2)
+    db.commit()
+
+    resposta = cliente.get("/api/v1/livros/", params={"cursor": cursor})
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "Cursor de paginação inválido"
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_limite_nao_positivo_com_cursor(db, cliente, limit):
+    criar_livros(db, 3)
+    db.commit()
+    proximo = _pagina(cliente, "/api/v1/livros/", "", 1)["next_cursor"]
+
+    for cursor in ("", proximo):
+        resposta = cliente.get("/api/v1/livros/", params={"cursor": cursor, "limit": limit})
+        assert resposta.status_code == 400
@@ -0,0 +1,80 @@
+"""Páginas de livros, autor e editora: paginação, ordenação e filtros no servidor"""
+from app.models.models import Editora, StatusLivro
+
+from dados import criar_autor, criar_livros
+
+
+def _pagina(cliente, caminho: str, **parametros):
+    resposta = cliente.get(caminho, params=parametros)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.context["pagina"]
+
+
+def _titulos(pagina) -> list:
+    return [livro.titulo for livro in pagina.itens]
+
+
+def test_listagem_ordena_e_pagina_no_banco(db, cliente):
+    livros = criar_livros(db, 5)
+    for ano, livro in zip((1990, 2010, 1990, 2000, 1980), livros):
+        livro.ano_publicacao = ano
+    db.commit()
+
+    pagina = _pagina(cliente, "/livros", ordem="ano", direcao="desc", por_pagina=2, pagina=2)
+    # 2010, 2000 | 1990, 1990 (o id desempata, na mesma direção) | 1980
+    assert _titulos(pagina) == [livros[2].titulo, livros[0].titulo]
+    assert (pagina.total, pagina.total_paginas, pagina.tem_anterior, pagina.tem_proxima) == (5, 3, True, True)
+
+    # Tamanho e página fora dos limites são ajustados
+    assert _pagina(cliente, "/livros", por_pagina=500).por_pagina == 100
+    ultima = _pagina(cliente, "/livros", ordem="ano", por_pagina=2, pagina=99)
+    assert (ultima.pagina, _titulos(ultima)) == (3, [livros[1].titulo])
+
+
+def test_listagem_filtra_por_status_e_busca(db, cliente):
+    disponiveis = criar_livros(db, 2)
+    emprestados = criar_livros(db, 3, status=StatusLivro.EMPRESTADO)
+    emprestados[1].titulo = "Quincas Borba"
+    db.commit()
+
+    pagina = _pagina(cliente, "/livros", status="EMPRESTADO")
+    assert sorted(_titulos(pagina)) == sorted(livro.titulo for livro in emprestados)
+    assert _titulos(_pagina(cliente, "/livros", busca="Quincas")) == ["Quincas Borba"]
+    # Status desconhecido é ignorado
+    assert _pagina(cliente, "/livros", status="QUALQUER").total == len(disponiveis) + len(emprestados)
+
+
+def test_pagina_do_autor_resume_e_pagina_por_status(db, cliente):
+    autor = criar_autor(db, "Clarice Lispector")
+    disponiveis = criar_livros(db, 3, autor=autor)
+    emprestados = criar_livros(db, 2, autor=autor, status=StatusLivro.EMPRESTADO)
+    criar_livros(db, 2)
+    db.commit()
+
+    resposta = cliente.get(f"/autores/{autor.id}", params={"por_pagina": 2})
+    assert resposta.status_code == 200
+    contagem = resposta.context["contagem"]
+    assert (contagem["total"], contagem["DISPONIVEL"], contagem["EMPRESTADO"]) == (5, 3, 2)
+    assert resposta.context["pagina"].total_paginas == 3
+
+    pagina = _pagina(cliente, f"/autores/{autor.id}", status="DISPONIVEL", por_pagina=2, pagina=2)
+    assert (pagina.total, _titulos(pagina)) == (3, [disponiveis[2].titulo])
+    pagina = _pagina(cliente, f"/autores/{autor.id}", status="EMPRESTADO", ordem="titulo", direcao="desc")
+    assert _titulos(pagina) == [emprestados[1].titulo, emprestados[0].titulo]
+
+    assert cliente.get("/autores/999999").status_code == 404
+
+
+def test_pagina_da_editora(db, cliente):
+    editora = Editora(nome="Companhia das Letras")
+    db.add(editora)
+    livros = criar_livros(db, 3)
+    for livro in livros[:2]:
+        livro.editora = editora
+    db.commit()
+
+    resposta = cliente.get(f"/editoras/{editora.id}")
+    assert resposta.status_code == 200
+    assert "Companhia das Letras" in resposta.text
+    assert resposta.context["contagem"]["total"] == 2
+    assert _titulos(resposta.context["pagina"]) == [livro.titulo for livro in livros[:2]]
@@ -0,0 +1,115 @@
+"""Réplica de leitura: read-your-writes pela marca assinada e cópia única entre workers"""
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import cache_respostas as modulo_cache
+from app.core import replica
+from main import app
+
+from dados import criar_livros
+
+
+@pytest.fixture
+def sem_cache(monkeypatch):
+    monkeypatch.setattr(modulo_cache, "cache_respostas", None)
+
+
+def _titulo(cliente, livro_id: int) -> str:
+    resposta = cliente.get(f"/api/v1/livros/{livro_id}")
+    assert resposta.status_code == 200
+    return resposta.json()["titulo"]
+
+
+def test_quem_escreveu_le_do_primario_e_os_demais_da_replica(db, cliente, replica_sqlite, sem_cache):
+    livro, = criar_livros(db, 1)
+    titulo_antigo = livro.titulo
+    db.commit()
+    replica.atualizar_replica_sqlite()
+
+    resposta = cliente.put(f"/api/v1/livros/{livro.id}", json={"titulo": "Novo título"})
+    assert resposta.status_code == 200
+    assert replica.COOKIE_ESCRITA in resposta.cookies
+    assert replica.HEADER_ESCRITA in resposta.headers
+
+    # Quem escreveu (cookie guardado pelo cliente) lê a própria escrita
+    assert _titulo(cliente, livro.id) == "Novo título"
+    # Outro cliente do mesmo IP (ex.: atrás de NAT) continua na réplica
+    assert _titulo(TestClient(app), livro.id) == titulo_antigo
+    # Clientes sem cookies reenviam o header
+    marca = {replica.HEADER_ESCRITA: resposta.headers[replica.HEADER_ESCRITA]}
+    assert TestClient(app).get(f"/api/v1/livros/{livro.id}", headers=marca).json()["titulo"] == "Novo título"
+
+
+def test_marca_adulterada_ou_vencida_nao_vale(replica_sqlite):
+    marca = replica.marca_de_escrita(1_000_000.0)
+    _, assinatura = marca.rsplit(".", 1)
+
+    class Requisicao:
+        def __init__(self, valor):
+            self.cookies = {replica.COOKIE_ESCRITA: valor}
+            self.headers = {}
+            self.state = SimpleNamespace()
+
+    assert replica.ultima_escrita(Requisicao(marca)) == 1_000_000.0
+    assert replica.ultima_escrita(Requisicao(f"2000000.0.{assinatura}")) is None
+    assert replica.ultima_escrita(Requisicao("lixo")) is None
+    # Escrita antiga: fora da janela de READ_YOUR_WRITES_SEGUNDOS
+    assert not replica.usar_primario(Requisicao(marca))
+
+
+def test_replica_copiada_depois_da_escrita_volta_a_atender(db, cliente, replica_sqlite, sem_cache):
+    livro, = criar_livros(db, 1)
+    db.commit()
+    cliente.put(f"/api/v1/livros/{livro.id}", json={"titulo": "Novo título"})
+    leituras = dict(replica._leituras)
+
+    replica.atualizar_replica_sqlite()
+    assert _titulo(cliente, livro.id) == "Novo título"
+    assert replica._leituras["replica"] == leituras["replica"] + 1
+
+
+def test_copia_recente_de_outro_worker_nao_e_refeita(replica_sqlite):
+    copiada_em = replica.replica_copiada_em()
+    feitas = replica._copias["feitas"]
+
+    # Mesmo processo: a cópia é recente e as conexões já apontam para ela
+    assert replica.atualizar_replica_sqlite(idade_maxima=60) is False
+    # Outro worker: não copia de novo, só reabre as conexões
+    replica._copia_aberta = None
+    assert replica.atualizar_replica_sqlite(idade_maxima=60) is True
+    assert replica._copias["feitas"] == feitas
+    assert replica.replica_copiada_em() == copiada_em
+
+    # Cópia vencida: refeita
+    os.utime(replica_sqlite, (copiada_em - 120, copiada_em - 120))
+    assert replica.atualizar_replica_sqlite(idade_maxima=60) is True
+    assert replica._copias["feitas"] == feitas + 1
+
+
+def test_cache_nao_guarda_leitura_atrasada_da_replica(db, cliente, replica_sqlite):
+    livro, = criar_livros(db, 1)
+    titulo_antigo = livro.titulo
+    db.commit()
+    replica.atualizar_replica_sqlite()
+    caminho = f"/api/v1/livros/{livro.id}"
+    outro, terceiro = TestClient(app), TestClient(app)
+    assert outro.get(caminho).headers["x-cache"] == "MISS"
+
+    assert cliente.put(caminho, json={"titulo": "Novo título"}).status_code == 200
+    # Outro cliente ainda lê a réplica atrasada; a resposta não é guardada
+    # sob as gerações já invalidadas
+    resposta = outro.get(caminho)
+    assert (resposta.json()["titulo"], resposta.headers["x-cache"]) == (titulo_antigo, "MISS")
+    # Quem escreveu lê do primário, sem passar pelo cache
+    resposta = cliente.get(caminho)
+    assert resposta.json()["titulo"] == "Novo título"
+    assert "x-cache" not in resposta.headers
+
+    # Réplica copiada depois da escrita: a leitura dela volta a ser guardada
+    replica.atualizar_replica_sqlite()
+    assert _titulo(terceiro, livro.id) == "Novo título"
+    resposta = outro.get(caminho)
+    assert (resposta.json()["titulo"], resposta.headers["x-cache"]) == ("Novo título", "HIT")
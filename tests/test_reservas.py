@@ -0,0 +1,69 @@
+"""Fila de reservas: senha única por livro mesmo com INSERTs simultâneos"""
+from app.api.endpoints import reservas as endpoint
+from app.core import fila_reservas
+from app.models.models import Reserva, StatusReserva
+
+from dados import criar_emprestimo, criar_livros, criar_reserva, criar_usuarios
+
+
+def _reservar(cliente, usuario_id: int, livro_id: int):
+    return cliente.post("/api/v1/reservas/", json={"usuario_id": usuario_id, "livro_id": livro_id})
+
+
+def _senhas(db, livro_id: int) -> list:
+    db.expire_all()
+    return [
+        (reserva.usuario_id, reserva.posicao)
+        for reserva in db.query(Reserva)
+        .filter(Reserva.livro_id == livro_id, Reserva.status == StatusReserva.PENDENTE)
+        .order_by(Reserva.posicao)
+    ]
+
+
+def test_senha_repetida_de_insert_simultaneo_e_recalculada(db, cliente, monkeypatch):
+    leitor, primeiro, segundo = criar_usuarios(db, 3)
+    livro, = criar_livros(db, 1)
+    criar_emprestimo(db, leitor, livro)
+    criar_reserva(db, primeiro, livro, posicao=1)
+    db.commit()
+    chamadas = []
+
+    def senha_ja_ocupada(livro_id):
+        # Como no PostgreSQL: o INSERT concorrente ainda não era visível e
+        # a cauda calculada é a mesma do outro
+        chamadas.append(livro_id)
+        return 1 if len(chamadas) == 1 else fila_reservas.proxima_posicao(livro_id)
+
+    monkeypatch.setattr(endpoint, "proxima_posicao", senha_ja_ocupada)
+    resposta = _reservar(cliente, segundo.id, livro.id)
+
+    assert resposta.status_code == 201, resposta.text
+    assert resposta.json()["posicao_fila"] == 2
+    assert len(chamadas) == 2
+    assert _senhas(db, livro.id) == [(primeiro.id, 1), (segundo.id, 2)]
+
+
+def test_reserva_repetida_do_mesmo_usuario(db, cliente):
+    leitor, outro = criar_usuarios(db, 2)
+    livro, = criar_livros(db, 1)
+    criar_emprestimo(db, leitor, livro)
+    db.commit()
+
+    assert _reservar(cliente, outro.id, livro.id).status_code == 201
+    resposta = _reservar(cliente, outro.id, livro.id)
+    assert resposta.status_code == 400
+    assert "já possui" in resposta.json()["detail"]
+
+
+def test_cancelar_no_meio_mantem_senhas_consecutivas(db, cliente):
+    leitor, *fila = criar_usuarios(db, 4)
+    livro, = criar_livros(db, 1)
+    criar_emprestimo(db, leitor, livro)
+    reservas = [criar_reserva(db, usuario, livro, posicao) for posicao, usuario in enumerate(fila, start=1)]
+    db.commit()
+
+    resposta = cliente.delete(f"/api/v1/reservas/{reservas[0].id}")
+    assert resposta.status_code in (200, 204), resposta.text
+    assert _senhas(db, livro.id) == [(fila[1].id, 1), (fila[2].id, 2)]
+    # A cauda continua valendo para a próxima reserva
+    assert _reservar(cliente, fila[0].id, livro.id).json()["posicao_fila"] == 3
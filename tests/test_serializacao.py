@@ -0,0 +1,73 @@
+"""Serialização das respostas: orjson igual ao caminho padrão, MessagePack negociado"""
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.endpoints.emprestimos import EmprestimoResponse, ResultadoLoteEmprestimos
+
+from dados import criar_emprestimo, criar_livros, criar_usuarios
+
+msgpack = pytest.importorskip("msgpack")
+
+URLS = ["/api/v1/emprestimos/", "/api/v1/emprestimos/?cursor=", "/api/v1/livros/"]
+
+
+def _caminho_padrao(modelo, conteudo) -> bytes:
+    """Corpo que o FastAPI geraria validando com o response_model"""
+    return JSONResponse(jsonable_encoder(TypeAdapter(modelo).validate_python(conteudo))).body
+
+
+def _varia_com_accept(resposta) -> bool:
+    # Vary pode vir repetido (Accept-Encoding da compressão)
+    valores = ",".join(resposta.headers.get_list("vary"))
+    return "accept" in {valor.strip().lower() for valor in valores.split(",")}
+
+
+@pytest.fixture
+def acervo(db):
+    leitor, = criar_usuarios(db, 1)
+    livros = criar_livros(db, 3)
+    emprestimo = criar_emprestimo(db, leitor, livros[0], dias_atras=20)
+    emprestimo.observacoes = "Capa rasgada — devolver à seção"
+    emprestimo.multa = 12.5
+    db.commit()
+    return leitor, livros
+
+
+def test_json_igual_ao_do_caminho_padrao(cliente, acervo):
+    resposta = cliente.get("/api/v1/emprestimos/")
+    assert resposta.status_code == 200
+    assert resposta.content == _caminho_padrao(List[EmprestimoResponse], resposta.json())
+
+
+def test_lote_monta_sem_validar_e_serializa_igual(cliente, acervo):
+    leitor, livros = acervo
+    resposta = cliente.post("/api/v1/emprestimos/lote", json={
+        "usuario_id": leitor.id, "livro_ids": [livros[1].id, livros[0].id]
+    })
+    assert resposta.status_code == 200
+    assert resposta.json()["itens"][0]["emprestimo"]["livro_titulo"] == livros[1].titulo
+    assert resposta.content == _caminho_padrao(ResultadoLoteEmprestimos, resposta.json())
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_msgpack_com_o_mesmo_conteudo(cliente, acervo, url):
+    em_json = cliente.get(url)
+    # Duas vezes: nas rotas do catálogo, a segunda vem do cache de respostas
+    for _ in range(2):
+        resposta = cliente.get(url, headers={"Accept": "application/msgpack"})
+        assert resposta.status_code == 200
+        assert resposta.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(resposta.content) == em_json.json()
+        assert _varia_com_accept(resposta)
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_json_informa_vary_accept(cliente, acervo, url):
+    for aceita in (None, "application/json", "application/msgpack;q=0"):
+        resposta = cliente.get(url, headers={"Accept": aceita} if aceita else {})
+        assert resposta.headers["content-type"] == "application/json"
+        assert _varia_com_accept(resposta)
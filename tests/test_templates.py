@@ -0,0 +1,57 @@
+"""Templates: o modo de produção (fragmentos em cache) renderiza o mesmo HTML"""
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.templates import criar_ambiente
+
+CAMINHOS = ["/", "/livros", "/livros/42", "/autores", "/editoras/7", "/usuarios", "/dashboard", "/perfil"]
+
+# Item ativo esperado no menu para cada caminho
+ATIVO = {
+    "/": "/", "/livros": "/livros", "/livros/42": "/livros", "/autores": "/autores",
+    "/editoras/7": "/editoras", "/usuarios": "/usuarios", "/dashboard": "/dashboard", "/perfil": None,
+}
+
+
+def _renderizar(ambiente, caminho: str) -> str:
+    requisicao = SimpleNamespace(url=SimpleNamespace(path=caminho))
+    return ambiente.get_template("base.html").render(request=requisicao)
+
+
+def _item_ativo(html: str):
+    ativos = re.findall(r'class="nav-link active" href="([^"]*)"', html)
+    assert len(ativos) <= 1
+    return ativos[0] if ativos else None
+
+
+@pytest.fixture
+def ambientes(tmp_path):
+    return criar_ambiente(modo_producao=False), criar_ambiente(modo_producao=True, diretorio_cache=str(tmp_path))
+
+
+def test_producao_renderiza_o_mesmo_html(ambientes):
+    desenvolvimento, producao = ambientes
+    # Duas voltas: a segunda usa os fragmentos guardados na primeira
+    for _ in range(2):
+        for caminho in CAMINHOS:
+            assert _renderizar(producao, caminho) == _renderizar(desenvolvimento, caminho)
+
+
+def test_menu_marca_a_secao_do_caminho(ambientes):
+    _, producao = ambientes
+    for caminho in CAMINHOS + list(reversed(CAMINHOS)):
+        assert _item_ativo(_renderizar(producao, caminho)) == ATIVO[caminho], caminho
+
+
+def test_fragmento_do_menu_e_um_por_secao(ambientes):
+    _, producao = ambientes
+    for caminho in CAMINHOS:
+        _renderizar(producao, caminho)
+
+    fragmentos = producao.fragmentos_em_cache.estatisticas()
+    secoes = {caminho.split("/")[1] for caminho in CAMINHOS}
+    # Cabeçalho e rodapé uma vez; o menu uma vez por seção
+    assert fragmentos["itens"] == 2 + len(secoes)
+    assert criar_ambiente(modo_producao=False).fragmentos_em_cache is None